@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Hashable, Protocol
+
+from . import config
+from .events import hub
+from .metrics import registry
+
+
+class CacheBackend(Protocol):
+    """Minimal key/value interface; implement it over Redis/memcached to share a cache between workers."""
+
+    def get(self, key: Hashable) -> Any | None: ...
+
+    def set(self, key: Hashable, value: Any) -> None: ...
+
+    def delete(self, key: Hashable) -> None: ...
+
+    def __len__(self) -> int: ...
+
+
+class TTLCache:
+    """In-process LRU cache whose entries also expire after `ttl` seconds."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any | None:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SummaryCache:
+    """Dashboard summaries keyed by (user_id, day), with hit/miss counters."""
+
+    def __init__(self, backend: CacheBackend, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int, day: date) -> dict | None:
+        if not self.enabled:
+            return None
+        value = self.backend.get((user_id, day))
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, user_id: int, day: date, summary: dict) -> None:
+        if self.enabled:
+            self.backend.set((user_id, day), summary)
+
+    def invalidate(self, user_id: int, day: date | None = None) -> None:
+        """Drop a user's summary; call after any write that feeds into it.
+
+        That clears this worker only; the other workers clear theirs when the
+        write's change notification reaches them (see _summary_changed).
+        """
+        self.backend.delete((user_id, day or date.today()))
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.backend)}
+
+
+dashboard_cache = SummaryCache(
+    TTLCache(maxsize=config.DASHBOARD_CACHE_MAX_ENTRIES, ttl=config.DASHBOARD_CACHE_TTL_SECONDS),
+    enabled=config.DASHBOARD_CACHE_TTL_SECONDS > 0,
+)
+
+
+def _summary_changed(user_id: int, event: dict) -> None:
+    # Writes handled by any worker publish these after committing, so every
+    # worker's copy goes within the fan-out's delivery time (or, should a
+    # notification be dropped, DASHBOARD_CACHE_TTL_SECONDS)
+    if event["topic"] in ("steps", "profile"):
+        day = event.get("day")
+        dashboard_cache.invalidate(user_id, date.fromisoformat(day) if day else None)
+
+
+hub.add_listener(_summary_changed)
+
+
+@registry.collector
+def _dashboard_cache_metrics():
+    yield "dashboard_cache_hits_total", "counter", "Dashboard summaries served from cache.", [((), dashboard_cache.hits)]
+    yield "dashboard_cache_misses_total", "counter", "Dashboard summaries computed from the database.", [((), dashboard_cache.misses)]
+    yield "dashboard_cache_entries", "gauge", "Dashboard summaries currently cached.", [((), len(dashboard_cache.backend))]
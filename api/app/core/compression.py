@@ -0,0 +1,183 @@
+"""Negotiated response compression: zstd, brotli or gzip.
+
+Pure ASGI middleware. For each response it picks the coding the client
+prefers in Accept-Encoding (q-values first, then COMPRESSION_CODINGS order)
+among the codecs installed here: gzip always, zstd with `zstandard`, br with
+`brotli`. Left alone:
+
+- bodies under COMPRESSION_MIN_BYTES;
+- types that don't compress or must not be buffered, such as images or
+  text/event-stream;
+- responses that already have a Content-Encoding;
+- HEAD requests, and 204 and 304 responses.
+
+Streaming responses (e.g. /export) are compressed chunk by chunk.
+
+A compressed response's ETag is made weak, since its bytes differ per coding.
+If-None-Match compares weakly, so revalidation keeps working (see versions.py).
+"""
+from __future__ import annotations
+
+import zlib
+from typing import Callable, Protocol
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from . import config
+from .metrics import registry
+
+
+class Compressor(Protocol):
+    def compress(self, data: bytes) -> bytes: ...
+
+    def flush(self) -> bytes: ...
+
+
+class _Brotli:
+    def __init__(self, brotli):
+        self._c = brotli.Compressor(quality=config.COMPRESSION_BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.process(data)
+
+    def flush(self) -> bytes:
+        return self._c.finish()
+
+
+def _available_codecs() -> dict[str, Callable[[], Compressor]]:
+    codecs: dict[str, Callable[[], Compressor]] = {
+        # wbits=31: gzip container rather than raw zlib
+        "gzip": lambda: zlib.compressobj(config.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31),
+    }
+    try:
+        import zstandard
+    except ImportError:
+        pass
+    else:
+        codecs["zstd"] = lambda: zstandard.ZstdCompressor(level=config.COMPRESSION_ZSTD_LEVEL).compressobj()
+    try:
+        import brotli
+    except ImportError:
+        pass
+    else:
+        codecs["br"] = lambda: _Brotli(brotli)
+    return codecs
+
+
+CODECS = _available_codecs()
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/msgpack",
+    "text/csv",
+    "text/plain",
+    "text/html",
+)
+
+bytes_in_total = registry.counter(
+    "http_compression_bytes_in_total", "Response bytes before compression, by coding."
+)
+bytes_out_total = registry.counter(
+    "http_compression_bytes_out_total", "Response bytes after compression, by coding."
+)
+
+
+def _compressible(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    # Vendor types like application/vnd.sweat.columnar+json compress like their suffix
+    if "+" in media_type:
+        media_type = media_type.split("/", 1)[0] + "/" + media_type.rsplit("+", 1)[1]
+    return media_type in COMPRESSIBLE_TYPES
+
+
+def choose_coding(accept_encoding: str, preference: tuple[str, ...]) -> str | None:
+    """Best coding in `preference` that the Accept-Encoding header allows, or None for identity."""
+    weights: dict[str, float] = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name:
+            weights[name.strip()] = q
+
+    best, best_q = None, 0.0
+    for coding in preference:
+        q = weights.get(coding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = config.COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.preference = tuple(c for c in config.COMPRESSION_CODINGS if c in CODECS)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        coding = choose_coding(Headers(scope=scope).get("accept-encoding", ""), self.preference)
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        compressor: Compressor | None = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start = message  # held back until the first body chunk decides
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more = message.get("more_body", False)
+            if compressor is None:
+                headers = MutableHeaders(scope=start)
+                if (
+                    start["status"] in (204, 304)
+                    or "content-encoding" in headers
+                    or not _compressible(headers.get("content-type", ""))
+                    or (not more and len(body) < self.minimum_size)
+                ):
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+
+                compressor = CODECS[coding]()
+                headers["Content-Encoding"] = coding
+                headers.add_vary_header("Accept-Encoding")
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = "W/" + etag
+                del headers["Content-Length"]
+
+                data = compressor.compress(body)
+                if not more:
+                    data += compressor.flush()
+                    headers["Content-Length"] = str(len(data))
+                await send(start)
+            else:
+                data = compressor.compress(body)
+                if not more:
+                    data += compressor.flush()
+
+            bytes_in_total.inc(len(body), coding=coding)
+            bytes_out_total.inc(len(data), coding=coding)
+            await send({"type": "http.response.body", "body": data, "more_body": more})
+
+        await self.app(scope, receive, send_wrapper)
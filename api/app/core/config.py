@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 from dotenv import load_dotenv
 
@@ -16,3 +17,146 @@ SECRET_KEY = os.getenv("SECRET_KEY", "dev_only_change_me")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
+
+# Database
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./sweat.db")
+
+# Separate connection pool for GET routes; point it at a replica if you have one
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL", DATABASE_URL)
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "20"))
+
+# Horizontal sharding of per-user tables (see app/core/sharding.py): comma-separated
+# name=url pairs, e.g. "s0=sqlite:///./shard0.db,s1=sqlite:///./shard1.db".
+# DATABASE_URL stays the directory (users and their placement). Empty: no sharding
+SHARD_URLS = os.getenv("SHARD_URLS", "")
+
+# Points per shard on the hash ring; more points spread users more evenly
+SHARD_VNODES = int(os.getenv("SHARD_VNODES", "160"))
+
+# Seconds a worker trusts its cached user -> shard placement; the rebalancer
+# waits this long after fencing users before it copies their rows
+SHARD_PLACEMENT_TTL = float(os.getenv("SHARD_PLACEMENT_TTL", "5"))
+
+# SQLite tuning (ignored for other backends)
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+
+# Bytes of the database file to memory-map (0 disables mmap)
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+# Page cache per connection; negative values are KiB, positive values are pages
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-32768"))
+
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+# IMMEDIATE takes the write lock when a write transaction begins, so concurrent
+# writers wait on busy_timeout instead of failing with "database is locked"
+SQLITE_BEGIN_MODE = os.getenv("SQLITE_BEGIN_MODE", "IMMEDIATE")
+
+# Run migrations in the app's startup hook; the gunicorn master turns this off
+# for its workers because it has already migrated once before forking
+MIGRATE_ON_STARTUP = os.getenv("MIGRATE_ON_STARTUP", "1").lower() in ("1", "true", "yes")
+
+# Serve the hot routes from async handlers on an async engine (aiosqlite/asyncpg)
+DB_ASYNC = os.getenv("DB_ASYNC", "0").lower() in ("1", "true", "yes")
+
+# Dashboard summary cache (set the TTL to 0 to disable caching)
+DASHBOARD_CACHE_TTL_SECONDS = float(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", "60"))
+
+DASHBOARD_CACHE_MAX_ENTRIES = int(os.getenv("DASHBOARD_CACHE_MAX_ENTRIES", "10000"))
+
+# Progression engine: which rule recommends the next weight ("rep_threshold")
+PROGRESSION_RULE = os.getenv("PROGRESSION_RULE", "rep_threshold")
+
+# "inline" updates progress in the set-insert transaction; "background" after the response
+PROGRESSION_MODE = os.getenv("PROGRESSION_MODE", "inline")
+
+# Sessions whose recorded exercises the engine remembers, and for how long; a
+# set of a remembered exercise skips the first-set lookup
+PROGRESSION_CACHE_SESSIONS = int(os.getenv("PROGRESSION_CACHE_SESSIONS", "10000"))
+PROGRESSION_CACHE_TTL_SECONDS = float(os.getenv("PROGRESSION_CACHE_TTL_SECONDS", "300"))
+
+# pbkdf2_sha256 rounds for new hashes; stored hashes with other rounds are rehashed on login
+PASSWORD_HASH_ROUNDS = int(os.getenv("PASSWORD_HASH_ROUNDS", "29000"))
+
+# Threads reserved for password hashing, so logins can't starve the request threadpool
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+
+# Decoded access tokens kept in memory by get_current_user
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000"))
+
+# Write-behind mode for /steps/update and add_set: events are queued, coalesced
+# and group-committed, and each request is answered once its batch is committed
+WRITE_BEHIND = os.getenv("WRITE_BEHIND", "0").lower() in ("1", "true", "yes")
+
+# Flush when the oldest queued event is this old, or when this many are queued
+WRITE_BEHIND_FLUSH_MS = float(os.getenv("WRITE_BEHIND_FLUSH_MS", "5"))
+
+WRITE_BEHIND_MAX_BATCH = int(os.getenv("WRITE_BEHIND_MAX_BATCH", "500"))
+
+# Events waiting beyond this are refused with 503 instead of queued
+WRITE_BEHIND_MAX_QUEUE = int(os.getenv("WRITE_BEHIND_MAX_QUEUE", "10000"))
+
+# Delta sync (GET/POST /sync): client mutation outcomes are kept this long for
+# replay by idempotency key; prune older ones with `python -m app.core.sync prune`
+SYNC_MUTATION_TTL_DAYS = float(os.getenv("SYNC_MUTATION_TTL_DAYS", "30"))
+
+# Change notifications (GET /events): "local" delivers within this worker only;
+# "unix" also fans out to every worker on the host through datagram sockets in
+# EVENTS_SOCKET_DIR (gunicorn with several workers)
+EVENTS_BACKEND = os.getenv("EVENTS_BACKEND", "local")
+
+EVENTS_SOCKET_DIR = os.getenv("EVENTS_SOCKET_DIR", os.path.join(tempfile.gettempdir(), "sweat-events"))
+
+# A comment line is sent after this many idle seconds, so proxies keep the stream open
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+
+# A client that hasn't accepted a write for this long is disconnected
+EVENTS_SEND_TIMEOUT_SECONDS = float(os.getenv("EVENTS_SEND_TIMEOUT_SECONDS", "10"))
+
+# Open streams per worker; more get 503
+EVENTS_MAX_STREAMS = int(os.getenv("EVENTS_MAX_STREAMS", "10000"))
+
+# Idempotency-Key on the create routes (see app/core/idempotency.py): "memory"
+# keeps keys in this worker; "sql" keeps them in the directory database, shared
+# by every worker (gunicorn.conf.py picks it)
+IDEMPOTENCY_BACKEND = os.getenv("IDEMPOTENCY_BACKEND", "memory")
+
+# A stored response is replayed for this long after the first request
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", str(24 * 3600)))
+
+# A key whose first request hasn't finished after this long is given to the next
+# retry (its worker presumably died); keep it above GUNICORN_TIMEOUT
+IDEMPOTENCY_LEASE_SECONDS = float(os.getenv("IDEMPOTENCY_LEASE_SECONDS", "60"))
+
+# Keys kept by the memory backend; the oldest are evicted first
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "100000"))
+
+# Statements slower than this are logged (logger "sweat.sql") and counted
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+
+# Workout search ranks (bm25) only the most recent N sessions matching a query,
+# so very common terms cost the same as rare ones; later pages stay in that window
+SEARCH_RANK_WINDOW = int(os.getenv("SEARCH_RANK_WINDOW", "5000"))
+
+# Response compression: codings in server preference order (ones whose library
+# isn't installed are skipped; gzip is always available), and the smallest body
+# worth compressing
+COMPRESSION_CODINGS = tuple(
+    c.strip() for c in os.getenv("COMPRESSION_CODINGS", "zstd,br,gzip").split(",") if c.strip()
+)
+
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+
+COMPRESSION_ZSTD_LEVEL = int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3"))
+
+# Brotli's high qualities are far too slow for per-request compression
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
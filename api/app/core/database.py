@@ -1,38 +1,295 @@
-from typing import Generator
+import os
+from typing import AsyncGenerator, Generator
 
 from sqlalchemy import create_engine, event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase, Session
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./sweat.db"
+from . import config
+from .metrics import instrument_engine
+from .sharding import DIRECTORY, HashRing, Placements, parse_shard_urls
 
-# Create engine
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False} if SQLALCHEMY_DATABASE_URL.startswith("sqlite") else {},
-    pool_pre_ping=True,  # helps to avoid stale connections (esp. with Postgres later)
-)
+SQLALCHEMY_DATABASE_URL = config.DATABASE_URL
 
-# Ensure SQLite enforces foreign key constraint
-@event.listens_for(engine, "connect")
-def _set_sqlite_pragma(dbapi_connection, _):
-    if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
+
+def _is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+def to_async_url(url: str) -> str:
+    """Swap a sync driver URL for its async counterpart (aiosqlite / asyncpg)."""
+    scheme, sep, rest = url.partition("://")
+    backend = scheme.split("+", 1)[0]
+    if backend == "sqlite":
+        return f"sqlite+aiosqlite{sep}{rest}"
+    if backend in ("postgresql", "postgres"):
+        return f"postgresql+asyncpg{sep}{rest}"
+    return url
+
+
+def dialect_insert(dialect_name: str):
+    """insert() with on_conflict_do_update() for the given dialect (SQLite or Postgres)."""
+    return postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+
+
+def _install_sqlite_pragmas(engine: Engine, *, read_only: bool) -> None:
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragma(dbapi_connection, _):
         cursor = dbapi_connection.cursor()
+        # Ensure SQLite enforces foreign key constraint
         cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.execute(f"PRAGMA busy_timeout={config.SQLITE_BUSY_TIMEOUT_MS}")
+        if not read_only:
+            # journal_mode is persistent in the file, so only the writer sets it
+            cursor.execute(f"PRAGMA journal_mode={config.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={config.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA mmap_size={config.SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA cache_size={config.SQLITE_CACHE_SIZE}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
         cursor.close()
+        # Let SQLAlchemy's "begin" event below emit BEGIN itself
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(conn):
+        mode = "DEFERRED" if read_only else config.SQLITE_BEGIN_MODE
+        conn.exec_driver_sql(f"BEGIN {mode}")
+
+
+def create_db_engine(url: str, *, read_only: bool = False) -> Engine:
+    """Build an engine with the pool and pragma profile from core/config.py."""
+    if not _is_sqlite(url):
+        engine = create_engine(
+            url,
+            pool_size=config.DB_READ_POOL_SIZE if read_only else config.DB_POOL_SIZE,
+            max_overflow=config.DB_MAX_OVERFLOW,
+            pool_pre_ping=True,  # helps to avoid stale connections
+        )
+        instrument_engine(engine)
+        return engine
+
+    engine = create_engine(
+        url,
+        connect_args={
+            "check_same_thread": False,
+            "timeout": config.SQLITE_BUSY_TIMEOUT_MS / 1000,
+        },
+        pool_size=config.DB_READ_POOL_SIZE if read_only else config.DB_POOL_SIZE,
+        max_overflow=config.DB_MAX_OVERFLOW,
+        # A local file never goes stale; pre-ping would only add a SELECT per checkout
+        pool_pre_ping=False,
+    )
+    _install_sqlite_pragmas(engine, read_only=read_only)
+    instrument_engine(engine)
+    return engine
+
+
+def create_async_db_engine(url: str, *, read_only: bool = False) -> AsyncEngine:
+    """Async twin of create_db_engine(); takes the sync URL and picks the async driver."""
+    async_url = to_async_url(url)
+    pool_size = config.DB_READ_POOL_SIZE if read_only else config.DB_POOL_SIZE
+
+    if not _is_sqlite(url):
+        engine = create_async_engine(
+            async_url,
+            pool_size=pool_size,
+            max_overflow=config.DB_MAX_OVERFLOW,
+            pool_pre_ping=True,
+        )
+        instrument_engine(engine.sync_engine)
+        return engine
+
+    engine = create_async_engine(
+        async_url,
+        connect_args={"timeout": config.SQLITE_BUSY_TIMEOUT_MS / 1000},
+        pool_size=pool_size,
+        max_overflow=config.DB_MAX_OVERFLOW,
+        pool_pre_ping=False,
+    )
+    _install_sqlite_pragmas(engine.sync_engine, read_only=read_only)
+    instrument_engine(engine.sync_engine)
+    return engine
+
+
+class _PerProcess:
+    """A value built on first use in each process.
+
+    Engines and their pools must not cross a fork: the pre-fork master (see
+    gunicorn.conf.py) imports the app but never touches the database through
+    these, and each worker builds its own on its first request. If a value
+    was built before a fork anyway, the child drops the inherited pool
+    without closing the parent's connections, then builds a fresh one.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._value = None
+        self._pid: int | None = None
+
+    def get(self):
+        pid = os.getpid()
+        if self._pid != pid:
+            if self._value is not None:
+                getattr(self._value, "sync_engine", self._value).dispose(close=False)
+            self._value = self._factory()
+            self._pid = pid
+        return self._value
+
+    def built(self):
+        """The value if this process already built it, else None."""
+        return self._value if self._pid == os.getpid() else None
+
+
+class _LazySessionFactory:
+    """A sessionmaker whose engine is only built on the first session, i.e. after fork."""
+
+    def __init__(self, engine: _PerProcess, maker=sessionmaker, **kw):
+        self._engine = engine
+        self._maker = maker
+        self._kw = kw
+        self._bound = None
+
+    def __call__(self, **local_kw):
+        engine = self._engine.get()
+        if self._bound is None or self._bound.kw["bind"] is not engine:
+            self._bound = self._maker(bind=engine, **self._kw)
+        return self._bound(**local_kw)
+
+
+class _Database:
+    """Engines and session factories of one database: the directory or a shard."""
+
+    def __init__(self, url: str, read_url: str):
+        self.engine = _PerProcess(lambda: create_db_engine(url))
+        self.read_engine = _PerProcess(lambda: create_db_engine(read_url, read_only=True))
+        # Async engines are only built when the async path is used (needs aiosqlite/asyncpg)
+        self.async_engine = _PerProcess(lambda: create_async_db_engine(url))
+        self.async_read_engine = _PerProcess(lambda: create_async_db_engine(read_url, read_only=True))
+
+        # one session per request
+        self.sessions = _LazySessionFactory(self.engine, autoflush=False, autocommit=False)
+        self.read_sessions = _LazySessionFactory(self.read_engine, autoflush=False, autocommit=False)
+        self.async_sessions = _LazySessionFactory(
+            self.async_engine, async_sessionmaker, autoflush=False, expire_on_commit=False
+        )
+        self.async_read_sessions = _LazySessionFactory(
+            self.async_read_engine, async_sessionmaker, autoflush=False, expire_on_commit=False
+        )
+
+    async def dispose(self) -> None:
+        for slot in (self.async_engine, self.async_read_engine):
+            eng = slot.built()
+            if eng is not None:
+                await eng.dispose()
+        for slot in (self.engine, self.read_engine):
+            eng = slot.built()
+            if eng is not None:
+                eng.dispose()
+
+
+SHARDS = parse_shard_urls(config.SHARD_URLS)
+RING = HashRing(SHARDS)
+
+_databases = {
+    DIRECTORY: _Database(SQLALCHEMY_DATABASE_URL, config.DATABASE_READ_URL),
+    **{name: _Database(url, url) for name, url in SHARDS.items()},
+}
+_directory = _databases[DIRECTORY]
+
 
-# one session per request
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+def database_urls() -> dict[str, str]:
+    """Every database the app writes to, by placement name: the directory first, then the shards."""
+    return {DIRECTORY: SQLALCHEMY_DATABASE_URL, **SHARDS}
+
+
+def get_engine(name: str = DIRECTORY) -> Engine:
+    return _databases[name].engine.get()
+
+
+def get_read_engine(name: str = DIRECTORY) -> Engine:
+    return _databases[name].read_engine.get()
+
+
+# Sessions on the directory (DATABASE_URL); without SHARD_URLS it holds everything
+SessionLocal = _directory.sessions
+ReadSessionLocal = _directory.read_sessions
+AsyncSessionLocal = _directory.async_sessions
+AsyncReadSessionLocal = _directory.async_read_sessions
+
+placements = Placements(ReadSessionLocal)
+
+# The routers act for TEMP_USER_ID until they read the user from the token, so
+# request sessions go to that user's shard
+ACTING_USER_ID = 1
+
+
+def shard_of(user_id: int) -> str:
+    """Placement name of the database holding `user_id`'s rows; DIRECTORY when not sharded."""
+    return placements.shard_of(user_id) if SHARDS else DIRECTORY
+
+
+def _database_of(user_id: int) -> _Database:
+    name = shard_of(user_id)
+    try:
+        return _databases[name]
+    except KeyError:
+        raise RuntimeError(f"user {user_id} is placed on shard {name!r}, which is not in SHARD_URLS") from None
+
+
+def session_for(user_id: int, *, read_only: bool = False) -> Session:
+    """A new session on the database holding `user_id`'s rows."""
+    database = _database_of(user_id)
+    return (database.read_sessions if read_only else database.sessions)()
+
+
+def async_session_for(user_id: int, *, read_only: bool = False) -> AsyncSession:
+    database = _database_of(user_id)
+    return (database.async_read_sessions if read_only else database.async_sessions)()
+
+
+async def dispose_engines() -> None:
+    """Close the pools this process opened; for the shutdown hook."""
+    for database in _databases.values():
+        await database.dispose()
 
 # SQLAlchemy 2.0
 class Base(DeclarativeBase):
     """Base class for all ORM models."""
     pass
 
-def get_db() -> Generator[Session, None, None]:
-    """FastAPI dependency that provides a DB session and guarantees cleanup."""
+def get_directory_db() -> Generator[Session, None, None]:
+    """A session on the directory database, for `users` lookups that aren't per-user (login, registration)."""
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
+# Per-request sessions, on the shard of the user the route acts for. The
+# dependency's `user_id` parameter and the route's share the one query value,
+# so every per-user route must depend on one of these.
+
+def get_user_db(user_id: int = ACTING_USER_ID) -> Generator[Session, None, None]:
+    db = session_for(user_id)
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_user_read_db(user_id: int = ACTING_USER_ID) -> Generator[Session, None, None]:
+    db = session_for(user_id, read_only=True)
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_user_db(user_id: int = ACTING_USER_ID) -> AsyncGenerator[AsyncSession, None]:
+    async with async_session_for(user_id) as db:
+        yield db
+
+async def get_async_user_read_db(user_id: int = ACTING_USER_ID) -> AsyncGenerator[AsyncSession, None]:
+    async with async_session_for(user_id, read_only=True) as db:
+        yield db
@@ -0,0 +1,350 @@
+"""Per-user change notifications for open screens, over server-sent events.
+
+Clients keep GET /events open and refetch a screen when its topic arrives,
+instead of polling /dashboard/summary and /tasks/today on a timer::
+
+    event: tasks
+    data: {"day":"2026-10-18"}
+
+Routes call hub.publish() after they commit. Topics are steps and tasks
+(with the day) and profile; the dashboard summary depends on all three.
+
+Backpressure: a stream holds at most one pending notification per
+(topic, day), so a client that reads slowly gets the latest of each and
+never a growing backlog. A client that doesn't accept a write for
+EVENTS_SEND_TIMEOUT_SECONDS is disconnected (EventSource reconnects by
+itself). Idle streams get a comment line every EVENTS_HEARTBEAT_SECONDS,
+so proxies and load balancers keep them open.
+
+The hub is per worker. Its FanOut carries each notification to the hub of
+every worker: LocalFanOut within one process, UnixSocketFanOut to every
+worker on the host (EVENTS_BACKEND=unix, for gunicorn). Implement FanOut
+over Redis pub/sub or Postgres LISTEN/NOTIFY to span hosts. Per-worker caches
+subscribe with hub.add_listener() to hear every notification, streams or not;
+the startup hook starts the fan-out so they do from the first request on.
+
+Measure idle streams per worker with::
+
+    python -m benchmarks.sse_idle
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import os
+import socket
+import threading
+from datetime import date
+from typing import Callable, Protocol
+
+import orjson
+from fastapi import HTTPException
+from starlette.responses import Response
+
+from . import config
+from .metrics import registry
+
+published_total = registry.counter("events_published_total", "Change notifications published, by topic.")
+coalesced_total = registry.counter(
+    "events_coalesced_total", "Notifications merged into one already pending for the same stream."
+)
+slow_consumers_total = registry.counter(
+    "events_slow_consumers_total", "Event streams closed because the client stopped reading."
+)
+fanout_dropped_total = registry.counter(
+    "events_fanout_dropped_total", "Notifications not handed to another worker because its socket buffer was full."
+)
+
+Deliver = Callable[[int, dict], None]
+
+
+class FanOut(Protocol):
+    """Carries notifications to the hub of every worker."""
+
+    def start(self, deliver: Deliver) -> None:
+        """Begin calling deliver(user_id, event) for every notification; called on the worker's event loop."""
+
+    def publish(self, user_id: int, event: dict) -> None:
+        """Send a notification to every worker, this one included; called from any thread."""
+
+    def close(self) -> None: ...
+
+
+class LocalFanOut:
+    """Notifications stay in this process."""
+
+    def __init__(self):
+        self._deliver: Deliver | None = None
+
+    def start(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    def publish(self, user_id: int, event: dict) -> None:
+        if self._deliver is not None:
+            self._deliver(user_id, event)
+
+    def close(self) -> None:
+        self._deliver = None
+
+
+class UnixSocketFanOut:
+    """Every worker on the host binds a datagram socket in `directory`; publishing sends to all of them.
+
+    A worker binds its socket when its hub starts (the app's startup hook, or
+    its first stream). Sockets left by workers that died are removed by the
+    first publisher to find them.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._deliver: Deliver | None = None
+        self._sock: socket.socket | None = None
+        self._path: str | None = None
+        self._sender: socket.socket | None = None
+        self._sender_pid: int | None = None
+        self._lock = threading.Lock()
+
+    def start(self, deliver: Deliver) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        self._path = os.path.join(self.directory, f"{os.getpid()}.sock")
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self._path)  # left by an earlier process with our pid
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.bind(self._path)
+        self._sock.setblocking(False)
+        self._deliver = deliver
+        asyncio.get_running_loop().add_reader(self._sock.fileno(), self._receive)
+
+    def _receive(self) -> None:
+        while True:
+            try:
+                data = self._sock.recv(65536)
+            except BlockingIOError:
+                return
+            user_id, event = orjson.loads(data)
+            self._deliver(user_id, event)
+
+    def _sender_socket(self) -> socket.socket:
+        # Per process: a socket inherited across fork would be shared with the master
+        with self._lock:
+            if self._sender_pid != os.getpid():
+                self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+                self._sender.setblocking(False)
+                self._sender_pid = os.getpid()
+            return self._sender
+
+    def publish(self, user_id: int, event: dict) -> None:
+        try:
+            entries = [e.path for e in os.scandir(self.directory) if e.name.endswith(".sock")]
+        except FileNotFoundError:
+            return  # no worker has a stream open yet
+        data = orjson.dumps([user_id, event])
+        sender = self._sender_socket()
+        for path in entries:
+            try:
+                sender.sendto(data, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(path)
+            except BlockingIOError:
+                fanout_dropped_total.inc()
+
+    def close(self) -> None:
+        if self._sock is None:
+            return
+        with contextlib.suppress(RuntimeError):  # the loop is already closed
+            asyncio.get_running_loop().remove_reader(self._sock.fileno())
+        self._sock.close()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self._path)
+        self._sock = self._deliver = None
+
+
+class Subscription:
+    """One open stream's pending notifications, at most one per (topic, day)."""
+
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self.closed = False
+        self._pending: dict[tuple, dict] = {}
+        self._ready = asyncio.Event()
+
+    def offer(self, event: dict) -> None:
+        key = (event["topic"], event.get("day"))
+        if key in self._pending:
+            coalesced_total.inc()
+        self._pending[key] = event
+        self._ready.set()
+
+    def close(self) -> None:
+        self.closed = True
+        self._ready.set()
+
+    async def next(self, timeout: float) -> list[dict]:
+        """Everything pending, waiting up to `timeout` seconds for something; [] on timeout or close."""
+        if not self._pending and not self.closed:
+            # A timer handle rather than wait_for(), which costs every idle stream a task
+            timer = asyncio.get_running_loop().call_later(timeout, self._ready.set)
+            try:
+                await self._ready.wait()
+            finally:
+                timer.cancel()
+        self._ready.clear()
+        events, self._pending = list(self._pending.values()), {}
+        return events
+
+
+class Hub:
+    def __init__(self, fanout: FanOut, max_streams: int = config.EVENTS_MAX_STREAMS):
+        self.fanout = fanout
+        self.max_streams = max_streams
+        self._streams: dict[int, set[Subscription]] = {}
+        self._count = 0
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._listeners: list[Deliver] = []
+
+    @property
+    def open_streams(self) -> int:
+        return self._count
+
+    def add_listener(self, listener: Deliver) -> None:
+        """Call listener(user_id, event) for every notification this worker receives, from any thread."""
+        self._listeners.append(listener)
+
+    def start(self) -> None:
+        """Start receiving notifications from the fan-out; call on the event loop."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # First call in this worker (or a new loop, as in tests)
+            self.fanout.close()
+            self.fanout.start(self._deliver)
+            self._loop = loop
+
+    def subscribe(self, user_id: int) -> Subscription:
+        """Open a stream for `user_id`; call on the event loop. 503 once max_streams are open."""
+        self.start()
+        with self._lock:
+            if self._count >= self.max_streams:
+                raise HTTPException(status_code=503, detail="Too many open event streams", headers={"Retry-After": "5"})
+            sub = Subscription(user_id)
+            self._streams.setdefault(user_id, set()).add(sub)
+            self._count += 1
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            subs = self._streams.get(sub.user_id)
+            if subs is None or sub not in subs:
+                return
+            subs.discard(sub)
+            if not subs:
+                del self._streams[sub.user_id]
+            self._count -= 1
+
+    def publish(self, user_id: int, topic: str, day: date | None = None) -> None:
+        """Tell `user_id`'s open screens, in every worker, that `topic` changed; call after committing."""
+        event = {"topic": topic}
+        if day is not None:
+            event["day"] = day.isoformat()
+        self.fanout.publish(user_id, event)
+        published_total.inc(topic=topic)
+
+    def _deliver(self, user_id: int, event: dict) -> None:
+        # From request threads, the event loop, or a fan-out reader
+        for listener in self._listeners:
+            listener(user_id, event)
+        with self._lock:
+            subs = list(self._streams.get(user_id, ()))
+        if not subs:
+            return
+        with contextlib.suppress(RuntimeError):  # the loop has closed
+            self._loop.call_soon_threadsafe(_offer_all, subs, event)
+
+    def close(self) -> None:
+        self.fanout.close()
+        self._loop = None
+
+
+def _offer_all(subs: list[Subscription], event: dict) -> None:
+    for sub in subs:
+        sub.offer(event)
+
+
+def _encode(event: dict) -> bytes:
+    data = {k: v for k, v in event.items() if k != "topic"}
+    return b"event: " + event["topic"].encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+# Sent first: how long EventSource waits before reconnecting
+_RETRY = b"retry: 3000\n\n"
+_HEARTBEAT = b": ping\n\n"
+
+
+class EventStreamResponse(Response):
+    """Streams a subscription as text/event-stream until the client disconnects or stops reading."""
+
+    media_type = "text/event-stream"
+
+    def __init__(
+        self,
+        hub: Hub,
+        subscription: Subscription,
+        heartbeat: float = config.EVENTS_HEARTBEAT_SECONDS,
+        send_timeout: float = config.EVENTS_SEND_TIMEOUT_SECONDS,
+    ):
+        # As StreamingResponse does: no body, so no Content-Length. no-transform and
+        # X-Accel-Buffering keep proxies from buffering or compressing the stream
+        self.status_code = 200
+        self.background = None
+        self.init_headers({"Cache-Control": "no-cache, no-transform", "X-Accel-Buffering": "no"})
+        self.hub = hub
+        self.subscription = subscription
+        self.heartbeat = heartbeat
+        self.send_timeout = send_timeout
+
+    async def __call__(self, scope, receive, send) -> None:
+        sub = self.subscription
+        disconnected = False
+
+        async def watch_disconnect() -> None:
+            nonlocal disconnected
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            disconnected = True
+            sub.close()
+
+        watcher = asyncio.create_task(watch_disconnect())
+        try:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            chunk = _RETRY
+            while not sub.closed:
+                await asyncio.wait_for(
+                    send({"type": "http.response.body", "body": chunk, "more_body": True}), self.send_timeout
+                )
+                chunk = b"".join(_encode(e) for e in await sub.next(self.heartbeat)) or _HEARTBEAT
+        except asyncio.TimeoutError:
+            slow_consumers_total.inc()
+        except OSError:
+            disconnected = True
+        finally:
+            watcher.cancel()
+            self.hub.unsubscribe(sub)
+
+        if not disconnected:
+            with contextlib.suppress(asyncio.TimeoutError, OSError):
+                await asyncio.wait_for(send({"type": "http.response.body", "body": b""}), 1)
+
+
+def _fanout() -> FanOut:
+    if config.EVENTS_BACKEND == "unix":
+        return UnixSocketFanOut(config.EVENTS_SOCKET_DIR)
+    return LocalFanOut()
+
+
+hub = Hub(_fanout())
+
+
+@registry.collector
+def _stream_metrics():
+    yield "events_open_streams", "gauge", "Event streams open in this worker.", [((), hub.open_streams)]
@@ -0,0 +1,343 @@
+"""Idempotency-Key for the create routes, so a retried POST runs once.
+
+A mobile client that times out and retries would otherwise create the row
+twice, and progression and calories would count it twice. A client sends
+the same ``Idempotency-Key`` header on every attempt of one write:
+
+- the first attempt runs, and its response (below 500) is stored for
+  IDEMPOTENCY_TTL_SECONDS;
+- a retry gets the stored response, with ``Idempotent-Replayed: true``,
+  without the route running or the domain tables being read;
+- a duplicate that arrives while the first attempt is still running waits
+  for it and gets the same response (coalesced in this worker, polled from
+  the store across workers), or 409 if that takes too long;
+- the same key with a different method, path, query or body is a 422.
+
+A 5xx or an exception releases the key, so the retry runs again.
+
+Keys are scoped by the acting user: the ``user_id`` query parameter, or
+its default, exactly as get_user_db resolves it. The store is a small
+protocol: MemoryIdempotencyStore keeps keys in this worker, and
+SqlIdempotencyStore (IDEMPOTENCY_BACKEND=sql) in the directory database,
+which every worker shares.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import NamedTuple, Protocol
+
+import orjson
+from sqlalchemy import bindparam, delete, select, update
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, QueryParams
+from starlette.responses import JSONResponse
+from starlette.routing import compile_path
+
+from . import config
+from .database import ACTING_USER_ID, dialect_insert, get_engine
+from .metrics import registry
+from ..models.idempotency import IdempotencyKey
+
+requests_total = registry.counter(
+    "idempotent_requests_total",
+    "Requests with an Idempotency-Key, by outcome (executed, replayed, coalesced, mismatch, in_progress).",
+)
+
+MAX_KEY_LENGTH = 255
+
+# A duplicate of a request running in another worker polls the store this
+# often, and is answered 409 if it is still running after _WAIT_SECONDS
+_POLL_SECONDS = 0.05
+_WAIT_SECONDS = 10.0
+
+# The SQL store deletes expired keys every this many claims
+_PRUNE_EVERY = 1000
+
+
+class Stored(NamedTuple):
+    fingerprint: bytes
+    # None while the first request is still running
+    status: int | None
+    headers: list[tuple[bytes, bytes]]
+    body: bytes
+
+
+class IdempotencyStore(Protocol):
+    """Keys and the responses they produced; implement it over Redis to share keys without SQL."""
+
+    # True if the methods block on I/O and must run in the threadpool
+    blocking: bool
+
+    def claim(self, key: bytes, fingerprint: bytes) -> Stored | None:
+        """Take `key` for a new request and return None, or return what the key already holds."""
+
+    def complete(self, key: bytes, response: Stored) -> None:
+        """Store the claimed request's response for replay."""
+
+    def release(self, key: bytes) -> None:
+        """Give up a claim without storing anything, so the next retry runs."""
+
+
+class MemoryIdempotencyStore:
+    """In-process keys; the oldest are evicted beyond `maxsize`."""
+
+    blocking = False
+
+    def __init__(self, maxsize: int, ttl: float, lease: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.lease = lease
+        self._data: OrderedDict[bytes, tuple[float, Stored]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def claim(self, key: bytes, fingerprint: bytes) -> Stored | None:
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[0] >= now:
+                return item[1]
+            self._data[key] = (now + self.lease, Stored(fingerprint, None, [], b""))
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return None
+
+    def complete(self, key: bytes, response: Stored) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, response)
+
+    def release(self, key: bytes) -> None:
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[1].status is None:
+                del self._data[key]
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+@lru_cache
+def _claim_stmt(dialect_name: str):
+    return dialect_insert(dialect_name)(IdempotencyKey).on_conflict_do_nothing(index_elements=[IdempotencyKey.key])
+
+
+_delete_expired_key = delete(IdempotencyKey).where(
+    IdempotencyKey.key == bindparam("digest"), IdempotencyKey.expires_at < bindparam("now")
+)
+_delete_expired = delete(IdempotencyKey).where(IdempotencyKey.expires_at < bindparam("now"))
+_select_key = select(
+    IdempotencyKey.fingerprint, IdempotencyKey.status, IdempotencyKey.headers, IdempotencyKey.body
+).where(IdempotencyKey.key == bindparam("digest"))
+_complete = update(IdempotencyKey).where(IdempotencyKey.key == bindparam("digest")).values(
+    status=bindparam("status"), headers=bindparam("headers"), body=bindparam("body"),
+    expires_at=bindparam("expires_at"),
+)
+_release = delete(IdempotencyKey).where(IdempotencyKey.key == bindparam("digest"), IdempotencyKey.status.is_(None))
+
+
+class SqlIdempotencyStore:
+    """Keys in the directory database's idempotency_keys table, shared by every worker."""
+
+    blocking = True
+
+    def __init__(self, ttl: float, lease: float):
+        self.ttl = timedelta(seconds=ttl)
+        self.lease = timedelta(seconds=lease)
+        self._claims = 0
+
+    def claim(self, key: bytes, fingerprint: bytes) -> Stored | None:
+        now = datetime.utcnow()
+        self._claims += 1
+        with get_engine().begin() as conn:
+            if self._claims % _PRUNE_EVERY == 0:
+                conn.execute(_delete_expired, {"now": now})
+            else:
+                conn.execute(_delete_expired_key, {"digest": key, "now": now})
+            inserted = conn.execute(_claim_stmt(conn.dialect.name), {
+                "key": key, "fingerprint": fingerprint, "expires_at": now + self.lease,
+            }).rowcount
+            if inserted:
+                return None
+            row = conn.execute(_select_key, {"digest": key}).one()
+        headers = [(k.encode("latin-1"), v.encode("latin-1")) for k, v in orjson.loads(row.headers or b"[]")]
+        return Stored(row.fingerprint, row.status, headers, row.body or b"")
+
+    def complete(self, key: bytes, response: Stored) -> None:
+        headers = orjson.dumps([(k.decode("latin-1"), v.decode("latin-1")) for k, v in response.headers])
+        with get_engine().begin() as conn:
+            conn.execute(_complete, {
+                "digest": key, "status": response.status, "headers": headers, "body": response.body,
+                "expires_at": datetime.utcnow() + self.ttl,
+            })
+
+    def release(self, key: bytes) -> None:
+        with get_engine().begin() as conn:
+            conn.execute(_release, {"digest": key})
+
+
+def _store() -> IdempotencyStore:
+    if config.IDEMPOTENCY_BACKEND == "sql":
+        return SqlIdempotencyStore(config.IDEMPOTENCY_TTL_SECONDS, config.IDEMPOTENCY_LEASE_SECONDS)
+    return MemoryIdempotencyStore(
+        config.IDEMPOTENCY_MAX_ENTRIES, config.IDEMPOTENCY_TTL_SECONDS, config.IDEMPOTENCY_LEASE_SECONDS
+    )
+
+
+def _digest(*parts: bytes) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        # Length-prefixed, so different splits of the same bytes differ
+        h.update(len(part).to_bytes(8, "big"))
+        h.update(part)
+    return h.digest()
+
+
+def _acting_user(scope) -> bytes:
+    """The user a request acts for, as get_user_db resolves it: ?user_id, else ACTING_USER_ID."""
+    raw = QueryParams(scope["query_string"]).get("user_id")
+    if raw is None:
+        return str(ACTING_USER_ID).encode()
+    try:
+        return str(int(raw)).encode()
+    except ValueError:  # the route answers 422 itself
+        return raw.encode()
+
+
+def _error(status_code: int, detail: str, headers: dict | None = None) -> JSONResponse:
+    return JSONResponse({"detail": detail}, status_code=status_code, headers=headers)
+
+
+class IdempotencyMiddleware:
+    """Pure ASGI middleware applying Idempotency-Key to POSTs to `paths` (route templates)."""
+
+    def __init__(self, app, paths: tuple[str, ...], store: IdempotencyStore | None = None):
+        self.app = app
+        self.patterns = [compile_path(path)[0] for path in paths]
+        self.store = store if store is not None else _store()
+        # Requests running in this worker, by key: duplicates wait on these
+        self._running: dict[bytes, asyncio.Future] = {}
+
+    def _applies(self, path: str) -> bool:
+        return any(pattern.match(path) for pattern in self.patterns)
+
+    async def _call(self, method, *args):
+        if self.store.blocking:
+            return await run_in_threadpool(method, *args)
+        return method(*args)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or not self._applies(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        raw_key = headers.get("idempotency-key")
+        if raw_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not raw_key or len(raw_key) > MAX_KEY_LENGTH:
+            await _error(400, f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters")(scope, receive, send)
+            return
+
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        body = b"".join(chunks)
+        key = _digest(_acting_user(scope), raw_key.encode("latin-1"))
+        fingerprint = _digest(scope["method"].encode(), scope["path"].encode(), scope["query_string"], body)
+
+        body_sent = False
+
+        async def replay_receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        deadline = time.monotonic() + _WAIT_SECONDS
+        while True:
+            running = self._running.get(key)
+            if running is not None:
+                # A duplicate of a request running in this worker: its outcome is ours
+                requests_total.inc(outcome="coalesced")
+                stored = await asyncio.shield(running)
+                if stored is None:
+                    continue  # it failed and released the key; run it again
+                await self._replay(stored, fingerprint, scope, receive, send)
+                return
+
+            future = asyncio.get_running_loop().create_future()
+            self._running[key] = future
+            stored = None
+            try:
+                existing = await self._call(self.store.claim, key, fingerprint)
+                if existing is None:
+                    requests_total.inc(outcome="executed")
+                    stored = await self._execute(key, fingerprint, scope, replay_receive, send)
+                    return
+                if existing.status is not None or existing.fingerprint != fingerprint:
+                    stored = existing if existing.status is not None else None
+                    if existing.fingerprint == fingerprint:
+                        requests_total.inc(outcome="replayed")
+                    await self._replay(existing, fingerprint, scope, receive, send)
+                    return
+            finally:
+                del self._running[key]
+                future.set_result(stored)
+
+            # Running in another worker: wait for its outcome or its lease to run out
+            if time.monotonic() >= deadline:
+                requests_total.inc(outcome="in_progress")
+                await _error(409, "A request with this Idempotency-Key is still in progress",
+                             {"Retry-After": "1"})(scope, receive, send)
+                return
+            await asyncio.sleep(_POLL_SECONDS)
+
+    async def _execute(self, key: bytes, fingerprint: bytes, scope, receive, send) -> Stored | None:
+        """Run the route, storing its response for replay; the stored response, or None if released."""
+        start: dict | None = None
+        chunks: list[bytes] = []
+        complete = False
+
+        async def send_wrapper(message):
+            nonlocal start, complete
+            # Captured before it is sent, so a client gone by now doesn't lose the outcome
+            if message["type"] == "http.response.start":
+                # A copy: compression rewrites the headers of the message it is sent
+                start = {"status": message["status"], "headers": list(message.get("headers", []))}
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                complete = not message.get("more_body", False)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if complete and start["status"] < 500:
+                stored = Stored(fingerprint, start["status"], start["headers"], b"".join(chunks))
+                await self._call(self.store.complete, key, stored)
+            else:
+                stored = None
+                await self._call(self.store.release, key)
+        return stored
+
+    async def _replay(self, stored: Stored, fingerprint: bytes, scope, receive, send) -> None:
+        if stored.fingerprint != fingerprint:
+            requests_total.inc(outcome="mismatch")
+            await _error(422, "Idempotency-Key was already used for a different request")(scope, receive, send)
+            return
+        await send({
+            "type": "http.response.start",
+            "status": stored.status,
+            "headers": [*stored.headers, (b"idempotent-replayed", b"true")],
+        })
+        await send({"type": "http.response.body", "body": stored.body})
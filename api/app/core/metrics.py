@@ -0,0 +1,235 @@
+"""In-process metrics with Prometheus text exposition.
+
+Counters and histograms live in this worker's memory; scrape every worker (or
+put them behind a per-worker port) when running more than one.
+"""
+from __future__ import annotations
+
+import bisect
+import contextvars
+import logging
+import threading
+import time
+from typing import Callable, Iterable
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from . import config
+
+logger = logging.getLogger("sweat.sql")
+
+START_TIME = time.time()
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _fmt_labels(labels: Labels, extra: Labels = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    body = ",".join(f'{k}="{_escape(v)}"' for k, v in pairs)
+    return "{" + body + "}"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._values: dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(tuple(sorted(labels.items())), 0)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_fmt_labels(labels)} {_fmt_value(value)}"
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, buckets: Iterable[float]):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        # labels -> (per-bucket counts, sum, count)
+        self._series: dict[Labels, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                yield f"{self.name}_bucket{_fmt_labels(labels, (('le', _fmt_value(bound)),))} {cumulative}"
+            yield f"{self.name}_bucket{_fmt_labels(labels, (('le', '+Inf'),))} {count}"
+            yield f"{self.name}_sum{_fmt_labels(labels)} {_fmt_value(total)}"
+            yield f"{self.name}_count{_fmt_labels(labels)} {count}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[Counter | Histogram] = []
+        # Callbacks return (name, type, help, [(labels, value), ...]) for values read at scrape time
+        self._collectors: list[Callable[[], Iterable[tuple[str, str, str, list[tuple[Labels, float]]]]]] = []
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        metric = Counter(name, documentation)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, buckets: Iterable[float]) -> Histogram:
+        metric = Histogram(name, documentation, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, fn):
+        self._collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collect in self._collectors:
+            for name, kind, documentation, samples in collect():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.extend(f"{name}{_fmt_labels(labels)} {_fmt_value(value)}" for labels, value in samples)
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+http_requests_total = registry.counter("http_requests_total", "HTTP requests by route, method and status.")
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route and method.", HTTP_BUCKETS
+)
+http_request_db_queries = registry.histogram(
+    "http_request_db_queries", "SQL statements executed per HTTP request, by route.", QUERY_COUNT_BUCKETS
+)
+db_queries_total = registry.counter("db_queries_total", "SQL statements executed, by statement kind.")
+db_query_duration = registry.histogram(
+    "db_query_duration_seconds", "SQL statement latency, by statement kind.", DB_BUCKETS
+)
+db_slow_queries_total = registry.counter(
+    "db_slow_queries_total", "SQL statements slower than SLOW_QUERY_MS."
+)
+
+
+@registry.collector
+def _process_metrics():
+    yield "process_uptime_seconds", "gauge", "Seconds since this worker started.", [((), time.time() - START_TIME)]
+
+
+class _RequestStats:
+    __slots__ = ("queries",)
+
+    def __init__(self):
+        self.queries = 0
+
+
+# Set by MetricsMiddleware; the threadpool copies the context, so sync handlers
+# running in worker threads still increment the same object.
+_request_stats: contextvars.ContextVar[_RequestStats | None] = contextvars.ContextVar("request_stats", default=None)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording per-route request counts, latency and query counts."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        stats = _RequestStats()
+        token = _request_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_stats.reset(token)
+            # Label by route template, not raw path, to keep cardinality bounded
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            http_requests_total.inc(route=route, method=method, status=status)
+            http_request_duration.observe(elapsed, route=route, method=method)
+            http_request_db_queries.observe(stats.queries, route=route)
+
+
+def _statement_kind(statement: str) -> str:
+    return statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Time every statement on `engine`, count it against the current request, log slow ones."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        kind = _statement_kind(statement)
+        db_queries_total.inc(kind=kind)
+        db_query_duration.observe(elapsed, kind=kind)
+
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+
+        if elapsed * 1000 >= config.SLOW_QUERY_MS:
+            db_slow_queries_total.inc(kind=kind)
+            logger.warning("slow query (%.1f ms): %s", elapsed * 1000, " ".join(statement.split()))
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        # after_cursor_execute never fires for a failed statement
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
@@ -0,0 +1,148 @@
+"""Schema migrations (Alembic) and the pre-start schema check.
+
+A single-process server migrates in its startup hook. Under gunicorn the
+pre-fork master does it once, before any worker starts (gunicorn.conf.py),
+and the workers skip it. With SHARD_URLS set, every shard gets the same
+schema as the directory, and each step runs on all of them. Deploy scripts
+can run the same steps with::
+
+    python -m app.core.migrations upgrade
+    python -m app.core.migrations check
+"""
+import argparse
+import os
+from contextlib import contextmanager
+from typing import Iterator
+
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection, Engine
+
+from .config import BASE_DIR
+from .database import SHARDS, Base, create_db_engine, database_urls, get_engine
+
+# The revision matching the schema Base.metadata.create_all used to build
+BASELINE_REVISION = "0001"
+
+# Created by raw SQL in migrations rather than models (FTS5 and its shadow tables)
+UNMANAGED_TABLE_PREFIXES = ("workout_search",)
+
+
+def include_object(obj, name, type_, reflected, compare_to) -> bool:
+    if type_ == "table" and reflected and compare_to is None:
+        return not name.startswith(UNMANAGED_TABLE_PREFIXES)
+    return True
+
+
+def alembic_config() -> Config:
+    cfg = Config(os.path.join(BASE_DIR, "alembic.ini"))
+    cfg.set_main_option("script_location", os.path.join(BASE_DIR, "migrations"))
+    return cfg
+
+
+def run_migrations(bind: Engine | None = None) -> None:
+    """Bring the database up to the latest revision.
+
+    Databases created before migrations existed have the baseline tables but
+    no alembic_version row, so they are stamped at the baseline first and then
+    upgraded like any other.
+    """
+    cfg = alembic_config()
+    with (bind or get_engine()).connect() as connection, _foreign_keys_deferred(connection):
+        with connection.begin():
+            cfg.attributes["connection"] = connection
+            tables = set(inspect(connection).get_table_names())
+            if "alembic_version" not in tables and "users" in tables:
+                command.stamp(cfg, BASELINE_REVISION)
+            command.upgrade(cfg, "head")
+            if connection.dialect.name == "sqlite":
+                violations = connection.exec_driver_sql("PRAGMA foreign_key_check").all()
+                if violations:
+                    raise RuntimeError(f"migrations left rows with dangling foreign keys: {violations[:10]}")
+
+
+@contextmanager
+def _foreign_keys_deferred(connection: Connection) -> Iterator[None]:
+    """Turn SQLite's foreign key enforcement off around a migration run.
+
+    Batch migrations rebuild a table by copying it and dropping the original,
+    and with enforcement on, that DROP cascades to every row referencing it.
+    The pragma is ignored inside a transaction, so it goes straight to the
+    driver connection before ours begins; run_migrations checks the keys
+    itself before committing.
+    """
+    if connection.dialect.name != "sqlite":
+        yield
+        return
+    raw = connection.connection.driver_connection
+    raw.execute("PRAGMA foreign_keys=OFF")
+    try:
+        yield
+    finally:
+        raw.execute("PRAGMA foreign_keys=ON")
+
+
+def check_schema(bind: Engine | None = None) -> list[str]:
+    """Ways the database differs from the code's schema; empty when they match."""
+    from .. import models  # noqa: F401  (registers every model on Base.metadata)
+
+    head = ScriptDirectory.from_config(alembic_config()).get_current_head()
+    with (bind or get_engine()).connect() as connection:
+        context = MigrationContext.configure(connection, opts={"include_object": include_object})
+        current = context.get_current_revision()
+        problems = [] if current == head else [f"database is at revision {current}, the code expects {head}"]
+        problems.extend(_describe(diff) for diff in compare_metadata(context, Base.metadata))
+    return problems
+
+
+def _each_database(step) -> list:
+    # Throwaway engines: the gunicorn master must not keep connections across its fork
+    results = []
+    for name, url in database_urls().items():
+        engine = create_db_engine(url)
+        try:
+            results.extend(f"{name}: {r}" if SHARDS else r for r in step(engine) or ())
+        finally:
+            engine.dispose()
+    return results
+
+
+def upgrade_all() -> None:
+    """run_migrations() on the directory and every shard."""
+    _each_database(run_migrations)
+
+
+def check_all() -> list[str]:
+    """check_schema() on the directory and every shard, prefixed by database name when sharded."""
+    return _each_database(check_schema)
+
+
+def _describe(diff) -> str:
+    # ("add_table", Table), ("remove_index", Index), [("modify_type", schema, table, column, ...)]...
+    if isinstance(diff, list):
+        return "; ".join(_describe(d) for d in diff)
+    kind, *args = diff
+    return " ".join([kind, *(str(getattr(a, "name", a)) for a in args if a is not None and not isinstance(a, dict))])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Database schema maintenance")
+    parser.add_argument("command", choices=["upgrade", "check"])
+    args = parser.parse_args()
+
+    if args.command == "upgrade":
+        upgrade_all()
+    problems = check_all()
+    for problem in problems:
+        print(problem)
+    if problems:
+        raise SystemExit(1)
+    print("schema is up to date")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""Exercise progression engine.
+
+The first set of each exercise in a session is the one that counts: it becomes
+the user's current working weight for that exercise, and the configured rule
+decides whether to recommend a heavier weight next time.
+
+Each worker remembers, per recently active session, the exercises that
+already have a committed set there. A set of such an exercise can't be a
+first set, so a batch made only of those (the usual case: the second and
+later sets of an exercise) is settled from memory with no query. Any other
+set is checked in the database, inside the caller's transaction: it is a
+first set if no earlier set of its exercise exists in its session.
+
+The memory only holds facts no other worker or retry can contradict.
+Exercises join it when their transaction commits, not before, so a set
+that was rolled back still counts when the client retries it. A session
+another worker has written to just costs the lookup. Entries are keyed by
+(shard, session_id), because session ids repeat across shards. The one thing
+it can't see is a deletion made by another worker (the deleting worker
+forgets its own entry), so entries also expire after
+PROGRESSION_CACHE_TTL_SECONDS.
+
+Rebuild progress from workout_sets, for one user or for everybody on every
+database, with::
+
+    python -m app.core.progression rebuild --user-id 1
+    python -m app.core.progression rebuild
+"""
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, Protocol
+
+from fastapi import HTTPException
+from sqlalchemy import delete, event, exists, select
+from sqlalchemy.orm import Session, aliased
+
+from . import config, versions
+from .cache import TTLCache
+from .database import database_urls, dialect_insert, get_engine, session_for, shard_of
+from ..models.progression import ExerciseProgress
+from ..models.workout import WorkoutSession, WorkoutSet
+
+
+class ProgressionRule(Protocol):
+    def next_weight(self, weight: float, reps: int) -> float | None:
+        """Weight to try next time, or None to stay at `weight`."""
+        ...
+
+
+@dataclass(frozen=True)
+class RepThresholdRule:
+    """Add `increment` once the first set reaches `min_reps`."""
+    min_reps: int = 12
+    increment: float = 5.0
+
+    def next_weight(self, weight: float, reps: int) -> float | None:
+        return weight + self.increment if reps >= self.min_reps else None
+
+
+RULES: dict[str, ProgressionRule] = {
+    "rep_threshold": RepThresholdRule(),
+}
+
+
+def register_rule(name: str, rule: ProgressionRule) -> None:
+    RULES[name] = rule
+
+
+@dataclass(frozen=True)
+class NewSet:
+    id: int
+    exercise: str
+    weight: float
+    reps: int
+
+
+class ProgressionEngine:
+    def __init__(
+        self,
+        rule: ProgressionRule,
+        max_sessions: int = config.PROGRESSION_CACHE_SESSIONS,
+        ttl: float = config.PROGRESSION_CACHE_TTL_SECONDS,
+    ):
+        self.rule = rule
+        # (shard, session_id) -> frozenset of exercises with a committed set there
+        self._known = TTLCache(maxsize=max_sessions, ttl=ttl)
+
+    def record_sets(self, db: Session, user_id: int, session_id: int, new_sets: Iterable[NewSet]) -> int:
+        """Apply newly inserted sets to ExerciseProgress; does not commit. Returns rows touched."""
+        return self.record_many(db, user_id, {session_id: new_sets})
+
+    def record_many(self, db: Session, user_id: int, sets_by_session: dict[int, Iterable[NewSet]]) -> int:
+        """record_sets() for several sessions at once: at most one lookup and one upsert in total.
+
+        The sets must already be inserted (flushed) in `db`.
+        """
+        shard = shard_of(user_id)
+        # What this transaction records joins _known only if it commits
+        pending = self._pending(db)
+        unknown: list[NewSet] = []
+        for sid, sets in sets_by_session.items():
+            key = (shard, sid)
+            sets = list(sets)
+            known = (self._known.get(key) or frozenset()) | pending.get(key, set())
+            unknown.extend(s for s in sets if s.exercise not in known)
+            pending.setdefault(key, set()).update(s.exercise for s in sets)
+        if not unknown:
+            return 0
+
+        first_ids = self._first_set_ids(db, [s.id for s in unknown])
+        # Newest first set per exercise wins, as if the sets had arrived one by one
+        firsts: dict[str, NewSet] = {}
+        for s in unknown:
+            if s.id in first_ids and (s.exercise not in firsts or s.id > firsts[s.exercise].id):
+                firsts[s.exercise] = s
+
+        if firsts:
+            db.execute(self._upsert_stmt(db.bind.dialect.name, user_id, list(firsts.values())))
+            versions.bump(db, user_id, "progression")
+        return len(firsts)
+
+    def record_sets_out_of_band(self, user_id: int, session_id: int, new_sets: list[NewSet]) -> None:
+        """record_sets() in its own session and transaction, for BackgroundTasks."""
+        with session_for(user_id) as db:
+            self.record_sets(db, user_id, session_id, new_sets)
+            db.commit()
+
+    def forget(self, user_id: int, session_id: int) -> None:
+        """Drop what this worker remembers of a session; call after deleting it or any of its sets."""
+        try:
+            self._known.delete((shard_of(user_id), session_id))
+        except HTTPException:  # the user is being moved; the entry just expires
+            pass
+
+    def rebuild(self, db: Session, user_id: int) -> int:
+        """Recompute a user's progress from workout_sets in one streaming pass; does not commit."""
+        latest = self._stream_latest(db, WorkoutSession.user_id == user_id).get(user_id, {})
+        db.execute(delete(ExerciseProgress).where(ExerciseProgress.user_id == user_id))
+        if latest:
+            db.execute(self._upsert_stmt(db.bind.dialect.name, user_id, list(latest.values())))
+        versions.bump(db, user_id, "progression")
+        return len(latest)
+
+    def rebuild_all(self, db: Session) -> tuple[int, int]:
+        """rebuild() every user of `db`'s database in one streaming pass; does not commit.
+
+        Returns (users, exercises). Only the result, one row per user and
+        exercise, is held in memory, never the sets.
+        """
+        latest = self._stream_latest(db)
+        # Users whose sets are all gone lose their progress, as in rebuild()
+        user_ids = set(latest) | set(db.scalars(select(ExerciseProgress.user_id).distinct()))
+
+        db.execute(delete(ExerciseProgress))
+        dialect_name = db.bind.dialect.name
+        for user_id in sorted(user_ids):
+            if latest.get(user_id):
+                db.execute(self._upsert_stmt(dialect_name, user_id, list(latest[user_id].values())))
+            versions.bump(db, user_id, "progression")
+        return len(user_ids), sum(len(by_exercise) for by_exercise in latest.values())
+
+    def _stream_latest(self, db: Session, *where) -> dict[int, dict[str, NewSet]]:
+        """Newest first set per user and exercise, streaming the sets of the sessions matching `where`.
+
+        Sets come in (session_id, id) order, which the session index already
+        provides, so only the current session's exercises are tracked.
+        """
+        stmt = (
+            select(
+                WorkoutSession.user_id, WorkoutSet.id, WorkoutSet.session_id,
+                WorkoutSet.exercise, WorkoutSet.weight, WorkoutSet.reps,
+            )
+            .join(WorkoutSession, WorkoutSession.id == WorkoutSet.session_id)
+            .where(*where)
+            .order_by(WorkoutSet.session_id, WorkoutSet.id)
+            .execution_options(yield_per=5000)
+        )
+
+        latest: dict[int, dict[str, NewSet]] = {}
+        current_session = None
+        seen: set[str] = set()
+        for row in db.execute(stmt):
+            if row.session_id != current_session:
+                current_session, seen = row.session_id, set()
+            if row.exercise in seen:
+                continue
+            seen.add(row.exercise)
+            by_exercise = latest.setdefault(row.user_id, {})
+            prev = by_exercise.get(row.exercise)
+            if prev is None or row.id > prev.id:
+                by_exercise[row.exercise] = NewSet(row.id, row.exercise, row.weight, row.reps)
+        return latest
+
+    def _pending(self, db: Session) -> dict[tuple[str, int], set[str]]:
+        """Exercises recorded in `db`'s open transaction, by session; remembered once it commits."""
+        return db.info.setdefault(_PENDING_KEY, {}).setdefault(self, {})
+
+    def _remember(self, pending: dict[tuple[str, int], set[str]]) -> None:
+        for key, exercises in pending.items():
+            # A concurrent commit may overwrite this; forgetting is always safe
+            self._known.set(key, (self._known.get(key) or frozenset()) | exercises)
+
+    def _first_set_ids(self, db: Session, set_ids: list[int]) -> set[int]:
+        """The sets among `set_ids` with no earlier set of the same exercise in their session."""
+        earlier = aliased(WorkoutSet)
+        # A seek on ix_workout_sets_session_exercise per set
+        return set(db.scalars(
+            select(WorkoutSet.id).where(
+                WorkoutSet.id.in_(set_ids),
+                ~exists().where(
+                    earlier.session_id == WorkoutSet.session_id,
+                    earlier.exercise == WorkoutSet.exercise,
+                    earlier.id < WorkoutSet.id,
+                ),
+            )
+        ))
+
+    def _upsert_stmt(self, dialect_name: str, user_id: int, firsts: list[NewSet]):
+        """One multi-row upsert; `firsts` must hold at most one set per exercise."""
+        now = datetime.utcnow()
+        stmt = dialect_insert(dialect_name)(ExerciseProgress).values([
+            {
+                "user_id": user_id,
+                "exercise": s.exercise,
+                "current_weight": s.weight,
+                "best_reps_first_set": s.reps,
+                "recommended_next_weight": self.rule.next_weight(s.weight, s.reps),
+                "updated_at": now,
+            }
+            for s in firsts
+        ])
+        return stmt.on_conflict_do_update(
+            index_elements=[ExerciseProgress.user_id, ExerciseProgress.exercise],
+            set_={
+                c: getattr(stmt.excluded, c)
+                for c in ("current_weight", "best_reps_first_set", "recommended_next_weight", "updated_at")
+            },
+        )
+
+
+_PENDING_KEY = "progression_pending"
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(db: Session) -> None:
+    for eng, pending in db.info.pop(_PENDING_KEY, {}).items():
+        eng._remember(pending)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _after_transaction_end(db: Session, transaction) -> None:
+    # Rolled back, or closed without committing: nothing to remember
+    if transaction.parent is None:
+        db.info.pop(_PENDING_KEY, None)
+
+
+engine = ProgressionEngine(RULES[config.PROGRESSION_RULE])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Exercise progression maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rebuild = sub.add_parser("rebuild", help="recompute exercise_progress from workout_sets")
+    rebuild.add_argument("--user-id", type=int, help="just this user (default: every user on every database)")
+    args = parser.parse_args()
+
+    if args.user_id is not None:
+        with session_for(args.user_id) as db:
+            count = engine.rebuild(db, args.user_id)
+            db.commit()
+        print(f"Rebuilt progress for {count} exercises")
+        return
+
+    for name in database_urls():
+        with Session(get_engine(name)) as db:
+            users, count = engine.rebuild_all(db)
+            db.commit()
+        print(f"{name}: rebuilt progress for {count} exercises of {users} users")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""Placing new users on shards and moving existing users to where the ring wants them.
+
+Registration calls place_new_user(). After SHARD_URLS changes (a shard added,
+or sharding switched on for an existing database), move every user whose
+placement differs from the ring::
+
+    python -m app.core.rebalance status
+    python -m app.core.rebalance run
+
+A run fences all the users it will move (`moving_to`), waits out the
+workers' placement caches, then moves one user at a time:
+
+1. copy their `users` row and every per-user table to the target in one
+   transaction;
+2. point their placement at the target;
+3. delete their rows from the source.
+
+Row ids are per database, so copied rows get new ids on the target (foreign
+keys between moved rows are rewritten), and all the user's resource versions
+are bumped and their sync log is reset, so clients refetch (or take a sync
+snapshot) instead of revalidating old ids. An interrupted run leaves its
+users fenced; running it again resumes them.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from collections import Counter
+from dataclasses import dataclass
+
+from sqlalchemy import Column, Table, delete, func, insert, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from . import config, sync
+from .database import (
+    RING,
+    Base,
+    SessionLocal,
+    database_urls,
+    dialect_insert,
+    get_engine,
+    get_read_engine,
+    placements,
+)
+from .sharding import DIRECTORY
+from ..models.shards import UserShard
+from ..models.user import User
+from ..models.versions import ResourceVersion
+
+@dataclass(frozen=True)
+class Move:
+    user_id: int
+    source: str
+    target: str
+
+
+@dataclass(frozen=True)
+class _Owned:
+    table: Table
+    # user_id, or the foreign key to the per-user table the row hangs off
+    owner: Column
+    parent: _Owned | None
+
+
+def owned_tables() -> list[_Owned]:
+    """Per-user tables in foreign-key order: those with a user_id column, and those referencing one."""
+    from .. import models  # noqa: F401  (registers every model on Base.metadata)
+
+    owned: dict[str, _Owned] = {}
+    for table in Base.metadata.sorted_tables:
+        if table.name in (User.__tablename__, UserShard.__tablename__):
+            continue
+        if "user_id" in table.c:
+            owned[table.name] = _Owned(table, table.c.user_id, None)
+            continue
+        for fk in table.foreign_keys:
+            if fk.column.table.name in owned:
+                owned[table.name] = _Owned(table, fk.parent, owned[fk.column.table.name])
+                break
+    return list(owned.values())
+
+
+def _owner_filter(owned: _Owned, user_id: int):
+    if owned.parent is None:
+        return owned.owner == user_id
+    return owned.owner.in_(select(owned.parent.table.c.id).where(_owner_filter(owned.parent, user_id)))
+
+
+def _copy_user(src: Connection, dst: Connection, user_id: int) -> None:
+    # Upsert: the target may be the directory (whose row exists) or a shard with a stale copy
+    users = User.__table__
+    row = src.execute(select(users).where(users.c.id == user_id)).mappings().one()
+    stmt = dialect_insert(dst.dialect.name)(users).values(**row)
+    dst.execute(stmt.on_conflict_do_update(
+        index_elements=[users.c.id], set_={name: stmt.excluded[name] for name in row if name != "id"}
+    ))
+
+
+def _copy_rows(src: Connection, dst: Connection, user_id: int) -> Counter:
+    """Copy the user's per-user rows with new ids, rewriting foreign keys to the new ids."""
+    counts: Counter = Counter()
+    new_ids: dict[str, dict[int, int]] = {}
+
+    for owned in owned_tables():
+        table = owned.table
+        rows = [dict(r) for r in src.execute(select(table).where(_owner_filter(owned, user_id))).mappings()]
+        if not rows:
+            continue
+        for fk in table.foreign_keys:
+            mapping = new_ids.get(fk.column.table.name)
+            if mapping is not None:
+                for row in rows:
+                    if row[fk.parent.name] is not None:
+                        row[fk.parent.name] = mapping[row[fk.parent.name]]
+
+        old = [row.pop("id") for row in rows]
+        new = dst.execute(insert(table).returning(table.c.id, sort_by_parameter_order=True), rows).scalars().all()
+        new_ids[table.name] = dict(zip(old, new))
+        counts[table.name] = len(rows)
+    return counts
+
+
+def _delete_rows(conn: Connection, user_id: int, *, with_user: bool) -> None:
+    for owned in reversed(owned_tables()):
+        conn.execute(delete(owned.table).where(_owner_filter(owned, user_id)))
+    if with_user:
+        conn.execute(delete(User.__table__).where(User.__table__.c.id == user_id))
+
+
+def place_new_user(db: Session, user_id: int) -> str:
+    """Give a just-registered user their home shard and commit `db` (a directory session).
+
+    Returns the shard, or DIRECTORY when not sharded.
+    """
+    if not RING:
+        return DIRECTORY
+    shard = RING.node_for(user_id)
+    with get_engine(shard).begin() as dst:
+        _copy_user(db.connection(), dst, user_id)
+    db.add(UserShard(user_id=user_id, shard=shard))
+    db.commit()
+    placements.forget(user_id)
+    return shard
+
+
+def plan() -> list[Move]:
+    """Users whose rows are not where the ring puts them, including ones a previous run fenced."""
+    stmt = (
+        select(User.id, UserShard.shard, UserShard.moving_to)
+        .outerjoin(UserShard, UserShard.user_id == User.id)
+        .order_by(User.id)
+    )
+    moves = []
+    with SessionLocal() as directory:
+        for user_id, shard, moving_to in directory.execute(stmt):
+            source = shard or DIRECTORY
+            target = moving_to or (RING.node_for(user_id) if RING else DIRECTORY)
+            if source != target:
+                moves.append(Move(user_id, source, target))
+    return moves
+
+
+def fence(moves: list[Move]) -> None:
+    """Mark the users as moving, so workers answer 503 for them once their caches expire."""
+    with SessionLocal() as directory:
+        for move in moves:
+            stmt = dialect_insert(directory.bind.dialect.name)(UserShard).values(
+                user_id=move.user_id, shard=move.source, moving_to=move.target
+            )
+            directory.execute(stmt.on_conflict_do_update(
+                index_elements=[UserShard.user_id], set_={"moving_to": move.target}
+            ))
+        directory.commit()
+
+
+def move_user(move: Move) -> Counter:
+    """Copy one fenced user to the target, switch their placement, then clean up the source."""
+    with get_read_engine(move.source).connect() as src, get_engine(move.target).begin() as dst:
+        # Leftovers of an interrupted run; the user is fenced, so nothing else writes them
+        _delete_rows(dst, move.user_id, with_user=False)
+        _copy_user(src, dst, move.user_id)
+        counts = _copy_rows(src, dst, move.user_id)
+        dst.execute(
+            update(ResourceVersion)
+            .where(ResourceVersion.user_id == move.user_id)
+            .values(version=ResourceVersion.version + 1)
+        )
+        with Session(bind=dst) as db:
+            sync.reset(db, move.user_id)
+
+    with SessionLocal() as directory:
+        placement = directory.get(UserShard, move.user_id)
+        if move.target == DIRECTORY:
+            directory.delete(placement)
+        else:
+            placement.shard, placement.moving_to = move.target, None
+        directory.commit()
+
+    with get_engine(move.source).begin() as src:
+        _delete_rows(src, move.user_id, with_user=move.source != DIRECTORY)
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Move users to the shards the hash ring assigns them")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status", help="users per database, and the moves a run would make")
+    run = sub.add_parser("run", help="move every misplaced user")
+    run.add_argument(
+        "--wait", type=float, default=config.SHARD_PLACEMENT_TTL + 1,
+        help="seconds between fencing and copying (placement cache TTL plus in-flight requests)",
+    )
+    run.add_argument("--limit", type=int, default=None, help="move at most this many users")
+    args = parser.parse_args()
+
+    moves = plan()
+    known = database_urls()
+    unknown = {m.source for m in moves} - known.keys()
+    if unknown:
+        raise SystemExit(f"users are placed on {sorted(unknown)}, which SHARD_URLS no longer lists")
+
+    if args.command == "status":
+        with SessionLocal() as directory:
+            placed = Counter(dict(directory.execute(
+                select(UserShard.shard, func.count()).group_by(UserShard.shard)
+            ).all()))
+            total = directory.scalar(select(func.count()).select_from(User))
+        placed[DIRECTORY] = total - sum(placed.values())
+        for name in known:
+            print(f"{name:<12} {placed.get(name, 0):>8} users")
+        pairs = Counter((m.source, m.target) for m in moves)
+        print(f"{len(moves)} users to move" + "".join(f", {src} -> {dst}: {n}" for (src, dst), n in pairs.items()))
+        return
+
+    moves = moves[:args.limit]
+    if not moves:
+        print("every user is on its ring shard")
+        return
+    fence(moves)
+    print(f"fenced {len(moves)} users; waiting {args.wait:g}s for placement caches")
+    time.sleep(args.wait)
+    for move in moves:
+        counts = move_user(move)
+        print(f"user {move.user_id}: {move.source} -> {move.target} ({sum(counts.values())} rows)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,10 @@
 from __future__ import annotations
 
+from types import MappingProxyType
+from typing import Mapping, Sequence
+
+import numpy as np
+
 def calculate_bmi(weight_lbs: float, height_in: float) -> float:
     if height_in <= 0:
         raise ValueError("height must be positive")
@@ -67,88 +72,125 @@ def build_recommendation(weight_lbs: float, height_in: float) -> dict:
         "summary": summary,
     }
 
-def get_recommended_tasks(main_goal: str, activity_level: str):
-    """
-    Generate recommended daily tasks based on user's main goal and activity level.
+# Batch path: same rules as the scalar functions above, one array op per column.
+# Category codes index BMI_CATEGORIES and the per-category lookup tables below.
+BMI_CATEGORIES = np.array(["underweight", "normal", "overweight", "obese"])
+_BMI_BOUNDS = np.array([18.5, 25.0, 30.0])
+_TARGET_OFFSET_LBS = np.array([10.0, 0.0, -10.0, -20.0])
+_RATE_LBS_PER_WEEK = np.array([0.5, 0.0, 1.0, 1.0])
+
+
+def build_recommendations_batch(
+    weight_lbs: Sequence[float] | np.ndarray,
+    height_in: Sequence[float] | np.ndarray,
+    main_goal: Sequence[str | None] | None = None,
+    activity_level: Sequence[str | None] | None = None,
+) -> dict[str, np.ndarray]:
+    """Vectorized build_recommendation() for many users at once.
+
+    Returns one array per column, aligned with the inputs. When goals and
+    activity levels are given, also returns the total calories of each user's
+    recommended daily tasks.
     """
+    weight = np.asarray(weight_lbs, dtype=np.float64)
+    height = np.asarray(height_in, dtype=np.float64)
+    if np.any(height <= 0):
+        raise ValueError("height must be positive")
 
-    recommendations = []
-
-    if main_goal == "build_muscle":
-        recommendations = [
-            {
-                "task_name": "Upper Body Strength",
-                "description": "Push-ups, rows, presses for muscle growth.",
-                "calories": 180,
-            },
-            {
-                "task_name": "Lower Body Strength",
-                "description": "Squats, lunges, deadlifts for leg development.",
-                "calories": 200,
-            },
-            {
-                "task_name": "Core Strength",
-                "description": "Planks, sit-ups, stability exercises.",
-                "calories": 120,
-            },
-        ]
-
-    elif main_goal == "weight_loss":
-        recommendations = [
-            {
-                "task_name": "Cardio Training",
-                "description": "Jogging, biking, or HIIT for fat burning.",
-                "calories": 250,
-            },
-            {
-                "task_name": "Light Strength",
-                "description": "Low weight, high reps to boost metabolism.",
-                "calories": 150,
-            },
-            {
-                "task_name": "Long Walk",
-                "description": "45–60 minutes brisk walk.",
-                "calories": 180,
-            },
-        ]
-
-    elif main_goal == "be_healthier":
-        recommendations = [
-            {
-                "task_name": "Long Walk",
-                "description": "20–30 minutes at a moderate pace to improve heart health.",
-                "calories": 120,
-            },
-            {
-                "task_name": "Full Body Mobility + Light Strength",
-                "description": "10 min mobility + 10 min bodyweight exercises (squats, glute bridges, rows).",
-                "calories": 150,
-            },
-            {
-                "task_name": "Lifestyle Activity Boost",
-                "description": "Take stairs, park farther away, or do 10 minutes of household movement.",
-                "calories": 80,
-            },
-        ]
+    bmi = 703 * weight / height ** 2
+    code = np.searchsorted(_BMI_BOUNDS, bmi, side="right")
+    target = np.maximum(weight + _TARGET_OFFSET_LBS[code], 0)
+    rate = _RATE_LBS_PER_WEEK[code]
 
-    else:
-        recommendations = [
-            {
-                "task_name": "Light Activity",
-                "description": "Go for a short walk today.",
-                "calories": 60,
-            }
-        ]
-
-    if activity_level == "5-7":
-        for task in recommendations:
-            task["calories"] += 50
-
-    elif activity_level == "1-3":
-        for task in recommendations:
-            task["calories"] -= 20
-
-    for task in recommendations:
-        task["calories"] = max(task["calories"], 0)
-
-    return recommendations
+    diff = np.abs(weight - target)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weeks = np.where((rate > 0) & (diff > 0), np.round(diff / rate), 0).astype(np.int64)
+
+    out = {
+        "bmi": np.round(bmi, 1),
+        "bmi_category": BMI_CATEGORIES[code],
+        "target_weight_lbs": target,
+        "suggested_rate_lbs_per_week": rate,
+        "estimated_weeks_to_target": weeks,
+    }
+
+    if main_goal is not None and activity_level is not None:
+        goal_idx = _codes(main_goal, _GOALS)
+        level_idx = _codes(activity_level, _LEVELS)
+        out["recommended_task_calories"] = _TASK_CALORIES[goal_idx, level_idx]
+
+    return out
+
+
+def _codes(values: Sequence[str | None], keys: tuple[str | None, ...]) -> np.ndarray:
+    """Index of each value in `keys`; anything unknown maps to the trailing None key."""
+    values = np.asarray(values, dtype=object)
+    idx = np.full(values.shape, len(keys) - 1, dtype=np.intp)
+    for i, key in enumerate(keys[:-1]):
+        idx[values == key] = i
+    return idx
+
+
+_BASE_TASKS: dict[str | None, tuple[tuple[str, str, int], ...]] = {
+    "build_muscle": (
+        ("Upper Body Strength", "Push-ups, rows, presses for muscle growth.", 180),
+        ("Lower Body Strength", "Squats, lunges, deadlifts for leg development.", 200),
+        ("Core Strength", "Planks, sit-ups, stability exercises.", 120),
+    ),
+    "weight_loss": (
+        ("Cardio Training", "Jogging, biking, or HIIT for fat burning.", 250),
+        ("Light Strength", "Low weight, high reps to boost metabolism.", 150),
+        ("Long Walk", "45–60 minutes brisk walk.", 180),
+    ),
+    "be_healthier": (
+        ("Long Walk", "20–30 minutes at a moderate pace to improve heart health.", 120),
+        ("Full Body Mobility + Light Strength", "10 min mobility + 10 min bodyweight exercises (squats, glute bridges, rows).", 150),
+        ("Lifestyle Activity Boost", "Take stairs, park farther away, or do 10 minutes of household movement.", 80),
+    ),
+    # Any other goal
+    None: (
+        ("Light Activity", "Go for a short walk today.", 60),
+    ),
+}
+
+# Calorie adjustment per activity level; other levels are left as-is
+_ACTIVITY_ADJUSTMENT = {"5-7": 50, "1-3": -20}
+
+
+def _task_key(main_goal: str | None, activity_level: str | None) -> tuple[str | None, str | None]:
+    return (
+        main_goal if main_goal in _BASE_TASKS else None,
+        activity_level if activity_level in _ACTIVITY_ADJUSTMENT else None,
+    )
+
+
+# Every (goal, activity level) answer, built once at import and read-only after
+TASK_TABLE: Mapping[tuple[str | None, str | None], tuple[Mapping[str, object], ...]] = MappingProxyType({
+    (goal, level): tuple(
+        MappingProxyType({
+            "task_name": name,
+            "description": description,
+            "calories": max(calories + _ACTIVITY_ADJUSTMENT.get(level, 0), 0),
+        })
+        for name, description, calories in tasks
+    )
+    for goal, tasks in _BASE_TASKS.items()
+    for level in (*_ACTIVITY_ADJUSTMENT, None)
+})
+
+# Total task calories as a (goal, level) grid for the batch path; None is last on both axes
+_GOALS = tuple(_BASE_TASKS)
+_LEVELS = (*_ACTIVITY_ADJUSTMENT, None)
+_TASK_CALORIES = np.array(
+    [[sum(t["calories"] for t in TASK_TABLE[(g, lv)]) for lv in _LEVELS] for g in _GOALS],
+    dtype=np.int64,
+)
+
+
+def get_recommended_tasks(main_goal: str, activity_level: str) -> tuple[Mapping[str, object], ...]:
+    """
+    Recommended daily tasks for a user's main goal and activity level.
+
+    Returns a shared, read-only entry of TASK_TABLE; copy it before changing anything.
+    """
+    return TASK_TABLE[_task_key(main_goal, activity_level)]
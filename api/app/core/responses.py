@@ -0,0 +1,118 @@
+"""Fast JSON responses for read-heavy list routes.
+
+With a response_model, FastAPI validates every returned row into a pydantic
+model, dumps it back to Python and then encodes the result. For list routes
+that is most of the request. The routes using these helpers select plain
+columns with Core, in the schema's field order and already cast to the
+schema's types, and hand the rows straight to orjson. They keep their
+response_model for the OpenAPI schema only.
+
+Compare both paths with::
+
+    python -m benchmarks.read_path
+
+Routes that also offer compact encodings pick one from the Accept header with
+negotiate() and build the response with encoded_response():
+
+- application/json (the default);
+- application/msgpack: the same structure as MessagePack, datetimes as ISO strings;
+- application/vnd.sweat.columnar+json and +msgpack: the route's columnar
+  layout (see columnar_sets()), in JSON or MessagePack.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime
+from typing import Any, Iterable, Mapping
+
+from fastapi import Request
+from fastapi.responses import ORJSONResponse, Response
+from sqlalchemy import Result
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+COLUMNAR_JSON = "application/vnd.sweat.columnar+json"
+COLUMNAR_MSGPACK = "application/vnd.sweat.columnar+msgpack"
+
+# Older clients still send the unregistered name
+_ALIASES = {"application/x-msgpack": MSGPACK}
+
+
+def row_dicts(result: Result) -> list[dict]:
+    """Rows of `result` as dicts, keyed by column label in select order."""
+    keys = tuple(result.keys())
+    return [dict(zip(keys, row)) for row in result]
+
+
+def rows_response(result: Result, headers: Mapping[str, str] | None = None) -> ORJSONResponse:
+    return ORJSONResponse(row_dicts(result), headers=headers)
+
+
+def group_rows(rows: Iterable[dict], key: str) -> dict:
+    """{row[key]: [rows...]}, preserving row order within each group."""
+    groups: dict = {}
+    for row in rows:
+        groups.setdefault(row[key], []).append(row)
+    return groups
+
+
+def columnar_sets(sets: Iterable[dict]) -> list[dict]:
+    """One entry per exercise, in order of first appearance, with parallel id/reps/weight arrays."""
+    by_exercise: dict[str, dict] = {}
+    for s in sets:
+        block = by_exercise.get(s["exercise"])
+        if block is None:
+            block = by_exercise[s["exercise"]] = {"exercise": s["exercise"], "id": [], "reps": [], "weight": []}
+        block["id"].append(s["id"])
+        block["reps"].append(s["reps"])
+        block["weight"].append(s["weight"])
+    return list(by_exercise.values())
+
+
+def negotiate(request: Request, offers: tuple[str, ...]) -> str:
+    """The media type in `offers` the Accept header prefers; offers[0] if none is acceptable."""
+    accept = request.headers.get("accept")
+    if not accept:
+        return offers[0]
+
+    best, best_q = offers[0], 0.0
+    for item in accept.split(","):
+        media_type, _, params = item.strip().partition(";")
+        media_type = _ALIASES.get(media_type.strip().lower(), media_type.strip().lower())
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if media_type in ("*/*", "application/*"):
+            candidate = offers[0]
+        elif media_type in offers:
+            candidate = media_type
+        else:
+            continue
+        if q > best_q:  # ties go to the type the client listed first
+            best, best_q = candidate, q
+    return best
+
+
+def _msgpack_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__} to MessagePack")
+
+
+class MsgPackResponse(Response):
+    media_type = MSGPACK
+
+    def render(self, content: Any) -> bytes:
+        import msgpack
+
+        return msgpack.packb(content, default=_msgpack_default, use_bin_type=True)
+
+
+def encoded_response(content: Any, media_type: str, headers: Mapping[str, str] | None = None) -> Response:
+    """`content` encoded as `media_type`, one of the types negotiate() returns."""
+    response_class = MsgPackResponse if media_type.endswith("msgpack") else ORJSONResponse
+    return response_class(content, headers=headers, media_type=media_type)
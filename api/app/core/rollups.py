@@ -0,0 +1,213 @@
+"""Incrementally maintained daily and weekly stats rollups.
+
+Each write that changes a user's totals (sets logged or deleted, steps synced,
+a task completed) applies the change to the matching "day" and "week" rollup
+rows in the same transaction, with one ON CONFLICT upsert per table. Trend
+queries then read one row per period with an indexed range scan instead of
+re-aggregating raw sets.
+
+Weeks are ISO weeks, keyed by their Monday. Sets count towards the day their
+session started.
+
+Rebuild a user's rollups from the raw tables with::
+
+    python -m app.core.rollups rebuild --user-id 1
+"""
+from __future__ import annotations
+
+import argparse
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Iterable
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from .database import dialect_insert, session_for
+from ..models.stats import ExerciseRollup, StatsRollup
+from ..models.steps import DailySteps
+from ..models.tasks import DailyTask
+from ..models.workout import WorkoutSession, WorkoutSet
+
+PERIODS = ("day", "week")
+
+
+def week_start(day: date) -> date:
+    """Monday of the ISO week containing `day`."""
+    return day - timedelta(days=day.weekday())
+
+
+def period_start(period: str, day: date) -> date:
+    return week_start(day) if period == "week" else day
+
+
+def _add_stmt(dialect_name: str, model, keys: tuple[str, ...], rows: list[dict], counters: tuple[str, ...]):
+    """Insert `rows`, or add their counters onto the rows already there."""
+    stmt = dialect_insert(dialect_name)(model).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[getattr(model, k) for k in keys],
+        set_={c: getattr(model, c) + getattr(stmt.excluded, c) for c in counters},
+    )
+
+
+def record_sets(
+    db: Session,
+    user_id: int,
+    day: date,
+    sets: Iterable[tuple[str, int, float]],
+    sign: int = 1,
+) -> None:
+    """Add (exercise, reps, weight) sets to the rollups for `day`; sign=-1 removes them. Does not commit."""
+    per_exercise: dict[str, list] = defaultdict(lambda: [0, 0, 0.0])
+    for exercise, reps, weight in sets:
+        totals = per_exercise[exercise]
+        totals[0] += sign
+        totals[1] += sign * reps
+        totals[2] += sign * reps * weight
+    if not per_exercise:
+        return
+
+    dialect_name = db.bind.dialect.name
+    exercise_rows = []
+    total_rows = []
+    for period in PERIODS:
+        start = period_start(period, day)
+        base = {"user_id": user_id, "period": period, "period_start": start}
+        exercise_rows.extend(
+            {**base, "exercise": exercise, "sets": n, "reps": reps, "volume": volume}
+            for exercise, (n, reps, volume) in per_exercise.items()
+        )
+        total_rows.append({
+            **base,
+            "sets": sum(t[0] for t in per_exercise.values()),
+            "reps": sum(t[1] for t in per_exercise.values()),
+            "volume": sum(t[2] for t in per_exercise.values()),
+            "steps": 0,
+            "task_calories": 0,
+        })
+
+    db.execute(_add_stmt(
+        dialect_name, ExerciseRollup, ("user_id", "period", "period_start", "exercise"),
+        exercise_rows, ("sets", "reps", "volume"),
+    ))
+    db.execute(_add_stmt(
+        dialect_name, StatsRollup, ("user_id", "period", "period_start"),
+        total_rows, ("sets", "reps", "volume"),
+    ))
+
+
+def record_task_calories(db: Session, user_id: int, day: date, calories: int) -> None:
+    """Add a completed task's calories to the rollups for `day`. Does not commit."""
+    if not calories:
+        return
+    rows = [
+        {"user_id": user_id, "period": period, "period_start": period_start(period, day),
+         "sets": 0, "reps": 0, "volume": 0.0, "steps": 0, "task_calories": calories}
+        for period in PERIODS
+    ]
+    db.execute(_add_stmt(
+        db.bind.dialect.name, StatsRollup, ("user_id", "period", "period_start"), rows, ("task_calories",)
+    ))
+
+
+def refresh_steps(db: Session, user_id: int, days: Iterable[date]) -> None:
+    """Copy daily_steps for the weeks containing `days` into the rollups. Does not commit.
+
+    Step counts are replaced rather than added to (a sync may lower a day's
+    count), so each touched week is re-read: at most seven rows off the
+    (user_id, day) index.
+    """
+    dialect_name = db.bind.dialect.name
+    for start in sorted({week_start(d) for d in days}):
+        week = db.execute(
+            select(DailySteps.day, DailySteps.steps).where(
+                DailySteps.user_id == user_id,
+                DailySteps.day.between(start, start + timedelta(days=6)),
+            )
+        ).all()
+
+        base = {"user_id": user_id, "sets": 0, "reps": 0, "volume": 0.0, "task_calories": 0}
+        rows = [{**base, "period": "day", "period_start": d, "steps": steps} for d, steps in week]
+        rows.append({**base, "period": "week", "period_start": start, "steps": sum(s for _, s in week)})
+
+        stmt = dialect_insert(dialect_name)(StatsRollup).values(rows)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[StatsRollup.user_id, StatsRollup.period, StatsRollup.period_start],
+            set_={"steps": stmt.excluded.steps},
+        ))
+
+
+def rebuild(db: Session, user_id: int) -> int:
+    """Recompute a user's rollups from workout_sets, daily_steps and daily_tasks; does not commit.
+
+    Returns the number of stats rows written.
+    """
+    totals: dict[tuple[str, date], dict] = {}
+    exercises: dict[tuple[str, date, str], list] = defaultdict(lambda: [0, 0, 0.0])
+
+    def total(period: str, day: date) -> dict:
+        key = (period, period_start(period, day))
+        if key not in totals:
+            totals[key] = {"sets": 0, "reps": 0, "volume": 0.0, "steps": 0, "task_calories": 0}
+        return totals[key]
+
+    sets = (
+        select(WorkoutSession.started_at, WorkoutSet.exercise, WorkoutSet.reps, WorkoutSet.weight)
+        .join(WorkoutSet.session)
+        .where(WorkoutSession.user_id == user_id)
+        .execution_options(yield_per=5000)
+    )
+    for started_at, exercise, reps, weight in db.execute(sets):
+        day = started_at.date()
+        for period in PERIODS:
+            t = total(period, day)
+            t["sets"] += 1
+            t["reps"] += reps
+            t["volume"] += reps * weight
+            e = exercises[(period, period_start(period, day), exercise)]
+            e[0] += 1
+            e[1] += reps
+            e[2] += reps * weight
+
+    for day, steps in db.execute(select(DailySteps.day, DailySteps.steps).where(DailySteps.user_id == user_id)):
+        for period in PERIODS:
+            total(period, day)["steps"] += steps
+
+    completed = select(DailyTask.day, DailyTask.calories).where(
+        DailyTask.user_id == user_id, DailyTask.completed.is_(True)
+    )
+    for day, calories in db.execute(completed):
+        for period in PERIODS:
+            total(period, day)["task_calories"] += calories or 0
+
+    db.execute(delete(ExerciseRollup).where(ExerciseRollup.user_id == user_id))
+    db.execute(delete(StatsRollup).where(StatsRollup.user_id == user_id))
+    if totals:
+        db.execute(insert(StatsRollup), [
+            {"user_id": user_id, "period": period, "period_start": start, **values}
+            for (period, start), values in totals.items()
+        ])
+    if exercises:
+        db.execute(insert(ExerciseRollup), [
+            {"user_id": user_id, "period": period, "period_start": start, "exercise": exercise,
+             "sets": n, "reps": reps, "volume": volume}
+            for (period, start, exercise), (n, reps, volume) in exercises.items()
+        ])
+    return len(totals)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stats rollup maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rebuild_cmd = sub.add_parser("rebuild", help="recompute stats rollups from the raw tables")
+    rebuild_cmd.add_argument("--user-id", type=int, default=1)
+    args = parser.parse_args()
+
+    with session_for(args.user_id) as db:
+        count = rebuild(db, args.user_id)
+        db.commit()
+    print(f"Rebuilt {count} rollup rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,38 @@
-from passlib.context import CryptContext
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from jose import jwt
 
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from jose import JWTError, jwt
+from passlib.context import CryptContext
+
+from .config import (
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    ALGORITHM,
+    PASSWORD_HASH_ROUNDS,
+    PASSWORD_HASH_WORKERS,
+    SECRET_KEY,
+    TOKEN_CACHE_MAX_ENTRIES,
+)
+
+# Pinning min/max to the default marks hashes with any other round count as
+# needing an update, so changing PASSWORD_HASH_ROUNDS migrates users on login.
 pwd_context = CryptContext(
     schemes=["pbkdf2_sha256"],
     deprecated="auto",
+    pbkdf2_sha256__default_rounds=PASSWORD_HASH_ROUNDS,
+    pbkdf2_sha256__min_rounds=PASSWORD_HASH_ROUNDS,
+    pbkdf2_sha256__max_rounds=PASSWORD_HASH_ROUNDS,
 )
 
-SECRET_KEY = "supersecretkey"
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 60
+# hashlib's PBKDF2 releases the GIL, so a few threads are enough to keep
+# hashing off the event loop and out of the shared request threadpool.
+_hash_pool = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="pwhash")
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -17,8 +40,83 @@ def hash_password(password: str) -> str:
 def verify_password(plain: str, hashed: str) -> bool:
     return pwd_context.verify(plain, hashed)
 
+async def hash_password_async(password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(_hash_pool, hash_password, password)
+
+async def verify_and_update_password(plain: str, hashed: str) -> tuple[bool, str | None]:
+    """Verify on the hashing pool; the second item is a replacement hash when the stored one is outdated."""
+    return await asyncio.get_running_loop().run_in_executor(
+        _hash_pool, pwd_context.verify_and_update, plain, hashed
+    )
+
 def create_access_token(data: dict):
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     payload = data.copy()
     payload.update({"exp": expire})
     return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
+
+
+@dataclass(frozen=True)
+class CurrentUser:
+    id: int
+    expires_at: float
+
+
+class TokenCache:
+    """LRU of verified tokens; an entry is only served until the token's own exp."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict[str, CurrentUser] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> CurrentUser | None:
+        with self._lock:
+            user = self._data.get(token)
+            if user is None:
+                return None
+            if user.expires_at <= time.time():
+                del self._data[token]
+                return None
+            self._data.move_to_end(token)
+            return user
+
+    def set(self, token: str, user: CurrentUser) -> None:
+        with self._lock:
+            self._data[token] = user
+            self._data.move_to_end(token)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+token_cache = TokenCache(TOKEN_CACHE_MAX_ENTRIES)
+
+_bearer = HTTPBearer(auto_error=False)
+
+def decode_access_token(token: str) -> CurrentUser:
+    user = token_cache.get(token)
+    if user is not None:
+        return user
+
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        user = CurrentUser(id=int(payload["sub"]), expires_at=float(payload["exp"]))
+    except (JWTError, KeyError, ValueError):
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid or expired token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    token_cache.set(token, user)
+    return user
+
+def get_current_user(credentials: HTTPAuthorizationCredentials | None = Depends(_bearer)) -> CurrentUser:
+    """FastAPI dependency: the user identified by the request's Bearer token."""
+    if credentials is None:
+        raise HTTPException(
+            status_code=401,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return decode_access_token(credentials.credentials)
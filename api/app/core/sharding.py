@@ -0,0 +1,122 @@
+"""Which database holds a user's rows: a consistent-hash ring plus a placement directory.
+
+Per-user tables (workouts, steps, tasks, goals, progress, rollups, versions,
+and any table hanging off them, like workout_sets) live on one of the SHARD_URLS databases, so users on
+different shards never wait on each other's SQLite write lock. DATABASE_URL
+stays the directory: `users` for registration and login, and `user_shards`,
+the authoritative user -> shard placement. Every database has the full schema.
+
+- A new user is placed where the ring puts their id, and their `users` row
+  is copied there, because the per-user tables reference it. Per-user routes
+  (profile, dashboard) read and write that copy; the directory's row is only
+  used for identity.
+- A user without a placement row predates sharding, and their rows are
+  still in the directory itself (DIRECTORY).
+- Adding a shard moves only the users whose ring position now falls on it,
+  about 1/N of them. `python -m app.core.rebalance` moves their rows. While
+  a user is being moved, their placement has `moving_to` set, and requests
+  for them get 503 with Retry-After.
+
+Workers cache placements for SHARD_PLACEMENT_TTL seconds. The rebalancer
+waits that long after fencing users, before it copies anything.
+"""
+from __future__ import annotations
+
+import bisect
+import hashlib
+import time
+from typing import Callable, Iterable
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from . import config
+
+# Placement name of the directory database itself
+DIRECTORY = "directory"
+
+
+def parse_shard_urls(value: str) -> dict[str, str]:
+    """"s0=url0,s1=url1" -> {"s0": "url0", "s1": "url1"}."""
+    shards: dict[str, str] = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        name, sep, url = (part.strip() for part in item.partition("="))
+        if not sep or not name or not url:
+            raise ValueError(f"SHARD_URLS entry {item.strip()!r} is not name=url")
+        if name == DIRECTORY or name in shards:
+            raise ValueError(f"shard name {name!r} is reserved or repeated")
+        shards[name] = url
+    return shards
+
+
+def _point(key: str) -> int:
+    # Stable across processes and Python versions, unlike hash()
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent hashing: each node owns `vnodes` points on a 64-bit ring,
+    and a key belongs to the first point at or after its own hash."""
+
+    def __init__(self, nodes: Iterable[str], vnodes: int = config.SHARD_VNODES):
+        points = sorted((_point(f"{node}#{i}"), node) for node in nodes for i in range(vnodes))
+        self._hashes = [h for h, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def __bool__(self) -> bool:
+        return bool(self._nodes)
+
+    def node_for(self, key) -> str:
+        if not self._nodes:
+            raise LookupError("the hash ring has no nodes")
+        i = bisect.bisect_left(self._hashes, _point(str(key)))
+        return self._nodes[i % len(self._nodes)]
+
+
+def _placement_stmt(user_id: int):
+    from ..models.shards import UserShard  # models import core.database, which imports this module
+
+    return select(UserShard.shard, UserShard.moving_to).where(UserShard.user_id == user_id)
+
+
+class Placements:
+    """user_id -> shard name from the directory's user_shards, cached per process."""
+
+    def __init__(
+        self,
+        directory: Callable[[], Session],
+        ttl: float = config.SHARD_PLACEMENT_TTL,
+        maxsize: int = 100_000,
+    ):
+        self._directory = directory
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._cache: dict[int, tuple[str, float]] = {}
+
+    def shard_of(self, user_id: int) -> str:
+        """The shard holding `user_id`'s rows; 503 while they are being moved."""
+        now = time.monotonic()
+        cached = self._cache.get(user_id)
+        if cached is not None and cached[1] > now:
+            return cached[0]
+
+        with self._directory() as db:
+            row = db.execute(_placement_stmt(user_id)).first()
+        if row is not None and row.moving_to is not None:
+            raise HTTPException(
+                status_code=503,
+                detail="This account's data is being moved; try again shortly",
+                headers={"Retry-After": str(max(1, round(self.ttl)))},
+            )
+
+        shard = row.shard if row is not None else DIRECTORY
+        if len(self._cache) >= self.maxsize:
+            self._cache.clear()
+        self._cache[user_id] = (shard, now + self.ttl)
+        return shard
+
+    def forget(self, user_id: int) -> None:
+        self._cache.pop(user_id, None)
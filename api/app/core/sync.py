@@ -0,0 +1,265 @@
+"""Delta sync for offline-first clients: what changed for a user since a cursor.
+
+Writes in the workouts, tasks, steps, goals and user routers call record() in
+their own transaction. sync_changes keeps one row per entity: the sequence
+number of its latest change (a per-user counter in resource_versions) and
+whether that change deleted it. The log grows with the number of entities,
+not of writes, and GET /sync?since=<cursor> is one range scan over
+(user_id, seq) that returns each changed entity once, in its current state,
+or as a tombstone::
+
+    {"cursor": "...", "reset": false, "more": false,
+     "changes": {"tasks": {"upserts": [{...}], "deletes": [7]}, ...}}
+
+Without a cursor (a first sync), or when the cursor predates a reset, the
+response is a snapshot of everything the user has, with "reset": true, and
+the client replaces its copy. The rebalancer resets each user it moves,
+because their rows get new ids on the new shard.
+
+Mutation outcomes kept for POST /sync's idempotency keys expire after
+SYNC_MUTATION_TTL_DAYS::
+
+    python -m app.core.sync prune
+"""
+from __future__ import annotations
+
+import argparse
+import base64
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Callable, Iterable
+
+from fastapi import HTTPException
+from sqlalchemy import Float, Select, cast, delete, select
+from sqlalchemy.orm import Session
+
+from . import config, versions
+from .database import database_urls, dialect_insert, get_engine
+from .responses import row_dicts
+from ..models.goal import Goal
+from ..models.steps import DailySteps
+from ..models.sync import SyncChange, SyncMutation
+from ..models.tasks import DailyTask
+from ..models.user import User
+from ..models.workout import WorkoutSession, WorkoutSet
+
+# resource_versions counter that numbers a user's changes
+SEQUENCE = "changes"
+
+# Marker entity: a cursor older than its seq gets a snapshot instead of deltas
+RESET = "reset"
+
+# Entity ids per IN (...) when loading changed rows
+_CHUNK = 500
+
+
+def _sessions(user_id: int) -> Select:
+    return select(WorkoutSession.id, WorkoutSession.started_at, WorkoutSession.note).where(
+        WorkoutSession.user_id == user_id
+    )
+
+
+def _sets(user_id: int) -> Select:
+    return (
+        select(
+            WorkoutSet.id,
+            WorkoutSet.session_id,
+            WorkoutSet.exercise,
+            WorkoutSet.reps,
+            cast(WorkoutSet.weight, Float).label("weight"),
+        )
+        .join(WorkoutSet.session)
+        .where(WorkoutSession.user_id == user_id)
+    )
+
+
+def _tasks(user_id: int) -> Select:
+    return select(
+        DailyTask.id, DailyTask.task_name, DailyTask.calories, DailyTask.completed, DailyTask.day
+    ).where(DailyTask.user_id == user_id)
+
+
+def _steps(user_id: int) -> Select:
+    return select(DailySteps.id, DailySteps.day, DailySteps.steps).where(DailySteps.user_id == user_id)
+
+
+def _goals(user_id: int) -> Select:
+    return select(
+        Goal.id,
+        Goal.goal_type,
+        cast(Goal.target_value, Float).label("target_value"),
+        cast(Goal.progress_value, Float).label("progress_value"),
+    ).where(Goal.user_id == user_id)
+
+
+def _profile(user_id: int) -> Select:
+    return select(
+        User.id,
+        User.weight_lbs,
+        User.height_in,
+        User.activity_level,
+        User.main_goal,
+        User.gender,
+        User.age,
+        User.daily_step_goal,
+    ).where(User.id == user_id)
+
+
+# Synced entities and the user's rows of each, in the order clients apply them
+# (sessions before their sets). The profile's id is the user's id.
+ENTITIES: dict[str, Callable[[int], Select]] = {
+    "sessions": _sessions,
+    "sets": _sets,
+    "tasks": _tasks,
+    "steps": _steps,
+    "goals": _goals,
+    "profile": _profile,
+}
+
+
+@lru_cache
+def _upsert_changes_stmt(dialect_name: str):
+    # Executed with one parameter set per entity id
+    stmt = dialect_insert(dialect_name)(SyncChange)
+    return stmt.on_conflict_do_update(
+        index_elements=[SyncChange.user_id, SyncChange.entity, SyncChange.entity_id],
+        set_={"seq": stmt.excluded.seq, "deleted": stmt.excluded.deleted},
+    )
+
+
+def _upsert_changes(db: Session, user_id: int, seq: int, entity: str, ids: Iterable[int], deleted: bool) -> None:
+    # On the connection, like versions.next_version(): this runs on every write
+    db.connection().execute(_upsert_changes_stmt(db.bind.dialect.name), [
+        {"user_id": user_id, "seq": seq, "entity": entity, "entity_id": entity_id, "deleted": deleted}
+        for entity_id in ids
+    ])
+
+
+def record(db: Session, user_id: int, entity: str, ids: Iterable[int], *, deleted: bool = False) -> None:
+    """Log that `ids` of `entity` changed (or were deleted) for `user_id`; does not commit."""
+    ids = set(ids)
+    if not ids:
+        return
+    seq = versions.next_version(db, user_id, SEQUENCE)
+    _upsert_changes(db, user_id, seq, entity, ids, deleted)
+
+
+def reset(db: Session, user_id: int) -> None:
+    """Drop the user's change log; clients' next sync is a snapshot. Does not commit."""
+    db.execute(delete(SyncChange).where(SyncChange.user_id == user_id))
+    seq = versions.next_version(db, user_id, SEQUENCE)
+    _upsert_changes(db, user_id, seq, RESET, [0], False)
+
+
+def encode_cursor(seq: int) -> str:
+    return base64.urlsafe_b64encode(str(seq).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        return int(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _reset_seq_stmt(user_id: int):
+    return select(SyncChange.seq).where(
+        SyncChange.user_id == user_id, SyncChange.entity == RESET, SyncChange.entity_id == 0
+    )
+
+
+def _changes_stmt(user_id: int, since: int, limit: int | None):
+    return (
+        select(SyncChange.seq, SyncChange.entity, SyncChange.entity_id, SyncChange.deleted)
+        .where(SyncChange.user_id == user_id, SyncChange.seq > since, SyncChange.entity != RESET)
+        .order_by(SyncChange.seq)
+        .limit(limit)
+    )
+
+
+def _rows(db: Session, entity: str, user_id: int, ids: list[int]) -> list[dict]:
+    stmt = ENTITIES[entity](user_id)
+    id_col = stmt.selected_columns.id
+    rows: list[dict] = []
+    for i in range(0, len(ids), _CHUNK):
+        rows.extend(row_dicts(db.execute(stmt.where(id_col.in_(ids[i:i + _CHUNK])).order_by(id_col))))
+    return rows
+
+
+def _page(db: Session, user_id: int, since: int, limit: int) -> tuple[list, bool]:
+    """Changes after `since`, cut at a seq boundary so no transaction is split across pages."""
+    changes = db.execute(_changes_stmt(user_id, since, limit + 1)).all()
+    if len(changes) <= limit:
+        return changes, False
+    last = changes[-1].seq
+    if changes[0].seq == last:
+        # One transaction larger than a page (a big bulk ingest) goes out whole
+        return db.execute(_changes_stmt(user_id, since, None).where(SyncChange.seq == last)).all(), True
+    return [c for c in changes if c.seq != last], True
+
+
+def changes_since(db: Session, user_id: int, since: int | None, limit: int) -> dict:
+    """The GET /sync body: a snapshot when `since` is None or predates a reset, deltas otherwise.
+
+    Reads the head of the sequence and the changes in one transaction, so the
+    returned cursor covers exactly what the body contains.
+    """
+    head = versions.current(db, user_id, SEQUENCE)
+    if since is not None:
+        reset_seq = db.scalar(_reset_seq_stmt(user_id))
+        if since > head or (reset_seq is not None and since < reset_seq):
+            since = None
+
+    if since is None:
+        snapshot = {entity: row_dicts(db.execute(rows(user_id))) for entity, rows in ENTITIES.items()}
+        return {
+            "cursor": encode_cursor(head),
+            "reset": True,
+            "more": False,
+            "changes": {e: {"upserts": rows, "deletes": []} for e, rows in snapshot.items() if rows},
+        }
+
+    changes, more = _page(db, user_id, since, limit)
+    upserts: dict[str, list[int]] = {}
+    deletes: dict[str, list[int]] = {}
+    for c in changes:
+        (deletes if c.deleted else upserts).setdefault(c.entity, []).append(c.entity_id)
+
+    body: dict[str, dict] = {}
+    for entity in ENTITIES:
+        rows = _rows(db, entity, user_id, upserts[entity]) if entity in upserts else []
+        # A row deleted without a tombstone (by hand, or a cascade) is gone all the same
+        found = {row["id"] for row in rows}
+        gone = deletes.get(entity, []) + [i for i in upserts.get(entity, []) if i not in found]
+        if rows or gone:
+            body[entity] = {"upserts": rows, "deletes": gone}
+    return {
+        "cursor": encode_cursor(changes[-1].seq if more else head),
+        "reset": False,
+        "more": more,
+        "changes": body,
+    }
+
+
+def prune(db: Session, days: float = config.SYNC_MUTATION_TTL_DAYS) -> int:
+    """Forget mutation outcomes older than `days`; does not commit. Returns how many."""
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    return db.execute(delete(SyncMutation).where(SyncMutation.created_at < cutoff)).rowcount
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Delta sync maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+    cmd = sub.add_parser("prune", help="delete expired idempotency keys on every database")
+    cmd.add_argument("--days", type=float, default=config.SYNC_MUTATION_TTL_DAYS)
+    args = parser.parse_args()
+
+    for name in database_urls():
+        with Session(get_engine(name)) as db:
+            pruned = prune(db, args.days)
+            db.commit()
+        print(f"{name}: pruned {pruned} mutation keys")
+
+
+if __name__ == "__main__":
+    main()
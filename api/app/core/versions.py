@@ -0,0 +1,122 @@
+"""Per-user resource versions: strong ETags and 304 Not Modified for polling clients.
+
+Every write to a versioned resource bumps its (user_id, resource) counter in
+the same transaction, so the version changes exactly when the data does, and
+every worker sees it. Read routes look the counter up first (one indexed row)
+and answer a matching If-None-Match with 304 before running their data
+queries::
+
+    headers, not_modified = versions.conditional(request, db, user_id, "goals")
+    if not_modified is not None:
+        return not_modified
+    ...  # build the response with `headers`
+
+Versioned resources: profile, goals, progression, tasks and workouts.
+Writes that bypass the routes (bulk loads, manual SQL) must call bump() too,
+or clients holding an old ETag keep getting 304s.
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Hashable
+
+from fastapi import Request, Response
+from sqlalchemy import bindparam, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .database import dialect_insert
+from .metrics import registry
+from ..models.versions import ResourceVersion
+
+# Clients and proxies may keep a copy, but must revalidate it on every use
+CACHE_CONTROL = "private, no-cache"
+
+not_modified_total = registry.counter(
+    "http_not_modified_total", "Conditional GETs answered with 304 from the resource version alone."
+)
+
+
+def _bump_stmt(dialect_name: str, user_id: int, resources: tuple[str, ...]):
+    stmt = dialect_insert(dialect_name)(ResourceVersion).values(
+        [{"user_id": user_id, "resource": r, "version": 1} for r in resources]
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[ResourceVersion.user_id, ResourceVersion.resource],
+        set_={"version": ResourceVersion.version + 1},
+    )
+
+
+def bump(db: Session, user_id: int, *resources: str) -> None:
+    """Mark `resources` of `user_id` as changed; does not commit."""
+    db.execute(_bump_stmt(db.bind.dialect.name, user_id, resources))
+
+
+async def bump_async(db: AsyncSession, user_id: int, *resources: str) -> None:
+    await db.execute(_bump_stmt(db.bind.dialect.name, user_id, resources))
+
+
+@lru_cache
+def _next_version_stmt(dialect_name: str):
+    stmt = dialect_insert(dialect_name)(ResourceVersion).values(
+        user_id=bindparam("user_id"), resource=bindparam("resource"), version=1
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[ResourceVersion.user_id, ResourceVersion.resource],
+        set_={"version": ResourceVersion.version + 1},
+    ).returning(ResourceVersion.version)
+
+
+def next_version(db: Session, user_id: int, resource: str) -> int:
+    """bump() one resource and return its new version, for use as a per-user sequence."""
+    # Built once and run on the connection: it is on every write path, and the
+    # ORM's INSERT ... RETURNING handling costs more than the statement itself
+    stmt = _next_version_stmt(db.bind.dialect.name)
+    return db.connection().execute(stmt, {"user_id": user_id, "resource": resource}).scalar_one()
+
+
+def _version_stmt(user_id: int, resource: str):
+    return select(ResourceVersion.version).where(
+        ResourceVersion.user_id == user_id, ResourceVersion.resource == resource
+    )
+
+
+def current(db: Session, user_id: int, resource: str) -> int:
+    return db.scalar(_version_stmt(user_id, resource)) or 0
+
+
+def etag(resource: str, user_id: int, version: int, *qualifiers: Hashable) -> str:
+    """Strong ETag; `qualifiers` are whatever else picks the representation (a day, an id)."""
+    return '"' + ".".join(str(part) for part in (resource, user_id, version, *qualifiers)) + '"'
+
+
+def _matches(if_none_match: str | None, tag: str) -> bool:
+    # If-None-Match uses the weak comparison: W/"x" matches "x"
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == tag for candidate in if_none_match.split(","))
+
+
+def _answer(request: Request, resource: str, tag: str) -> tuple[dict[str, str], Response | None]:
+    headers = {"ETag": tag, "Cache-Control": CACHE_CONTROL}
+    if _matches(request.headers.get("if-none-match"), tag):
+        not_modified_total.inc(resource=resource)
+        return headers, Response(status_code=304, headers=headers)
+    return headers, None
+
+
+def conditional(
+    request: Request, db: Session, user_id: int, resource: str, *qualifiers: Hashable
+) -> tuple[dict[str, str], Response | None]:
+    """(ETag and Cache-Control headers, and a 304 response if the client's copy is current)."""
+    version = db.scalar(_version_stmt(user_id, resource)) or 0
+    return _answer(request, resource, etag(resource, user_id, version, *qualifiers))
+
+
+async def conditional_async(
+    request: Request, db: AsyncSession, user_id: int, resource: str, *qualifiers: Hashable
+) -> tuple[dict[str, str], Response | None]:
+    version = await db.scalar(_version_stmt(user_id, resource)) or 0
+    return _answer(request, resource, etag(resource, user_id, version, *qualifiers))
@@ -0,0 +1,273 @@
+"""Write-behind queue: group commits for high-frequency write events.
+
+Request handlers submit an event and await it. A single writer task per
+worker collects events for up to WRITE_BEHIND_FLUSH_MS (or until
+WRITE_BEHIND_MAX_BATCH are waiting), applies the whole batch in one
+transaction and commits once, then answers every waiting request. With
+SQLite that turns hundreds of fsyncs into one, and while a batch is being
+committed the next one is already filling up.
+
+Each event kind has a handler registered with register_handler(). Handlers
+apply a list of events in a session without committing, and store each
+event's response (or an exception to raise in its request) in `event.result`.
+If a batch fails, its events are retried one at a time, so one bad event
+can't fail the others. That is only safe because `apply` keeps every effect
+inside the session's transaction; anything that outlives it (e.g. cache
+invalidation) belongs in the handler's after_commit. With SHARD_URLS set, a
+batch is committed as one transaction per shard, grouped by each event's user.
+
+Compare against the direct write path with::
+
+    WRITE_BEHIND=1 python -m benchmarks.load --scenario add_set --scenario steps_update
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, Callable, Hashable
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from . import config
+from .database import session_for, shard_of
+from .metrics import registry
+
+logger = logging.getLogger("sweat.write_behind")
+
+
+@dataclass(eq=False)
+class Event:
+    kind: str
+    payload: dict
+    user_id: int
+    enqueued_at: float = field(default_factory=time.perf_counter)
+    future: asyncio.Future | None = None
+    # Set by the handler: the request's response, or an exception to raise
+    result: Any = None
+
+
+@dataclass(frozen=True)
+class Handler:
+    apply: Callable[[Session, list[Event]], None]
+    # Runs after the commit, e.g. to invalidate caches; must not touch the DB.
+    # An exception is logged and swallowed: the events are already durable
+    after_commit: Callable[[list[Event]], None] | None = None
+
+
+HANDLERS: dict[str, Handler] = {}
+
+
+def register_handler(
+    kind: str,
+    apply: Callable[[Session, list[Event]], None],
+    after_commit: Callable[[list[Event]], None] | None = None,
+) -> None:
+    HANDLERS[kind] = Handler(apply, after_commit)
+
+
+BATCH_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+events_total = registry.counter("write_behind_events_total", "Write-behind events acknowledged, by kind.")
+rejected_total = registry.counter("write_behind_rejected_total", "Write-behind events refused because the queue was full.")
+failed_total = registry.counter("write_behind_failed_total", "Write-behind events whose write failed, by kind.")
+flush_batch_size = registry.histogram(
+    "write_behind_flush_batch_size", "Events committed per write-behind flush.", BATCH_BUCKETS
+)
+flush_duration = registry.histogram(
+    "write_behind_flush_duration_seconds", "Time to apply and commit one write-behind batch.", LATENCY_BUCKETS
+)
+ack_latency = registry.histogram(
+    "write_behind_ack_latency_seconds", "Time from enqueueing an event to its durable commit.", LATENCY_BUCKETS
+)
+
+_queues: "weakref.WeakSet[WriteBehindQueue]" = weakref.WeakSet()
+
+
+@registry.collector
+def _queue_metrics():
+    yield "write_behind_queue_depth", "gauge", "Write-behind events waiting to be flushed.", [
+        ((), sum(q.depth for q in list(_queues)))
+    ]
+
+
+class WriteBehindQueue:
+    def __init__(
+        self,
+        session_factory: Callable[[int], Session],
+        shard_of: Callable[[int], Hashable] = lambda user_id: None,
+        flush_ms: float = config.WRITE_BEHIND_FLUSH_MS,
+        max_batch: int = config.WRITE_BEHIND_MAX_BATCH,
+        max_queue: int = config.WRITE_BEHIND_MAX_QUEUE,
+    ):
+        # session_factory(user_id) opens a session on that user's shard; events
+        # whose users share a shard_of() key are committed together
+        self.session_factory = session_factory
+        self.shard_of = shard_of
+        self.flush_ms = flush_ms
+        self.max_batch = max_batch
+        self.max_queue = max_queue
+        self._queue: asyncio.Queue[Event | None] | None = None
+        self._batch_ready: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        _queues.add(self)
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def submit(self, kind: str, payload: dict, user_id: int) -> Any:
+        """Queue an event and wait until it is committed; returns the handler's result for it."""
+        self._ensure_started()
+        if self._queue.qsize() >= self.max_queue:
+            rejected_total.inc()
+            raise HTTPException(status_code=503, detail="Write queue is full", headers={"Retry-After": "1"})
+
+        event = Event(kind, payload, user_id, future=asyncio.get_running_loop().create_future())
+        self._queue.put_nowait(event)
+        if self._queue.qsize() >= self.max_batch:
+            self._batch_ready.set()
+
+        result = await event.future
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    async def stop(self) -> None:
+        """Flush everything already queued, then stop the writer task."""
+        if self._task is None:
+            return
+        self._queue.put_nowait(None)
+        self._batch_ready.set()
+        await self._task
+        self._task = self._queue = self._batch_ready = None
+
+    def _ensure_started(self) -> None:
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._batch_ready = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is None:
+                break
+
+            # Give the batch up to flush_ms to fill, unless it is already full
+            if self._queue.qsize() < self.max_batch - 1:
+                self._batch_ready.clear()
+                try:
+                    await asyncio.wait_for(self._batch_ready.wait(), self.flush_ms / 1000)
+                except asyncio.TimeoutError:
+                    pass
+
+            batch = [first]
+            while len(batch) < self.max_batch and not self._queue.empty():
+                event = self._queue.get_nowait()
+                if event is None:
+                    stopping = True
+                    break
+                batch.append(event)
+
+            await self._flush(batch)
+
+    async def _flush(self, batch: list[Event]) -> None:
+        start = time.perf_counter()
+        try:
+            await run_in_threadpool(self._write, batch)
+        except Exception as exc:  # already retried per event; nothing more to salvage
+            for event in batch:
+                event.result = exc
+        done = time.perf_counter()
+        flush_batch_size.observe(len(batch))
+        flush_duration.observe(done - start)
+
+        for event in batch:
+            if isinstance(event.result, Exception) and not isinstance(event.result, HTTPException):
+                failed_total.inc(kind=event.kind)
+            else:
+                events_total.inc(kind=event.kind)
+                ack_latency.observe(done - event.enqueued_at)
+            if not event.future.done():  # the client may have gone away
+                event.future.set_result(event.result)
+
+    def _write(self, batch: list[Event]) -> None:
+        """Apply and commit `batch`, one transaction per shard."""
+        parts: dict[Hashable, list[Event]] = {}
+        for event in batch:
+            try:
+                shard = self.shard_of(event.user_id)
+            except HTTPException as exc:  # e.g. the user's rows are being moved
+                event.result = exc
+                continue
+            parts.setdefault(shard, []).append(event)
+
+        for part in parts.values():
+            try:
+                self._write_part(part)
+            except Exception as exc:
+                for event in part:
+                    event.result = exc
+
+    def _write_part(self, batch: list[Event]) -> None:
+        """Commit `batch` in one transaction; if that fails, retry each event on its own."""
+        try:
+            self._commit(batch)
+        except Exception:
+            if len(batch) == 1:
+                raise
+            for event in batch:
+                event.result = None
+                try:
+                    self._commit([event])
+                except Exception as exc:
+                    event.result = exc
+                else:
+                    self._after_commit([event])
+        else:
+            # Outside the retry: once committed, nothing may apply the batch again
+            self._after_commit(batch)
+
+    def _commit(self, batch: list[Event]) -> None:
+        with self.session_factory(batch[0].user_id) as db:
+            try:
+                for kind, events in _by_kind(batch).items():
+                    HANDLERS[kind].apply(db, events)
+                db.commit()
+            except Exception:
+                # Undo the whole batch before its events are retried one by one
+                db.rollback()
+                raise
+
+    def _after_commit(self, batch: list[Event]) -> None:
+        """Run the handlers' after_commit hooks; their failures are logged, never retried."""
+        for kind, events in _by_kind(batch).items():
+            hook = HANDLERS[kind].after_commit
+            if hook is None:
+                continue
+            try:
+                hook(events)
+            except Exception:
+                logger.exception("write-behind after_commit hook for %r failed", kind)
+
+
+def _by_kind(batch: list[Event]) -> dict[str, list[Event]]:
+    by_kind: dict[str, list[Event]] = {}
+    for event in batch:
+        by_kind.setdefault(event.kind, []).append(event)
+    return by_kind
+
+
+write_behind = WriteBehindQueue(session_for, shard_of)
+
+
+def get_write_behind() -> WriteBehindQueue:
+    """Dependency for write-behind handlers; override it to point at another database."""
+    return write_behind
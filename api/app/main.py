@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from starlette.responses import JSONResponse
 
 # Routers
@@ -15,13 +16,25 @@ from .routers import dashboard
 from .routers import steps
 from .routers import tasks
 from .routers import progression
+from .routers import export
+from .routers import stats
+from .routers import sync
+from .routers import events
 
-from .models import workout, user as user_model, goal, steps as steps_model, tasks as tasks_model, progression as progression_model
+from .models import workout, user as user_model, goal, steps as steps_model, tasks as tasks_model, progression as progression_model, stats as stats_model
 
 
-from .core.database import Base, engine
+from .core import config
+from .core.compression import CompressionMiddleware
+from .core.database import dispose_engines
+from .core.events import hub
+from .core.idempotency import IdempotencyMiddleware
+from .core.metrics import MetricsMiddleware
+from .core.migrations import upgrade_all
+from .core.write_behind import write_behind
 
-app = FastAPI(title="SWEat API", version="0.1.0")
+# orjson encodes response_model output too, several times faster than json.dumps
+app = FastAPI(title="SWEat API", version="0.1.0", default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -31,15 +44,59 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Inside compression, so stored responses are the uncompressed ones and a
+# replay is encoded for the retry's own Accept-Encoding
+app.add_middleware(
+    IdempotencyMiddleware,
+    # create_session, add_set, add_task and create_goal
+    paths=("/workouts/sessions", "/workouts/sessions/{session_id}/sets", "/tasks/add", "/goals/"),
+)
+
+app.add_middleware(CompressionMiddleware)
+
+# Outermost, so latency includes every other middleware
+app.add_middleware(MetricsMiddleware)
+
+@app.on_event("startup")
+def _migrate():
+    # Under gunicorn the pre-fork master has already migrated (gunicorn.conf.py)
+    if config.MIGRATE_ON_STARTUP:
+        upgrade_all()
+
 @app.on_event("startup")
-def _create_tables():
-    Base.metadata.create_all(bind=engine)
+async def _start_event_hub():
+    # In every worker, so writes elsewhere reach its caches as well as its streams
+    hub.start()
+
+@app.on_event("shutdown")
+async def _flush_write_behind():
+    await write_behind.stop()
+
+@app.on_event("shutdown")
+async def _close_event_hub():
+    hub.close()
+
+@app.on_event("shutdown")
+async def _dispose_engines():
+    await dispose_engines()
 
 @app.get("/health", response_class=JSONResponse)
 def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
+if config.WRITE_BEHIND:
+    # Queued, group-committed writers shadow both the sync and async versions
+    app.include_router(workouts.write_behind_router)
+    app.include_router(steps.write_behind_router)
+
+if config.DB_ASYNC:
+    # Async handlers shadow the matching sync routes, so they must come first
+    app.include_router(workouts.async_router)
+    app.include_router(dashboard.async_router)
+    app.include_router(steps.async_router)
+    app.include_router(tasks.async_router)
+
 app.include_router(meta.router)
 app.include_router(workouts.router)
 app.include_router(auth.router)
@@ -49,4 +106,8 @@ app.include_router(recommendations.router)
 app.include_router(dashboard.router)
 app.include_router(steps.router)
 app.include_router(tasks.router)
-app.include_router(progression.router)
\ No newline at end of file
+app.include_router(progression.router)
+app.include_router(export.router)
+app.include_router(stats.router)
+app.include_router(sync.router)
+app.include_router(events.router)
\ No newline at end of file
@@ -1,3 +1,13 @@
 from .workout import WorkoutSession, WorkoutSet
 
 from .user import User
+
+from .goal import Goal
+from .steps import DailySteps
+from .tasks import DailyTask
+from .progression import ExerciseProgress
+from .stats import StatsRollup, ExerciseRollup
+from .versions import ResourceVersion
+from .shards import UserShard
+from .sync import SyncChange, SyncMutation
+from .idempotency import IdempotencyKey
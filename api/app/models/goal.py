@@ -2,7 +2,7 @@ from sqlalchemy import Integer, String, Float, ForeignKey
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from ..core.database import Base
 from datetime import datetime
-from sqlalchemy import DateTime
+from sqlalchemy import DateTime, Index
 
 class Goal(Base):
     __tablename__ = "goals"
@@ -15,3 +15,7 @@ class Goal(Base):
     progress_value: Mapped[float] = mapped_column(Float, default=0)
 
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_goals_user_id", "user_id"),
+    )
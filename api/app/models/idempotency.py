@@ -0,0 +1,25 @@
+from datetime import datetime
+from sqlalchemy import DateTime, Integer, LargeBinary, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from ..core.database import Base
+
+# Idempotency-Key outcomes shared by every worker (IDEMPOTENCY_BACKEND=sql);
+# see app/core/idempotency.py. Kept compact: the key and the request
+# fingerprint are 16-byte digests, and the response is stored as sent.
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    key: Mapped[bytes] = mapped_column(LargeBinary(16), primary_key=True)
+    fingerprint: Mapped[bytes] = mapped_column(LargeBinary(16), nullable=False)
+    # None while the first request is still running
+    status: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    headers: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)
+    body: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)
+    # The claim's lease while running, then the end of the replay TTL; either
+    # way the row may be replaced once it has passed
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
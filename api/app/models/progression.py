@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy import Integer, String, Float, DateTime, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column
 from ..core.database import Base
 
@@ -14,4 +14,8 @@ class ExerciseProgress(Base):
     recommended_next_weight: Mapped[float | None] = mapped_column(Float, nullable=True)
     updated_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.utcnow, nullable=False
-    )
\ No newline at end of file
+    )
+
+    __table_args__ = (
+        Index("uq_exercise_progress_user_exercise", "user_id", "exercise", unique=True),
+    )
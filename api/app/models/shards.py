@@ -0,0 +1,15 @@
+from sqlalchemy import Integer, String, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+from ..core.database import Base
+
+# Which shard holds a user's rows; only the directory database's copy is used.
+# No row means the user predates sharding and still lives in the directory.
+# See app/core/sharding.py.
+
+class UserShard(Base):
+    __tablename__ = "user_shards"
+
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), primary_key=True)
+    shard: Mapped[str] = mapped_column(String(32), nullable=False)
+    # Set by the rebalancer while the user's rows are copied to this shard
+    moving_to: Mapped[str | None] = mapped_column(String(32), nullable=True)
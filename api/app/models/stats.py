@@ -0,0 +1,44 @@
+from datetime import date
+from sqlalchemy import Integer, String, Float, Date, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from ..core.database import Base
+
+# A rollup row covers one `period` starting on `period_start`:
+# "day" (that date) or "week" (the ISO week starting that Monday).
+
+class StatsRollup(Base):
+    __tablename__ = "stats_rollups"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
+    period: Mapped[str] = mapped_column(String(4), nullable=False)
+    period_start: Mapped[date] = mapped_column(Date, nullable=False)
+    sets: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    reps: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    volume: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
+    steps: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    task_calories: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        Index("uq_stats_rollups_user_period", "user_id", "period", "period_start", unique=True),
+    )
+
+class ExerciseRollup(Base):
+    __tablename__ = "exercise_rollups"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
+    period: Mapped[str] = mapped_column(String(4), nullable=False)
+    period_start: Mapped[date] = mapped_column(Date, nullable=False)
+    exercise: Mapped[str] = mapped_column(String(120), nullable=False)
+    sets: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    reps: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    volume: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
+
+    __table_args__ = (
+        Index(
+            "uq_exercise_rollups_user_period_exercise",
+            "user_id", "period", "period_start", "exercise",
+            unique=True,
+        ),
+    )
@@ -1,5 +1,5 @@
 from datetime import date
-from sqlalchemy import Integer, Date, ForeignKey
+from sqlalchemy import Integer, Date, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column
 from ..core.database import Base
 
@@ -11,3 +11,6 @@ class DailySteps(Base):
     steps: Mapped[int] = mapped_column(Integer, default=0)
     day: Mapped[date] = mapped_column(Date, nullable=False)
 
+    __table_args__ = (
+        Index("uq_daily_steps_user_day", "user_id", "day", unique=True),
+    )
@@ -0,0 +1,43 @@
+from datetime import datetime
+from sqlalchemy import Boolean, DateTime, Integer, String, Text, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from ..core.database import Base
+
+# Delta sync state; see app/core/sync.py.
+#
+# SyncChange is the compacted change log: one row per entity a user has
+# written, holding the sequence number of its latest change and whether that
+# change deleted it. SyncMutation remembers the outcome of each client
+# mutation by idempotency key, so a retried POST /sync replays it.
+
+class SyncChange(Base):
+    __tablename__ = "sync_changes"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
+    seq: Mapped[int] = mapped_column(Integer, nullable=False)
+    entity: Mapped[str] = mapped_column(String(16), nullable=False)
+    entity_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    deleted: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+
+    __table_args__ = (
+        Index("uq_sync_changes_user_entity", "user_id", "entity", "entity_id", unique=True),
+        Index("ix_sync_changes_user_seq", "user_id", "seq"),
+    )
+
+class SyncMutation(Base):
+    __tablename__ = "sync_mutations"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
+    key: Mapped[str] = mapped_column(String(64), nullable=False)
+    # Claimed with the success status in the mutation's own transaction; the
+    # body is stored right after, so a crash in between leaves it None
+    status: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    body: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("uq_sync_mutations_user_key", "user_id", "key", unique=True),
+        Index("ix_sync_mutations_created_at", "created_at"),
+    )
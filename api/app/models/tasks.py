@@ -1,5 +1,5 @@
 from datetime import date
-from sqlalchemy import Integer, String, Boolean, Date, ForeignKey
+from sqlalchemy import Integer, String, Boolean, Date, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column
 from ..core.database import Base
 
@@ -11,4 +11,8 @@ class DailyTask(Base):
     task_name: Mapped[str] = mapped_column(String(200), nullable=False)
     calories: Mapped[int | None] = mapped_column(Integer, nullable=True)
     completed: Mapped[bool] = mapped_column(Boolean, default=False)
-    day: Mapped[date] = mapped_column(Date, nullable=False)
\ No newline at end of file
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+
+    __table_args__ = (
+        Index("ix_daily_tasks_user_day", "user_id", "day"),
+    )
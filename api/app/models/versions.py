@@ -0,0 +1,18 @@
+from sqlalchemy import Integer, String, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from ..core.database import Base
+
+# One counter per (user, resource), bumped by every write to that resource;
+# see app/core/versions.py. No row yet means version 0.
+
+class ResourceVersion(Base):
+    __tablename__ = "resource_versions"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
+    resource: Mapped[str] = mapped_column(String(32), nullable=False)
+    version: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        Index("uq_resource_versions_user_resource", "user_id", "resource", unique=True),
+    )
@@ -20,6 +20,8 @@ class WorkoutSession(Base):
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
 
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
+
     # Use a Python-side default for SQLite.
     # If/when we move to Postgres, we can switch to server_default=text("now() at time zone 'utc'")).
     started_at: Mapped[datetime] = mapped_column(
@@ -38,7 +40,8 @@ class WorkoutSession(Base):
     )
 
     __table_args__ = (
-        Index("ix_workout_sessions_started_at", "started_at"),
+        # A user's sessions newest first, and keyset seeks on (started_at, id), in one range scan
+        Index("ix_workout_sessions_user_started", "user_id", "started_at", "id"),
     )
 
 class WorkoutSet(Base):
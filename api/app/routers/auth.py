@@ -1,38 +1,66 @@
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
-from ..core.database import get_db
+from ..core.database import get_directory_db
+from ..core.rebalance import place_new_user
 from ..models.user import User
 from ..schemas.user import UserCreate, UserLogin, UserOut
-from ..core.security import hash_password, verify_password, create_access_token
+from ..core.security import (
+    CurrentUser,
+    create_access_token,
+    get_current_user,
+    hash_password_async,
+    verify_and_update_password,
+)
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
+# Handlers are async so password hashing can wait on its own pool without
+# holding a request thread; the (quick) DB calls still go to the threadpool.
+
+def _user_by_email(db: Session, email: str) -> User | None:
+    return db.query(User).filter(User.email == email).first()
+
+def _save(db: Session, user: User) -> User:
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
 @router.post("/register", response_model=UserOut)
-def register(payload: UserCreate, db: Session = Depends(get_db)):
-    user_exists = db.query(User).filter(User.email == payload.email).first()
+async def register(payload: UserCreate, db: Session = Depends(get_directory_db)):
+    user_exists = await run_in_threadpool(_user_by_email, db, payload.email)
     if user_exists:
         raise HTTPException(status_code=400, detail="Email already registered")
 
     new_user = User(
         username=payload.username,
         email=payload.email,
-        password_hash=hash_password(payload.password),
+        password_hash=await hash_password_async(payload.password),
     )
 
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    return new_user
+    user = await run_in_threadpool(_save, db, new_user)
+    await run_in_threadpool(place_new_user, db, user.id)
+    return user
 
 @router.post("/login")
-def login(payload: UserLogin, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == payload.email).first()
+async def login(payload: UserLogin, db: Session = Depends(get_directory_db)):
+    user = await run_in_threadpool(_user_by_email, db, payload.email)
 
-    if not user or not verify_password(payload.password, user.password_hash):
+    valid, new_hash = (
+        await verify_and_update_password(payload.password, user.password_hash)
+        if user else (False, None)
+    )
+    if not valid:
         raise HTTPException(status_code=400, detail="Invalid email or password")
 
+    if new_hash:
+        # Stored hash used other rounds than PASSWORD_HASH_ROUNDS; upgrade it now
+        user.password_hash = new_hash
+        await run_in_threadpool(db.commit)
+
     token = create_access_token({"sub": str(user.id)})
 
     return {
@@ -40,3 +68,7 @@ def login(payload: UserLogin, db: Session = Depends(get_db)):
         "token_type": "bearer",
         "user_id": user.id
     }
+
+@router.get("/me")
+def me(current_user: CurrentUser = Depends(get_current_user)):
+    return {"user_id": current_user.id}
@@ -1,8 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import datetime, date
 
-from ..core.database import get_db
+from ..core.cache import dashboard_cache
+from ..core.database import get_user_read_db, get_async_user_read_db
 from ..models.user import User
 from ..models.steps import DailySteps  
 
@@ -12,22 +15,11 @@ router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 TEMP_USER_ID = 1  
 
 
-@router.get("/summary")
-def dashboard_summary(db: Session = Depends(get_db), user_id: int = TEMP_USER_ID):
-
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+def _steps_today_stmt(user_id: int, today: date):
+    return select(DailySteps.steps).where(DailySteps.user_id == user_id, DailySteps.day == today)
 
-    today = date.today()
-    steps_entry = (
-        db.query(DailySteps)
-        .filter(DailySteps.user_id == user.id, DailySteps.day == today)
-        .first()
-    )
-
-    steps_today = steps_entry.steps if steps_entry else 0
 
+def _build_summary(user: User, steps_today: int) -> dict:
     steps_goal = user.daily_step_goal or 8000
 
     percent_complete = (
@@ -45,5 +37,54 @@ def dashboard_summary(db: Session = Depends(get_db), user_id: int = TEMP_USER_ID
         "calories_burned": calories_burned,
         "activity_level": user.activity_level,
         "main_goal": user.main_goal,
-        "timestamp": datetime.utcnow()
-    }
\ No newline at end of file
+    }
+
+
+def _cached_summary(user_id: int, today: date) -> dict | None:
+    summary = dashboard_cache.get(user_id, today)
+    return None if summary is None else _stamped(summary)
+
+
+def _stamped(summary: dict) -> dict:
+    # The timestamp is per response, so it is never part of the cached value
+    return {**summary, "timestamp": datetime.utcnow()}
+
+
+@router.get("/summary")
+def dashboard_summary(db: Session = Depends(get_user_read_db), user_id: int = TEMP_USER_ID):
+    today = date.today()
+    cached = _cached_summary(user_id, today)
+    if cached is not None:
+        return cached
+
+    user = db.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    steps_today = db.execute(_steps_today_stmt(user.id, today)).scalar() or 0
+
+    summary = _build_summary(user, steps_today)
+    dashboard_cache.set(user_id, today, summary)
+    return _stamped(summary)
+
+
+# Async twin, mounted ahead of `router` when DB_ASYNC is on (see main.py)
+async_router = APIRouter(prefix="/dashboard", tags=["dashboard"], include_in_schema=False)
+
+
+@async_router.get("/summary")
+async def dashboard_summary_async(db: AsyncSession = Depends(get_async_user_read_db), user_id: int = TEMP_USER_ID):
+    today = date.today()
+    cached = _cached_summary(user_id, today)
+    if cached is not None:
+        return cached
+
+    user = await db.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    steps_today = (await db.execute(_steps_today_stmt(user.id, today))).scalar() or 0
+
+    summary = _build_summary(user, steps_today)
+    dashboard_cache.set(user_id, today, summary)
+    return _stamped(summary)
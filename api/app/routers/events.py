@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+
+from ..core.events import EventStreamResponse, hub
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+TEMP_USER_ID = 1
+
+
+@router.get("", response_class=EventStreamResponse)
+async def stream_events(user_id: int = TEMP_USER_ID):
+    """Server-sent change notifications (steps, tasks, profile) for the user's open screens."""
+    return EventStreamResponse(hub, hub.subscribe(user_id))
@@ -0,0 +1,156 @@
+import csv
+import io
+from typing import Iterator, Literal
+
+import orjson
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from ..core.database import get_user_read_db
+from ..models.workout import WorkoutSession, WorkoutSet
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+TEMP_USER_ID = 1
+
+# Rows fetched from the cursor (and written out) per chunk
+EXPORT_CHUNK_ROWS = 1000
+
+COLUMNS = ["session_id", "started_at", "note", "set_id", "exercise", "reps", "weight"]
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def _export_stmt(user_id: int):
+    # One row per set; sessions without sets still appear, with empty set columns
+    return (
+        select(
+            WorkoutSession.id.label("session_id"),
+            WorkoutSession.started_at,
+            WorkoutSession.note,
+            WorkoutSet.id.label("set_id"),
+            WorkoutSet.exercise,
+            WorkoutSet.reps,
+            WorkoutSet.weight,
+        )
+        .outerjoin(WorkoutSet, WorkoutSet.session_id == WorkoutSession.id)
+        .where(WorkoutSession.user_id == user_id)
+        .order_by(WorkoutSession.started_at, WorkoutSession.id, WorkoutSet.id)
+        .execution_options(yield_per=EXPORT_CHUNK_ROWS)
+    )
+
+
+def _row_chunks(bind: Engine, user_id: int) -> Iterator[list]:
+    """Rows in chunks off a streaming cursor.
+
+    The request's session is closed before the body is sent, so the stream
+    opens its own on the same engine and keeps it for as long as it runs.
+    """
+    with Session(bind=bind) as db:
+        for chunk in db.execute(_export_stmt(user_id)).partitions():
+            yield chunk
+
+
+def _csv_stream(bind: Engine, user_id: int) -> Iterator[str]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(COLUMNS)
+    for chunk in _row_chunks(bind, user_id):
+        writer.writerows(
+            (r.session_id, r.started_at.isoformat(), r.note, r.set_id, r.exercise, r.reps, r.weight)
+            for r in chunk
+        )
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    yield buf.getvalue()
+
+
+def _ndjson_stream(bind: Engine, user_id: int) -> Iterator[bytes]:
+    # orjson writes started_at in ISO 8601, as the JSON endpoints do
+    for chunk in _row_chunks(bind, user_id):
+        yield b"".join(orjson.dumps(r._asdict()) + b"\n" for r in chunk)
+
+
+class _DrainableSink(io.RawIOBase):
+    """Write-only file that hands its bytes back between row groups.
+
+    The Parquet footer records absolute offsets, so tell() keeps counting
+    across drains even though the bytes themselves are released.
+    """
+
+    def __init__(self):
+        self._parts: list[bytes] = []
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        data = bytes(b)
+        self._parts.append(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def _parquet_stream(bind: Engine, user_id: int) -> Iterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("session_id", pa.int64()),
+        ("started_at", pa.timestamp("us")),
+        ("note", pa.string()),
+        ("set_id", pa.int64()),
+        ("exercise", pa.string()),
+        ("reps", pa.int64()),
+        ("weight", pa.float64()),
+    ])
+    sink = _DrainableSink()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for chunk in _row_chunks(bind, user_id):
+            # Columnar: one row group per chunk
+            columns = list(zip(*chunk))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(col, type=field.type) for col, field in zip(columns, schema)],
+                schema=schema,
+            ))
+            yield sink.drain()
+    yield sink.drain()
+
+
+@router.get("/workouts")
+def export_workouts(
+    format: Literal["csv", "ndjson", "parquet"] = Query("csv"),
+    db: Session = Depends(get_user_read_db),
+    user_id: int = TEMP_USER_ID,
+):
+    """Stream the user's full workout history (one row per set) without loading it into memory."""
+    bind = db.get_bind()
+    if format == "parquet":
+        stream = _parquet_stream(bind, user_id)
+    elif format == "ndjson":
+        stream = _ndjson_stream(bind, user_id)
+    else:
+        stream = _csv_stream(bind, user_id)
+
+    return StreamingResponse(
+        stream,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="workouts.{format}"'},
+    )
@@ -1,6 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import Float, cast, select
 from sqlalchemy.orm import Session
-from ..core.database import get_db
+from ..core import sync, versions
+from ..core.database import get_user_db, get_user_read_db
+from ..core.responses import rows_response
 from ..models.goal import Goal
 from ..schemas.goal import GoalCreate, GoalUpdate, GoalOut
 
@@ -10,28 +13,48 @@ router = APIRouter(prefix="/goals", tags=["goals"])
 TEMP_USER_ID = 1
 
 @router.post("/", response_model=GoalOut)
-def create_goal(payload: GoalCreate, db: Session = Depends(get_db)):
+def create_goal(payload: GoalCreate, db: Session = Depends(get_user_db), user_id: int = TEMP_USER_ID):
     goal = Goal(
-        user_id=TEMP_USER_ID,
+        user_id=user_id,
         goal_type=payload.goal_type,
         target_value=payload.target_value,
     )
     db.add(goal)
+    db.flush()
+    sync.record(db, user_id, "goals", [goal.id])
+    versions.bump(db, user_id, "goals")
     db.commit()
     db.refresh(goal)
     return goal
 
+def _goals_stmt(user_id: int):
+    # GoalOut's fields, in order; values cast so integral ones still encode as floats
+    return select(
+        Goal.id,
+        Goal.user_id,
+        Goal.goal_type,
+        cast(Goal.target_value, Float).label("target_value"),
+        cast(Goal.progress_value, Float).label("progress_value"),
+    ).where(Goal.user_id == user_id)
+
 @router.get("/", response_model=list[GoalOut])
-def list_goals(db: Session = Depends(get_db)):
-    return db.query(Goal).filter(Goal.user_id == TEMP_USER_ID).all()
+def list_goals(request: Request, db: Session = Depends(get_user_read_db), user_id: int = TEMP_USER_ID):
+    headers, not_modified = versions.conditional(request, db, user_id, "goals")
+    if not_modified is not None:
+        return not_modified
+    return rows_response(db.execute(_goals_stmt(user_id)), headers)
 
 @router.put("/{goal_id}", response_model=GoalOut)
-def update_goal(goal_id: int, payload: GoalUpdate, db: Session = Depends(get_db)):
+def update_goal(
+    goal_id: int, payload: GoalUpdate, db: Session = Depends(get_user_db), user_id: int = TEMP_USER_ID
+):
     goal = db.query(Goal).filter(Goal.id == goal_id).first()
-    if not goal:
+    if not goal or goal.user_id != user_id:
         raise HTTPException(status_code=404, detail="Goal not found")
 
     goal.progress_value = payload.progress_value
+    sync.record(db, user_id, "goals", [goal_id])
+    versions.bump(db, user_id, "goals")
     db.commit()
     db.refresh(goal)
     return goal
@@ -1,10 +1,17 @@
 # api/app/routers/meta.py
 from datetime import datetime, timezone
-from fastapi import APIRouter
+from fastapi import APIRouter, Response
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 
+from ..core.metrics import registry
+
 router = APIRouter(prefix="/meta", tags=["meta"])
 
+# The feature list only changes with a deploy; info carries the server clock
+FEATURES_CACHE_CONTROL = "public, max-age=3600"
+NO_STORE = "no-store"
+
 class ServiceInfo(BaseModel):
     name: str
     version: str
@@ -12,7 +19,8 @@ class ServiceInfo(BaseModel):
     time_utc: datetime
 
 @router.get("/info", response_model=ServiceInfo, summary="Service info")
-def get_info():
+def get_info(response: Response):
+    response.headers["Cache-Control"] = NO_STORE
     return ServiceInfo(
         name="SWEat API",
         version="0.1.1",
@@ -26,17 +34,16 @@ class Feature(BaseModel):
     status: str  # planned | in-progress | done
 
 @router.get("/features", response_model=list[Feature], summary="Product roadmap snapshot")
-def list_features():
+def list_features(response: Response):
+    response.headers["Cache-Control"] = FEATURES_CACHE_CONTROL
     return [
-        Feature(key="workouts_search", title="Search workouts by name/tags", status="in-progress"),
+        Feature(key="workouts_search", title="Search workouts by name/tags", status="done"),
         Feature(key="goals_api", title="Goals and streak tracking", status="planned"),
-        Feature(key="export_csv", title="Data export (CSV/JSON)", status="planned"),
+        Feature(key="export_csv", title="Data export (CSV/JSON)", status="done"),
     ]
 
-@router.get("/metrics", summary="Lightweight service metrics (stub)")
+@router.get("/metrics", response_class=PlainTextResponse, summary="Prometheus metrics for this worker")
 def metrics():
-    return {
-        "uptime_seconds": 0,
-        "requests_total": 0,
-        "workouts_in_db": "unknown (stub)",
-    }
\ No newline at end of file
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4", headers={"Cache-Control": NO_STORE}
+    )
@@ -1,6 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from ..core.database import get_db
+from ..core import versions
+from ..core.database import get_user_read_db
+from ..core.responses import rows_response
 from ..models.progression import ExerciseProgress
 
 router = APIRouter(prefix="/progression", tags=["progression"])
@@ -8,27 +11,25 @@ router = APIRouter(prefix="/progression", tags=["progression"])
 TEMP_USER_ID = 1
 
 @router.get("/overview")
-def progression_overview(db: Session = Depends(get_db), user_id: int = TEMP_USER_ID):
-    rows = (
-        db.query(ExerciseProgress)
-        .filter(ExerciseProgress.user_id == user_id)
-        .all()
+def progression_overview(request: Request, db: Session = Depends(get_user_read_db), user_id: int = TEMP_USER_ID):
+    headers, not_modified = versions.conditional(request, db, user_id, "progression")
+    if not_modified is not None:
+        return not_modified
+
+    result = db.execute(
+        select(
+            ExerciseProgress.exercise,
+            ExerciseProgress.current_weight,
+            ExerciseProgress.best_reps_first_set,
+            ExerciseProgress.recommended_next_weight,
+            ExerciseProgress.updated_at,
+        ).where(ExerciseProgress.user_id == user_id)
     )
-
-    return [
-        {
-            "exercise": r.exercise,
-            "current_weight": r.current_weight,
-            "best_reps_first_set": r.best_reps_first_set,
-            "recommended_next_weight": r.recommended_next_weight,
-            "updated_at": r.updated_at
-        }
-        for r in rows
-    ]
+    return rows_response(result, headers)
 
 
 @router.get("/{exercise_name}")
-def progression_history(exercise_name: str, db: Session = Depends(get_db), user_id: int = TEMP_USER_ID):
+def progression_history(exercise_name: str, db: Session = Depends(get_user_read_db), user_id: int = TEMP_USER_ID):
     rows = (
         db.query(ExerciseProgress)
         .filter(
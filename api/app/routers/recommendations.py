@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from ..core.database import get_db
+from ..core.database import get_user_read_db
 from ..models.user import User
 from ..core.recommendations import build_recommendation, get_recommended_tasks
 
@@ -10,7 +10,7 @@ router = APIRouter(prefix="/recommend", tags=["recommend"])
 TEMP_USER_ID = 1
 
 @router.get("/weight")
-def recommend_weight(user_id: int = TEMP_USER_ID, db: Session = Depends(get_db)):
+def recommend_weight(user_id: int = TEMP_USER_ID, db: Session = Depends(get_user_read_db)):
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -28,7 +28,7 @@ def recommend_weight(user_id: int = TEMP_USER_ID, db: Session = Depends(get_db))
     }
 
 @router.get("/tasks")
-def recommend_tasks(user_id: int = TEMP_USER_ID, db: Session = Depends(get_db)):
+def recommend_tasks(user_id: int = TEMP_USER_ID, db: Session = Depends(get_user_read_db)):
     user = db.query(User).filter(User.id == user_id).first()
 
     if not user:
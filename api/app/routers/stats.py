@@ -0,0 +1,78 @@
+from collections import defaultdict
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..core import rollups
+from ..core.database import get_user_read_db
+from ..models.stats import ExerciseRollup, StatsRollup
+from ..schemas.stats import ExerciseStatsOut, StatsBucketOut, StatsPeriod
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+TEMP_USER_ID = 1
+
+
+def _stats_range_stmt(user_id: int, period: str, start: date, end: date):
+    return (
+        select(StatsRollup.period_start, StatsRollup.sets, StatsRollup.reps, StatsRollup.volume,
+               StatsRollup.steps, StatsRollup.task_calories)
+        .where(
+            StatsRollup.user_id == user_id,
+            StatsRollup.period == period,
+            StatsRollup.period_start.between(start, end),
+        )
+        .order_by(StatsRollup.period_start)
+    )
+
+
+def _exercise_range_stmt(user_id: int, period: str, start: date, end: date):
+    # Exercises whose sets were all deleted keep a zeroed row; leave them out
+    return (
+        select(ExerciseRollup.period_start, ExerciseRollup.exercise, ExerciseRollup.sets,
+               ExerciseRollup.reps, ExerciseRollup.volume)
+        .where(
+            ExerciseRollup.user_id == user_id,
+            ExerciseRollup.period == period,
+            ExerciseRollup.period_start.between(start, end),
+            ExerciseRollup.sets > 0,
+        )
+        .order_by(ExerciseRollup.period_start, ExerciseRollup.exercise)
+    )
+
+
+@router.get("/range", response_model=list[StatsBucketOut])
+def stats_range(
+    from_: date = Query(..., alias="from"),
+    to: date = Query(...),
+    period: StatsPeriod = Query("day"),
+    db: Session = Depends(get_user_read_db),
+    user_id: int = TEMP_USER_ID,
+):
+    """Rollup buckets overlapping [from, to], oldest first. Periods with no activity are omitted."""
+    if from_ > to:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+
+    start = rollups.period_start(period, from_)
+
+    exercises: dict[date, list[ExerciseStatsOut]] = defaultdict(list)
+    for r in db.execute(_exercise_range_stmt(user_id, period, start, to)):
+        exercises[r.period_start].append(
+            ExerciseStatsOut(exercise=r.exercise, sets=r.sets, reps=r.reps, volume=r.volume)
+        )
+
+    totals = db.execute(_stats_range_stmt(user_id, period, start, to))
+    return [
+        StatsBucketOut(
+            start=r.period_start,
+            sets=r.sets,
+            reps=r.reps,
+            volume=r.volume,
+            steps=r.steps,
+            task_calories=r.task_calories,
+            exercises=exercises.get(r.period_start, []),
+        )
+        for r in totals
+    ]
@@ -1,26 +1,152 @@
 from fastapi import APIRouter, Depends
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import date
-from ..core.database import get_db
+from ..core import rollups, sync
+from ..core.cache import dashboard_cache
+from ..core.events import hub
+from ..core.database import get_user_db, get_async_user_db, dialect_insert, session_for, shard_of
+from ..core.write_behind import Event, WriteBehindQueue, get_write_behind, register_handler
 from ..models.steps import DailySteps
+from ..schemas.steps import StepsBatch, StepsMerge
 
 router = APIRouter(prefix="/steps", tags=["steps"])
 
-@router.post("/update")
-def update_steps(user_id: int, steps: int, db: Session = Depends(get_db)):
-    today = date.today()
 
-    entry = (
-        db.query(DailySteps)
-        .filter(DailySteps.user_id == user_id, DailySteps.day == today)
-        .first()
-    )
+def _upsert_steps_stmt(dialect_name: str, rows: list[dict], merge: StepsMerge = "replace"):
+    """One INSERT ... ON CONFLICT(user_id, day) DO UPDATE for any number of rows."""
+    stmt = dialect_insert(dialect_name)(DailySteps).values(rows)
 
-    if entry:
-        entry.steps = steps
+    if merge == "max":
+        greatest = func.greatest if dialect_name == "postgresql" else func.max
+        new_steps = greatest(DailySteps.steps, stmt.excluded.steps)
     else:
-        entry = DailySteps(user_id=user_id, steps=steps, day=today)
-        db.add(entry)
+        new_steps = stmt.excluded.steps
+
+    return stmt.on_conflict_do_update(
+        index_elements=[DailySteps.user_id, DailySteps.day],
+        set_={"steps": new_steps},
+    )
+
+
+def _write_steps(db: Session, rows: list[dict], merge: StepsMerge = "replace") -> None:
+    """Upsert (user_id, day, steps) rows, refresh their rollups and log them for sync; does not commit."""
+    stmt = _upsert_steps_stmt(db.bind.dialect.name, rows, merge).returning(DailySteps.user_id, DailySteps.id)
+    ids_by_user: dict[int, list[int]] = {}
+    # On the connection: the ORM's RETURNING handling would cost more than the upsert
+    for user_id, row_id in db.connection().execute(stmt):
+        ids_by_user.setdefault(user_id, []).append(row_id)
+
+    days_by_user: dict[int, list[date]] = {}
+    for row in rows:
+        days_by_user.setdefault(row["user_id"], []).append(row["day"])
+    for user_id, days in days_by_user.items():
+        rollups.refresh_steps(db, user_id, days)
+        sync.record(db, user_id, "steps", ids_by_user.get(user_id, []))
+
 
+def _steps_changed(user_id: int, day: date) -> None:
+    # After the commit: drop the cached summary and tell the user's open screens
+    dashboard_cache.invalidate(user_id, day)
+    hub.publish(user_id, "steps", day)
+
+
+def save_steps(db: Session, user_id: int, day: date, steps: int, merge: StepsMerge = "replace") -> None:
+    """Set one day's count and commit; /steps/update does this for today."""
+    _write_steps(db, [{"user_id": user_id, "day": day, "steps": steps}], merge)
     db.commit()
-    return {"message": "Steps updated"}
\ No newline at end of file
+    _steps_changed(user_id, day)
+
+
+@router.post("/update")
+def update_steps(user_id: int, steps: int, merge: StepsMerge = "replace", db: Session = Depends(get_user_db)):
+    save_steps(db, user_id, date.today(), steps, merge)
+    return {"message": "Steps updated"}
+
+
+@router.post("/batch")
+def update_steps_batch(payload: StepsBatch):
+    """Backfill many (user_id, day, steps) rows, e.g. a week of wearable history, in one statement.
+
+    With SHARD_URLS set, that is one statement and transaction per shard.
+    """
+    # Within one statement a key may appear only once; last entry wins, as if sent in order
+    rows = {(e.user_id, e.day): e.model_dump() for e in payload.entries}
+    if payload.merge == "max":
+        for e in payload.entries:
+            rows[(e.user_id, e.day)]["steps"] = max(rows[(e.user_id, e.day)]["steps"], e.steps)
+
+    by_shard: dict[str, dict[tuple[int, date], dict]] = {}
+    for key, row in rows.items():
+        by_shard.setdefault(shard_of(key[0]), {})[key] = row
+    for part in by_shard.values():
+        first_user_id = next(iter(part))[0]
+        with session_for(first_user_id) as db:
+            _write_steps(db, list(part.values()), payload.merge)
+            db.commit()
+
+    for user_id, day in rows:
+        _steps_changed(user_id, day)
+    return {"message": "Steps updated", "rows": len(rows)}
+
+
+# Async twin, mounted ahead of `router` when DB_ASYNC is on (see main.py)
+async_router = APIRouter(prefix="/steps", tags=["steps"], include_in_schema=False)
+
+@async_router.post("/update")
+async def update_steps_async(
+    user_id: int, steps: int, merge: StepsMerge = "replace", db: AsyncSession = Depends(get_async_user_db)
+):
+    today = date.today()
+    await db.run_sync(_write_steps, [{"user_id": user_id, "day": today, "steps": steps}], merge)
+    await db.commit()
+    _steps_changed(user_id, today)
+    return {"message": "Steps updated"}
+
+
+# Write-behind twin, mounted ahead of the others when WRITE_BEHIND is on (see main.py)
+write_behind_router = APIRouter(prefix="/steps", tags=["steps"], include_in_schema=False)
+
+
+def _apply_steps_events(db: Session, events: list[Event]) -> None:
+    """Coalesce a batch of step pings to one row per (user_id, day), as if applied in order."""
+    merged: dict[tuple[int, date], list] = {}
+    for e in events:
+        key = (e.payload["user_id"], e.payload["day"])
+        current = merged.get(key)
+        if current is None or e.payload["merge"] == "replace":
+            merged[key] = [e.payload["steps"], e.payload["merge"]]
+        else:
+            # "max" on top of an earlier ping keeps that ping's mode against the stored count
+            current[0] = max(current[0], e.payload["steps"])
+        e.result = {"message": "Steps updated"}
+
+    for merge in ("replace", "max"):
+        rows = [
+            {"user_id": user_id, "day": day, "steps": steps}
+            for (user_id, day), (steps, mode) in merged.items()
+            if mode == merge
+        ]
+        if rows:
+            _write_steps(db, rows, merge)
+
+
+def _steps_events_committed(events: list[Event]) -> None:
+    for key in {(e.payload["user_id"], e.payload["day"]) for e in events}:
+        _steps_changed(*key)
+
+
+register_handler("steps", _apply_steps_events, _steps_events_committed)
+
+
+@write_behind_router.post("/update")
+async def update_steps_write_behind(
+    user_id: int,
+    steps: int,
+    merge: StepsMerge = "replace",
+    queue: WriteBehindQueue = Depends(get_write_behind),
+):
+    return await queue.submit(
+        "steps", {"user_id": user_id, "day": date.today(), "steps": steps, "merge": merge}, user_id=user_id
+    )
@@ -0,0 +1,208 @@
+"""Delta sync for offline-first clients (see app/core/sync.py).
+
+GET /sync?since=<cursor> returns what changed since the cursor. POST /sync
+applies a batch of queued client writes in order, each through the same
+route function its REST endpoint uses, so rollups, versions and the change
+log are kept exactly as they would be online. Every mutation carries an
+idempotency key. The key is claimed in the mutation's own transaction, so a
+client that retries a batch after a dropped response gets each stored
+outcome back ("replayed": true) instead of writing twice.
+
+A set created offline in a session that was also created offline names it
+by the session mutation's key (`"session_key"`) instead of `"session_id"`.
+"""
+from __future__ import annotations
+
+from typing import Any, Callable, Optional
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import goals, steps, tasks, user, workouts
+from ..core import sync
+from ..core.database import get_user_db, get_user_read_db
+from ..models.steps import DailySteps
+from ..models.sync import SyncMutation
+from ..schemas.goal import GoalCreate, GoalOut, GoalUpdate
+from ..schemas.sync import SyncMutationIn, SyncMutationResult, SyncPullOut, SyncPush, SyncPushOut, SyncStepsIn
+from ..schemas.tasks import TaskCreate, TaskOut
+from ..schemas.user import UserProfileOut, UserProfileUpdate
+from ..schemas.workout import WorkoutSessionCreate, WorkoutSessionOut, WorkoutSetCreate
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+TEMP_USER_ID = 1
+
+MAX_PULL = 5000
+
+
+@router.get("", response_model=SyncPullOut)
+def pull(
+    since: Optional[str] = None,
+    limit: int = Query(1000, ge=1, le=MAX_PULL),
+    db: Session = Depends(get_user_read_db),
+    user_id: int = TEMP_USER_ID,
+):
+    cursor = sync.decode_cursor(since) if since else None
+    return ORJSONResponse(sync.changes_since(db, user_id, cursor, limit))
+
+
+def _target(m: SyncMutationIn) -> int:
+    if m.id is None:
+        raise HTTPException(status_code=422, detail=f"{m.entity} {m.op} needs an id")
+    return m.id
+
+
+def _dump(schema, obj) -> dict:
+    return schema.model_validate(obj).model_dump(mode="json")
+
+
+def _stored(db: Session, user_id: int, key: str) -> SyncMutation | None:
+    return db.execute(
+        select(SyncMutation).where(SyncMutation.user_id == user_id, SyncMutation.key == key)
+    ).scalar_one_or_none()
+
+
+def _session_ref(db: Session, user_id: int, data: dict) -> int:
+    if "session_key" in data:
+        created = _stored(db, user_id, data.pop("session_key"))
+        if created is None or created.status != 201 or not created.body:
+            raise HTTPException(status_code=409, detail="session_key does not name a created session")
+        return orjson.loads(created.body)["id"]
+    if "session_id" in data:
+        return data.pop("session_id")
+    raise HTTPException(status_code=422, detail="sets create needs session_id or session_key")
+
+
+def _create_session(db: Session, user_id: int, m: SyncMutationIn) -> Any:
+    session = workouts.create_session(WorkoutSessionCreate(**m.data), db, Response(), user_id)
+    return _dump(WorkoutSessionOut, session)
+
+
+def _update_session(db: Session, user_id: int, m: SyncMutationIn) -> Any:
+    return _dump(WorkoutSessionOut, workouts.update_session(_target(m), db, m.data, user_id))
+
+
+def _delete_session(db: Session, user_id: int, m: SyncMutationIn) -> Any:
+    workouts.delete_session(_target(m), db, user_id)
+
+
+def _create_set(db: Session, user_id: int, m: SyncMutationIn) -> Any:
+    data = dict(m.data)
+    session_id = _session_ref(db, user_id, data)
+    # No BackgroundTasks here: progression is recorded inline
+    out = workouts.add_set(session_id, WorkoutSetCreate(**data), db, Response(), None, user_id)
+    return out.model_dump(mode="json")
+
+
+def _delete_set(db: Session, user_id: int, m: SyncMutationIn) -> Any:
+    workouts.delete_set(_target(m), db, user_id)
+
+
+def _create_task(db: Session, user_id: int, m: SyncMutationIn) -> Any:
+    return _dump(TaskOut, tasks.add_task(TaskCreate(**m.data), db, user_id))
+
+
+def _update_task(db: Session, user_id: int, m: SyncMutationIn) -> Any:
+    # Completing is the only change the tasks API offers
+    if m.data != {"completed": True}:
+        raise HTTPException(status_code=422, detail='tasks update only supports {"completed": true}')
+    return _dump(TaskOut, tasks.complete_task(_target(m), db, user_id))
+
+
+def _save_steps(db: Session, user_id: int, m: SyncMutationIn) -> Any:
+    entry = SyncStepsIn(**m.data)
+    steps.save_steps(db, user_id, entry.day, entry.steps, entry.merge)
+    row = db.execute(
+        select(DailySteps.id, DailySteps.day, DailySteps.steps)
+        .where(DailySteps.user_id == user_id, DailySteps.day == entry.day)
+    ).one()
+    return {"id": row.id, "day": row.day.isoformat(), "steps": row.steps}
+
+
+def _create_goal(db: Session, user_id: int, m: SyncMutationIn) -> Any:
+    return _dump(GoalOut, goals.create_goal(GoalCreate(**m.data), db, user_id))
+
+
+def _update_goal(db: Session, user_id: int, m: SyncMutationIn) -> Any:
+    return _dump(GoalOut, goals.update_goal(_target(m), GoalUpdate(**m.data), db, user_id))
+
+
+def _update_profile(db: Session, user_id: int, m: SyncMutationIn) -> Any:
+    return _dump(UserProfileOut, user.update_profile(UserProfileUpdate(**m.data), user_id, db))
+
+
+# (entity, op) -> (status the REST route answers with, handler). Handlers
+# commit through the route they call and return the response body.
+MUTATIONS: dict[tuple[str, str], tuple[int, Callable[[Session, int, SyncMutationIn], Any]]] = {
+    ("sessions", "create"): (201, _create_session),
+    ("sessions", "update"): (200, _update_session),
+    ("sessions", "delete"): (204, _delete_session),
+    ("sets", "create"): (201, _create_set),
+    ("sets", "delete"): (204, _delete_set),
+    ("tasks", "create"): (200, _create_task),
+    ("tasks", "update"): (200, _update_task),
+    ("steps", "create"): (200, _save_steps),
+    ("steps", "update"): (200, _save_steps),
+    ("goals", "create"): (200, _create_goal),
+    ("goals", "update"): (200, _update_goal),
+    ("profile", "update"): (200, _update_profile),
+}
+
+
+def _replay(stored: SyncMutation) -> SyncMutationResult:
+    body = orjson.loads(stored.body) if stored.body else None
+    return SyncMutationResult(key=stored.key, status=stored.status, body=body, replayed=True)
+
+
+def _apply(db: Session, user_id: int, m: SyncMutationIn) -> SyncMutationResult:
+    """Apply one new mutation and store its outcome under its key."""
+    try:
+        if (m.entity, m.op) not in MUTATIONS:
+            raise HTTPException(status_code=422, detail=f"{m.op} is not supported for {m.entity}")
+        status, handler = MUTATIONS[m.entity, m.op]
+        claim = SyncMutation(user_id=user_id, key=m.key, status=status)
+        db.add(claim)
+        try:
+            body = handler(db, user_id, m)
+        except ValidationError as exc:
+            raise HTTPException(status_code=422, detail=jsonable_encoder(exc.errors(include_url=False)))
+    except HTTPException as exc:
+        # Nothing was written; a client error is an outcome too, and is stored
+        # so a retry does not try again. Server errors are left to the retry.
+        db.rollback()
+        if exc.status_code >= 500:
+            raise
+        status, body = exc.status_code, {"detail": exc.detail}
+        claim = SyncMutation(user_id=user_id, key=m.key, status=status)
+        db.add(claim)
+
+    claim.body = orjson.dumps(body).decode() if body is not None else None
+    db.commit()
+    return SyncMutationResult(key=m.key, status=status, body=body)
+
+
+@router.post("", response_model=SyncPushOut)
+def push(payload: SyncPush, db: Session = Depends(get_user_db), user_id: int = TEMP_USER_ID):
+    results = []
+    for m in payload.mutations:
+        stored = _stored(db, user_id, m.key)
+        if stored is not None:
+            results.append(_replay(stored))
+            continue
+        try:
+            results.append(_apply(db, user_id, m))
+        except IntegrityError:
+            # Another request claimed the same key first; report its outcome
+            db.rollback()
+            stored = _stored(db, user_id, m.key)
+            if stored is None:
+                raise
+            results.append(_replay(stored))
+    return ORJSONResponse({"results": [r.model_dump() for r in results]})
@@ -1,7 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import date
-from ..core.database import get_db
+from ..core import rollups, sync, versions
+from ..core.database import get_user_db, get_user_read_db, get_async_user_read_db
+from ..core.events import hub
+from ..core.responses import rows_response
 from ..models.tasks import DailyTask
 from ..schemas.tasks import TaskCreate, TaskOut
 
@@ -10,23 +15,31 @@ router = APIRouter(prefix="/tasks", tags=["tasks"])
 TEMP_USER_ID = 1
 
 
-@router.get("/today", response_model=list[TaskOut])
-def get_today_tasks(db: Session = Depends(get_db), user_id: int = TEMP_USER_ID):
-    today = date.today()
+def _today_tasks_stmt(user_id: int, day: date):
+    # TaskOut's fields, in order, so rows encode without building models
+    return select(
+        DailyTask.id,
+        DailyTask.task_name,
+        DailyTask.calories,
+        DailyTask.completed,
+        DailyTask.day,
+        DailyTask.user_id,
+    ).where(DailyTask.user_id == user_id, DailyTask.day == day)
 
-    tasks = (
-        db.query(DailyTask)
-        .filter(DailyTask.user_id == user_id, DailyTask.day == today)
-        .all()
-    )
 
-    return tasks
+@router.get("/today", response_model=list[TaskOut])
+def get_today_tasks(request: Request, db: Session = Depends(get_user_read_db), user_id: int = TEMP_USER_ID):
+    today = date.today()
+    headers, not_modified = versions.conditional(request, db, user_id, "tasks", today)
+    if not_modified is not None:
+        return not_modified
+    return rows_response(db.execute(_today_tasks_stmt(user_id, today)), headers)
 
 
 @router.post("/add", response_model=TaskOut)
 def add_task(
     payload: TaskCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_user_db),
     user_id: int = TEMP_USER_ID
 ):
     today = date.today()
@@ -39,19 +52,45 @@ def add_task(
     )
 
     db.add(new_task)
+    db.flush()
+    sync.record(db, user_id, "tasks", [new_task.id])
+    versions.bump(db, user_id, "tasks")
     db.commit()
+    hub.publish(user_id, "tasks", today)
     db.refresh(new_task)
 
     return new_task
 
 
 @router.put("/complete/{task_id}", response_model=TaskOut)
-def complete_task(task_id: int, db: Session = Depends(get_db), user_id: int = TEMP_USER_ID):
+def complete_task(task_id: int, db: Session = Depends(get_user_db), user_id: int = TEMP_USER_ID):
     task = db.get(DailyTask, task_id)
     if not task or task.user_id != user_id:
         raise HTTPException(status_code=404, detail="Task not found")
 
+    changed = not task.completed
+    if changed:
+        rollups.record_task_calories(db, user_id, task.day, task.calories or 0)
+        sync.record(db, user_id, "tasks", [task_id])
+        versions.bump(db, user_id, "tasks")
     task.completed = True
     db.commit()
+    if changed:
+        hub.publish(user_id, "tasks", task.day)
     db.refresh(task)
     return task
+
+
+# Async twin, mounted ahead of `router` when DB_ASYNC is on (see main.py)
+async_router = APIRouter(prefix="/tasks", tags=["tasks"], include_in_schema=False)
+
+
+@async_router.get("/today", response_model=list[TaskOut])
+async def get_today_tasks_async(
+    request: Request, db: AsyncSession = Depends(get_async_user_read_db), user_id: int = TEMP_USER_ID
+):
+    today = date.today()
+    headers, not_modified = await versions.conditional_async(request, db, user_id, "tasks", today)
+    if not_modified is not None:
+        return not_modified
+    return rows_response(await db.execute(_today_tasks_stmt(user_id, today)), headers)
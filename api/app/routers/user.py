@@ -1,6 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
-from ..core.database import get_db
+from ..core import sync, versions
+from ..core.cache import dashboard_cache
+from ..core.events import hub
+from ..core.database import get_user_db, get_user_read_db
 from ..models.user import User
 from ..schemas.user import UserProfileUpdate, UserProfileOut
 
@@ -9,17 +12,27 @@ router = APIRouter(prefix="/user", tags=["user"])
 TEMP_USER_ID = 1
 
 @router.get("/profile", response_model=UserProfileOut)
-def get_profile(user_id: int = TEMP_USER_ID, db: Session = Depends(get_db)):
+def get_profile(
+    request: Request,
+    response: Response,
+    user_id: int = TEMP_USER_ID,
+    db: Session = Depends(get_user_read_db),
+):
+    headers, not_modified = versions.conditional(request, db, user_id, "profile")
+    if not_modified is not None:
+        return not_modified
+
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    response.headers.update(headers)
     return user
 
 @router.put("/profile", response_model=UserProfileOut)
 def update_profile(
     profile: UserProfileUpdate,
     user_id: int = TEMP_USER_ID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_user_db),
 ):
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
@@ -29,6 +42,10 @@ def update_profile(
     for key, value in data.items():
         setattr(user, key, value)
 
+    sync.record(db, user_id, "profile", [user_id])
+    versions.bump(db, user_id, "profile")
     db.commit()
+    dashboard_cache.invalidate(user_id)
+    hub.publish(user_id, "profile")
     db.refresh(user)
     return user
\ No newline at end of file
@@ -1,136 +1,534 @@
-from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, Query, Response, Body
-from sqlalchemy import select
+import base64
+import re
+from typing import Annotated, Optional, Union
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response, Body
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import Float, Integer, String, and_, cast, column, exists, func, insert, literal_column, or_, select, table, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, selectinload
 from datetime import datetime
 
-from ..core.database import get_db
+from ..core import config, rollups, sync, versions
+from ..core.database import get_user_db, get_user_read_db, get_async_user_db, get_async_user_read_db
+from ..core.responses import (
+    COLUMNAR_JSON,
+    COLUMNAR_MSGPACK,
+    JSON,
+    MSGPACK,
+    columnar_sets,
+    encoded_response,
+    group_rows,
+    negotiate,
+    row_dicts,
+)
+from ..core.progression import NewSet, engine as progression
+from ..core.write_behind import Event, WriteBehindQueue, get_write_behind, register_handler
 from ..models.workout import WorkoutSession, WorkoutSet
-from ..models.progression import ExerciseProgress
 from ..schemas.workout import (
     WorkoutSessionCreate,
     WorkoutSessionOut,
     WorkoutSetCreate,
     WorkoutSetOut,
+    WorkoutSessionBulkCreate,
+    WorkoutSessionSummaryOut,
+    WorkoutSearchHit,
+    MAX_BULK_SETS,
 )
 
 router = APIRouter(prefix="/workouts", tags=["workouts"])
-DBSession = Annotated[Session, Depends(get_db)]
+DBSession = Annotated[Session, Depends(get_user_db)]
+ReadDBSession = Annotated[Session, Depends(get_user_read_db)]
+
+TEMP_USER_ID = 1
+
+
+def _owned_session(db: Session, session_id: int, user_id: int) -> WorkoutSession:
+    # Another user's session is as missing as a deleted one
+    session = db.get(WorkoutSession, session_id)
+    if not session or session.user_id != user_id:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return session
 
 
 @router.post("/sessions", response_model=WorkoutSessionOut, status_code=201)
-def create_session(payload: WorkoutSessionCreate, db: DBSession, response: Response):
-    session = WorkoutSession(note=payload.note)
+def create_session(payload: WorkoutSessionCreate, db: DBSession, response: Response, user_id: int = TEMP_USER_ID):
+    session = WorkoutSession(user_id=user_id, note=payload.note)
     db.add(session)
+    db.flush()
+    sync.record(db, user_id, "sessions", [session.id])
+    versions.bump(db, user_id, "workouts")
     db.commit()
     db.refresh(session)
     response.headers["Location"] = f"/workouts/sessions/{session.id}"
     return session
 
 
-@router.get("/sessions", response_model=list[WorkoutSessionOut])
-def list_sessions(
+def _record_progress(
+    db: Session,
+    background_tasks: BackgroundTasks | None,
+    user_id: int,
+    session_id: int,
+    new_sets: list[NewSet],
+) -> None:
+    """Feed new sets to the progression engine, inline or after the response is sent."""
+    if background_tasks is not None and config.PROGRESSION_MODE == "background":
+        background_tasks.add_task(progression.record_sets_out_of_band, user_id, session_id, new_sets)
+    else:
+        progression.record_sets(db, user_id, session_id, new_sets)
+
+
+def _ingest_session(
+    db: Session,
+    user_id: int,
+    note: Optional[str],
+    started_at: Optional[datetime],
+    rows: list[dict],
+    background_tasks: BackgroundTasks | None = None,
+) -> WorkoutSessionOut:
+    """Write a session and all of its sets in a single transaction."""
+    session = WorkoutSession(user_id=user_id, note=note)
+    if started_at is not None:
+        session.started_at = started_at
+    db.add(session)
+    db.flush()
+
+    for row in rows:
+        row["session_id"] = session.id
+
+    # One multi-row INSERT for the whole batch instead of a round trip per set.
+    set_ids = db.scalars(
+        insert(WorkoutSet).returning(WorkoutSet.id, sort_by_parameter_order=True),
+        rows,
+    ).all()
+
+    _record_progress(
+        db,
+        background_tasks,
+        user_id,
+        session.id,
+        [NewSet(set_id, row["exercise"], row["weight"], row["reps"]) for set_id, row in zip(set_ids, rows)],
+    )
+    rollups.record_sets(
+        db, user_id, session.started_at.date(), [(r["exercise"], r["reps"], r["weight"]) for r in rows]
+    )
+
+    out = WorkoutSessionOut(
+        id=session.id,
+        started_at=session.started_at,
+        note=session.note,
+        sets=[WorkoutSetOut(id=set_id, **row) for set_id, row in zip(set_ids, rows)],
+    )
+    sync.record(db, user_id, "sessions", [session.id])
+    sync.record(db, user_id, "sets", set_ids)
+    versions.bump(db, user_id, "workouts")
+    db.commit()
+    return out
+
+
+@router.post("/sessions/bulk", response_model=WorkoutSessionOut, status_code=201)
+def bulk_create_session(
+    payload: WorkoutSessionBulkCreate,
     db: DBSession,
-    limit: int = Query(50, ge=1, le=200),
-    offset: int = Query(0, ge=0),
+    response: Response,
+    background_tasks: BackgroundTasks,
+    user_id: int = TEMP_USER_ID,
 ):
-    stmt = (
+    rows = [s.model_dump() for s in payload.sets]
+    out = _ingest_session(db, user_id, payload.note, payload.started_at, rows, background_tasks)
+    response.headers["Location"] = f"/workouts/sessions/{out.id}"
+    return out
+
+
+@router.post("/sessions/bulk/ndjson", response_model=WorkoutSessionOut, status_code=201)
+async def bulk_create_session_ndjson(
+    request: Request,
+    db: DBSession,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    note: Optional[str] = Query(None, max_length=500),
+    user_id: int = TEMP_USER_ID,
+):
+    """Same as /sessions/bulk, but the body is one WorkoutSetCreate JSON object per line."""
+    rows: list[dict] = []
+    lineno = 0
+
+    def parse(line: bytes) -> None:
+        nonlocal lineno
+        lineno += 1
+        if not line.strip():
+            return
+        try:
+            item = WorkoutSetCreate.model_validate_json(line)
+        except ValidationError as exc:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Invalid set on line {lineno}: {exc.errors()[0]['msg']}",
+            )
+        if len(rows) >= MAX_BULK_SETS:
+            raise HTTPException(status_code=422, detail=f"At most {MAX_BULK_SETS} sets per session")
+        rows.append(item.model_dump())
+
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            parse(line)
+    parse(buffer)
+
+    if not rows:
+        raise HTTPException(status_code=422, detail="No sets in request body")
+
+    out = await run_in_threadpool(_ingest_session, db, user_id, note, None, rows, background_tasks)
+    response.headers["Location"] = f"/workouts/sessions/{out.id}"
+    return out
+
+
+SessionListOut = Union[list[WorkoutSessionSummaryOut], list[WorkoutSessionOut]]
+
+
+def _encode_cursor(started_at: datetime, session_id: int) -> str:
+    raw = f"{started_at.isoformat()}|{session_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        started_at, session_id = raw.split("|")
+        return datetime.fromisoformat(started_at), int(session_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _paged(stmt, started_at_col, id_col, limit: int, offset: int, cursor: Optional[str]):
+    """Newest-first page; with a cursor, seek past it on (started_at, id) instead of offsetting."""
+    if cursor:
+        if offset:
+            raise HTTPException(status_code=400, detail="Use either cursor or offset, not both")
+        stmt = stmt.where(tuple_(started_at_col, id_col) < tuple_(*_decode_cursor(cursor)))
+    return stmt.order_by(started_at_col.desc(), id_col.desc()).limit(limit).offset(offset)
+
+
+def _list_sessions_stmt(user_id: int, limit: int, offset: int, cursor: Optional[str] = None):
+    """A user's session headers for one page; the sets come from _session_sets_stmt."""
+    return _paged(
+        select(WorkoutSession.id, WorkoutSession.started_at, WorkoutSession.note)
+        .where(WorkoutSession.user_id == user_id),
+        WorkoutSession.started_at,
+        WorkoutSession.id,
+        limit,
+        offset,
+        cursor,
+    )
+
+
+def _session_sets_stmt(session_ids: list[int]):
+    # Columns in WorkoutSetOut's field order; weight cast so integral values still encode as floats
+    return (
+        select(
+            WorkoutSet.exercise,
+            WorkoutSet.reps,
+            cast(WorkoutSet.weight, Float).label("weight"),
+            WorkoutSet.id,
+            WorkoutSet.session_id,
+        )
+        .where(WorkoutSet.session_id.in_(session_ids))
+        .order_by(WorkoutSet.session_id, WorkoutSet.id)
+    )
+
+
+def _list_session_summaries_stmt(user_id: int, limit: int, offset: int, cursor: Optional[str] = None):
+    """Session headers plus set count and volume, aggregated only over the page's sessions."""
+    page = _list_sessions_stmt(user_id, limit, offset, cursor).subquery()
+
+    return (
+        select(
+            page.c.id,
+            page.c.started_at,
+            page.c.note,
+            func.count(WorkoutSet.id).label("set_count"),
+            cast(func.coalesce(func.sum(WorkoutSet.reps * WorkoutSet.weight), 0.0), Float).label("total_volume"),
+        )
+        .outerjoin(WorkoutSet, WorkoutSet.session_id == page.c.id)
+        .group_by(page.c.id, page.c.started_at, page.c.note)
+        .order_by(page.c.started_at.desc(), page.c.id.desc())
+    )
+
+
+def _sessions_page_stmt(user_id: int, limit: int, offset: int, cursor: Optional[str], include_sets: bool):
+    if include_sets:
+        return _list_sessions_stmt(user_id, limit, offset, cursor)
+    return _list_session_summaries_stmt(user_id, limit, offset, cursor)
+
+
+SESSION_PAGE_TYPES = (JSON, MSGPACK, COLUMNAR_JSON, COLUMNAR_MSGPACK)
+
+
+def _sessions_page_response(
+    sessions: list[dict], sets: Optional[list[dict]], limit: int, media_type: str = JSON
+) -> Response:
+    """Encode a page straight from its rows; the JSON matches SessionListOut field for field.
+
+    The columnar types replace each session's `sets` with one entry per exercise
+    holding parallel id/reps/weight arrays, so exercise names are sent once.
+    """
+    if sets is not None:
+        by_session = group_rows(sets, "session_id")
+        columnar = media_type in (COLUMNAR_JSON, COLUMNAR_MSGPACK)
+        for s in sessions:
+            session_sets = by_session.get(s["id"], [])
+            s["sets"] = columnar_sets(session_sets) if columnar else session_sets
+    headers = {"Vary": "Accept"}
+    if len(sessions) == limit:
+        headers["X-Next-Cursor"] = _encode_cursor(sessions[-1]["started_at"], sessions[-1]["id"])
+    return encoded_response(sessions, media_type, headers)
+
+
+# Documents the compact encodings in OpenAPI; the JSON schema comes from response_model
+SESSION_PAGE_RESPONSES = {200: {"content": {t: {} for t in SESSION_PAGE_TYPES[1:]}}}
+
+
+def _session_stmt(user_id: int, session_id: int):
+    return (
         select(WorkoutSession)
         .options(selectinload(WorkoutSession.sets))
-        .order_by(WorkoutSession.started_at.desc(), WorkoutSession.id.desc())
-        .limit(limit)
-        .offset(offset)
+        .where(WorkoutSession.id == session_id, WorkoutSession.user_id == user_id)
     )
-    return db.execute(stmt).scalars().all()
 
 
-@router.post("/sessions/{session_id}/sets", response_model=WorkoutSetOut, status_code=201)
-def add_set(session_id: int, payload: WorkoutSetCreate, db: DBSession, response: Response):
+@router.get("/sessions", response_model=SessionListOut, responses=SESSION_PAGE_RESPONSES)
+def list_sessions(
+    db: ReadDBSession,
+    request: Request,
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    include_sets: bool = Query(True, description="false returns set counts and volume instead of sets"),
+    user_id: int = TEMP_USER_ID,
+):
+    sessions = row_dicts(db.execute(_sessions_page_stmt(user_id, limit, offset, cursor, include_sets)))
+    sets = None
+    if include_sets:
+        sets = row_dicts(db.execute(_session_sets_stmt([s["id"] for s in sessions]))) if sessions else []
+    return _sessions_page_response(sessions, sets, limit, negotiate(request, SESSION_PAGE_TYPES))
 
-    session = db.get(WorkoutSession, session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
 
-    new_set = WorkoutSet(session_id=session_id, **payload.model_dump())
-    db.add(new_set)
-    db.commit()
-    db.refresh(new_set)
 
-    first_set = (
-        db.query(WorkoutSet)
-        .filter(WorkoutSet.session_id == session_id)
-        .order_by(WorkoutSet.id.asc())
-        .first()
+# FTS5 index maintained by triggers (migrations 0005 and 0011); SQLite only
+workout_search = table(
+    "workout_search",
+    column("rowid", Integer),
+    column("exercises", String),
+    column("rank", Float),
+)
+
+_SEARCH_TERM = re.compile(r"\w+")
+
+
+def _search_terms(q: str) -> list[str]:
+    terms = _SEARCH_TERM.findall(q)
+    if not terms:
+        raise HTTPException(status_code=422, detail="Search query has no searchable words")
+    return terms
+
+
+def _fts_query(user_id: int, terms: list[str]) -> str:
+    """Every term must match, each as a prefix; quoting keeps user input out of FTS5 syntax.
+
+    The owner token (migration 0011) keeps the match inside FTS5 to the
+    user's own rows, instead of matching everyone's and filtering afterwards.
+    """
+    words = " ".join(f'"{t}"*' for t in terms)
+    return f'{{note exercises}}: ({words}) AND owner: "u{user_id}"'
+
+
+def _encode_search_cursor(score: float, session_id: int, floor: int = 0) -> str:
+    raw = f"{score!r}|{session_id}|{floor}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_search_cursor(cursor: str) -> tuple[float, int, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        score, session_id, floor = raw.split("|")
+        return float(score), int(session_id), int(floor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _after_search_cursor(score_col, id_col, score: float, session_id: int):
+    """Keyset condition for (score ASC, id DESC) ordering."""
+    return or_(score_col > score, and_(score_col == score, id_col < session_id))
+
+
+def _search_floor_stmt(user_id: int, terms: list[str], window: int):
+    """Lowest session id among the user's `window` most recent matches (a cheap rowid-order walk)."""
+    return (
+        select(workout_search.c.rowid)
+        .where(literal_column("workout_search").op("MATCH")(_fts_query(user_id, terms)))
+        .order_by(workout_search.c.rowid.desc())
+        .limit(1)
+        .offset(window - 1)
     )
 
-    if first_set and first_set.id == new_set.id:
-        exercise = new_set.exercise
-        weight = new_set.weight
-        reps = new_set.reps
-        user_id = 1  
-
-        existing = (
-            db.query(ExerciseProgress)
-            .filter(
-                ExerciseProgress.user_id == user_id,
-                ExerciseProgress.exercise == exercise,
-            )
-            .first()
+
+def _search_fts_stmt(
+    user_id: int, terms: list[str], limit: int, cursor: Optional[str] = None, floor: int = 0
+):
+    """Best-ranked matches among the user's sessions with id >= floor."""
+    stmt = (
+        select(
+            WorkoutSession.id,
+            WorkoutSession.started_at,
+            WorkoutSession.note,
+            workout_search.c.exercises,
+            workout_search.c.rank.label("score"),
         )
+        .select_from(workout_search)
+        .join(WorkoutSession, WorkoutSession.id == workout_search.c.rowid)
+        .where(
+            literal_column("workout_search").op("MATCH")(_fts_query(user_id, terms)),
+            workout_search.c.rowid >= floor,
+            WorkoutSession.user_id == user_id,
+        )
+    )
+    if cursor:
+        score, session_id, _ = _decode_search_cursor(cursor)
+        stmt = stmt.where(_after_search_cursor(workout_search.c.rank, WorkoutSession.id, score, session_id))
+    return stmt.order_by(workout_search.c.rank, WorkoutSession.id.desc()).limit(limit)
+
+
+def _search_like_stmt(user_id: int, terms: list[str], limit: int, cursor: Optional[str] = None):
+    """Unranked fallback for databases without the FTS index; every match scores 0."""
+    stmt = select(WorkoutSession.id, WorkoutSession.started_at, WorkoutSession.note).where(
+        WorkoutSession.user_id == user_id
+    )
+    for term in terms:
+        pattern = f"{term}%"
+        word = f"% {term}%"
+        stmt = stmt.where(or_(
+            WorkoutSession.note.ilike(pattern),
+            WorkoutSession.note.ilike(word),
+            exists().where(
+                WorkoutSet.session_id == WorkoutSession.id,
+                or_(WorkoutSet.exercise.ilike(pattern), WorkoutSet.exercise.ilike(word)),
+            ),
+        ))
+    if cursor:
+        _, session_id, _ = _decode_search_cursor(cursor)
+        stmt = stmt.where(WorkoutSession.id < session_id)
+    return stmt.order_by(WorkoutSession.id.desc()).limit(limit)
+
+
+@router.get("/search", response_model=list[WorkoutSearchHit])
+def search_sessions(
+    db: ReadDBSession,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200, description="Words to find in notes and exercises"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    user_id: int = TEMP_USER_ID,
+):
+    """The user's sessions whose note or exercises contain every word of `q` (as a prefix), best match first.
 
-        next_weight = weight + 5 if reps >= 12 else None
+    Only the SEARCH_RANK_WINDOW most recent matching sessions are ranked and paged through.
+    """
+    terms = _search_terms(q)
+    floor = 0
 
-        if existing:
-            existing.current_weight = weight
-            existing.best_reps_first_set = reps
-            existing.recommended_next_weight = next_weight
-            existing.updated_at = datetime.utcnow()
+    if db.bind.dialect.name == "sqlite":
+        if cursor:
+            floor = _decode_search_cursor(cursor)[2]
         else:
-            db.add(
-                ExerciseProgress(
-                    user_id=user_id,
-                    exercise=exercise,
-                    current_weight=weight,
-                    best_reps_first_set=reps,
-                    recommended_next_weight=next_weight,
-                )
+            floor = db.scalar(_search_floor_stmt(user_id, terms, config.SEARCH_RANK_WINDOW)) or 0
+        rows = db.execute(_search_fts_stmt(user_id, terms, limit, cursor, floor)).all()
+        hits = [
+            WorkoutSearchHit(
+                id=r.id,
+                started_at=r.started_at,
+                note=r.note,
+                exercises=r.exercises.split(", ") if r.exercises else [],
+                score=r.score,
             )
+            for r in rows
+        ]
+    else:
+        rows = db.execute(_search_like_stmt(user_id, terms, limit, cursor)).all()
+        exercises: dict[int, list[str]] = {r.id: [] for r in rows}
+        if rows:
+            for session_id, exercise in db.execute(
+                select(WorkoutSet.session_id, WorkoutSet.exercise)
+                .where(WorkoutSet.session_id.in_(exercises))
+                .distinct()
+            ):
+                exercises[session_id].append(exercise)
+        hits = [
+            WorkoutSearchHit(id=r.id, started_at=r.started_at, note=r.note, exercises=exercises[r.id], score=0.0)
+            for r in rows
+        ]
+
+    if len(hits) == limit:
+        response.headers["X-Next-Cursor"] = _encode_search_cursor(hits[-1].score, hits[-1].id, floor)
+    return hits
 
-        db.commit()
 
-    response.headers["Location"] = f"/workouts/sessions/{session_id}/sets/{new_set.id}"
-    return new_set
+@router.post("/sessions/{session_id}/sets", response_model=WorkoutSetOut, status_code=201)
+def add_set(
+    session_id: int,
+    payload: WorkoutSetCreate,
+    db: DBSession,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    user_id: int = TEMP_USER_ID,
+):
+    session = _owned_session(db, session_id, user_id)
 
+    new_set = WorkoutSet(session_id=session_id, **payload.model_dump())
+    db.add(new_set)
+    db.flush()
+    out = WorkoutSetOut(id=new_set.id, session_id=session_id, **payload.model_dump())
 
-@router.get("/sessions/{session_id}", response_model=WorkoutSessionOut)
-def get_session(session_id: int, db: DBSession):
-    stmt = (
-        select(WorkoutSession)
-        .options(selectinload(WorkoutSession.sets))
-        .where(WorkoutSession.id == session_id)
+    _record_progress(
+        db, background_tasks, user_id, session_id, [NewSet(out.id, out.exercise, out.weight, out.reps)]
     )
-    session = db.execute(stmt).scalar_one_or_none()
+    rollups.record_sets(db, user_id, session.started_at.date(), [(out.exercise, out.reps, out.weight)])
+    sync.record(db, user_id, "sets", [out.id])
+    versions.bump(db, user_id, "workouts")
+    db.commit()
+
+    response.headers["Location"] = f"/workouts/sessions/{session_id}/sets/{out.id}"
+    return out
+
+
+@router.get("/sessions/{session_id}", response_model=WorkoutSessionOut)
+def get_session(
+    session_id: int, db: ReadDBSession, request: Request, response: Response, user_id: int = TEMP_USER_ID
+):
+    headers, not_modified = versions.conditional(request, db, user_id, "workouts", session_id)
+    if not_modified is not None:
+        return not_modified
+
+    session = db.execute(_session_stmt(user_id, session_id)).scalar_one_or_none()
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
+    response.headers.update(headers)
     return session
 
 
 @router.get("/sessions/{session_id}/sets", response_model=list[WorkoutSetOut])
-def list_sets_for_session(session_id: int, db: DBSession):
-    session = db.get(WorkoutSession, session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-    return session.sets
+def list_sets_for_session(session_id: int, db: ReadDBSession, user_id: int = TEMP_USER_ID):
+    return _owned_session(db, session_id, user_id).sets
 
 @router.put("/sessions/{session_id}", response_model=WorkoutSessionOut)
 def update_session(
     session_id: int,
+    db: DBSession,
     payload: dict = Body(...),
-    db: DBSession = Depends(get_db),
+    user_id: int = TEMP_USER_ID,
 ):
-    session = db.get(WorkoutSession, session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
+    session = _owned_session(db, session_id, user_id)
 
     if "note" in payload:
         session.note = payload["note"]
@@ -138,31 +536,177 @@ def update_session(
     if "name" in payload and hasattr(session, "name"):
         session.name = payload["name"]
 
+    sync.record(db, user_id, "sessions", [session_id])
+    versions.bump(db, user_id, "workouts")
     db.commit()
     db.refresh(session)
     return session
 
 
 @router.delete("/sessions/{session_id}", status_code=204)
-def delete_session(session_id: int, db: DBSession):
-    session = db.get(WorkoutSession, session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
+def delete_session(session_id: int, db: DBSession, user_id: int = TEMP_USER_ID):
+    session = _owned_session(db, session_id, user_id)
 
-    for s in list(session.sets):
+    sets = list(session.sets)
+    rollups.record_sets(
+        db, user_id, session.started_at.date(), [(s.exercise, s.reps, s.weight) for s in sets], sign=-1
+    )
+    for s in sets:
         db.delete(s)
 
     db.delete(session)
+    sync.record(db, user_id, "sets", [s.id for s in sets], deleted=True)
+    sync.record(db, user_id, "sessions", [session_id], deleted=True)
+    versions.bump(db, user_id, "workouts")
     db.commit()
+    # SQLite may hand the id to the next session
+    progression.forget(user_id, session_id)
     return Response(status_code=204)
 
 
 @router.delete("/sets/{set_id}", status_code=204)
-def delete_set(set_id: int, db: DBSession):
+def delete_set(set_id: int, db: DBSession, user_id: int = TEMP_USER_ID):
     the_set = db.get(WorkoutSet, set_id)
-    if not the_set:
+    if not the_set or the_set.session.user_id != user_id:
         raise HTTPException(status_code=404, detail="Set not found")
 
+    rollups.record_sets(
+        db, user_id, the_set.session.started_at.date(),
+        [(the_set.exercise, the_set.reps, the_set.weight)], sign=-1,
+    )
+    session_id = the_set.session_id
     db.delete(the_set)
+    sync.record(db, user_id, "sets", [set_id], deleted=True)
+    versions.bump(db, user_id, "workouts")
     db.commit()
+    # It may have been the session's only set of its exercise
+    progression.forget(user_id, session_id)
     return Response(status_code=204)
+
+
+# Async handlers for the hot routes. main.py mounts this router ahead of `router`
+# when DB_ASYNC is on, so these shadow their sync twins above.
+async_router = APIRouter(prefix="/workouts", tags=["workouts"], include_in_schema=False)
+AsyncDBSession = Annotated[AsyncSession, Depends(get_async_user_db)]
+AsyncReadDBSession = Annotated[AsyncSession, Depends(get_async_user_read_db)]
+
+
+@async_router.post("/sessions", response_model=WorkoutSessionOut, status_code=201)
+async def create_session_async(
+    payload: WorkoutSessionCreate, db: AsyncDBSession, response: Response, user_id: int = TEMP_USER_ID
+):
+    # sets=[] marks the collection as loaded, so serializing it never lazy-loads
+    session = WorkoutSession(user_id=user_id, note=payload.note, sets=[])
+    db.add(session)
+    await db.flush()
+    await db.run_sync(sync.record, user_id, "sessions", [session.id])
+    await versions.bump_async(db, user_id, "workouts")
+    await db.commit()
+    response.headers["Location"] = f"/workouts/sessions/{session.id}"
+    return session
+
+
+@async_router.get("/sessions", response_model=SessionListOut)
+async def list_sessions_async(
+    db: AsyncReadDBSession,
+    request: Request,
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None),
+    include_sets: bool = Query(True),
+    user_id: int = TEMP_USER_ID,
+):
+    sessions = row_dicts(await db.execute(_sessions_page_stmt(user_id, limit, offset, cursor, include_sets)))
+    sets = None
+    if include_sets:
+        sets = row_dicts(await db.execute(_session_sets_stmt([s["id"] for s in sessions]))) if sessions else []
+    return _sessions_page_response(sessions, sets, limit, negotiate(request, SESSION_PAGE_TYPES))
+
+
+@async_router.get("/sessions/{session_id}", response_model=WorkoutSessionOut)
+async def get_session_async(
+    session_id: int, db: AsyncReadDBSession, request: Request, response: Response, user_id: int = TEMP_USER_ID
+):
+    headers, not_modified = await versions.conditional_async(request, db, user_id, "workouts", session_id)
+    if not_modified is not None:
+        return not_modified
+
+    session = (await db.execute(_session_stmt(user_id, session_id))).scalar_one_or_none()
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    response.headers.update(headers)
+    return session
+
+
+@async_router.get("/sessions/{session_id}/sets", response_model=list[WorkoutSetOut])
+async def list_sets_for_session_async(session_id: int, db: AsyncReadDBSession, user_id: int = TEMP_USER_ID):
+    session = (await db.execute(_session_stmt(user_id, session_id))).scalar_one_or_none()
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return session.sets
+
+
+# Write-behind twin of add_set, mounted ahead of the others when WRITE_BEHIND is on (see main.py)
+write_behind_router = APIRouter(prefix="/workouts", tags=["workouts"], include_in_schema=False)
+
+
+def _apply_set_events(db: Session, events: list[Event]) -> None:
+    """Insert a batch of sets, across any number of sessions and users, with one multi-row INSERT."""
+    sessions = {
+        row.id: row for row in db.execute(
+            select(WorkoutSession.id, WorkoutSession.user_id, WorkoutSession.started_at)
+            .where(WorkoutSession.id.in_({e.payload["session_id"] for e in events}))
+        )
+    }
+
+    valid = []
+    for e in events:
+        session = sessions.get(e.payload["session_id"])
+        if session is not None and session.user_id == e.user_id:
+            valid.append(e)
+        else:
+            e.result = HTTPException(status_code=404, detail="Session not found")
+    if not valid:
+        return
+
+    set_ids = db.scalars(
+        insert(WorkoutSet).returning(WorkoutSet.id, sort_by_parameter_order=True),
+        [dict(e.payload) for e in valid],
+    ).all()
+
+    by_user: dict[int, dict[int, list[WorkoutSetOut]]] = {}
+    for set_id, e in zip(set_ids, valid):
+        e.result = WorkoutSetOut(id=set_id, **e.payload)
+        by_user.setdefault(e.user_id, {}).setdefault(e.payload["session_id"], []).append(e.result)
+
+    for user_id, by_session in by_user.items():
+        # Already off the request path, so progress is always recorded in the batch's transaction
+        progression.record_many(db, user_id, {
+            session_id: [NewSet(o.id, o.exercise, o.weight, o.reps) for o in sets]
+            for session_id, sets in by_session.items()
+        })
+        by_day: dict = {}
+        for session_id, sets in by_session.items():
+            by_day.setdefault(sessions[session_id].started_at.date(), []).extend(
+                (o.exercise, o.reps, o.weight) for o in sets
+            )
+        for day, sets in by_day.items():
+            rollups.record_sets(db, user_id, day, sets)
+        sync.record(db, user_id, "sets", [o.id for sets in by_session.values() for o in sets])
+        versions.bump(db, user_id, "workouts")
+
+
+register_handler("set", _apply_set_events)
+
+
+@write_behind_router.post("/sessions/{session_id}/sets", response_model=WorkoutSetOut, status_code=201)
+async def add_set_write_behind(
+    session_id: int,
+    payload: WorkoutSetCreate,
+    response: Response,
+    queue: WriteBehindQueue = Depends(get_write_behind),
+    user_id: int = TEMP_USER_ID,
+):
+    out = await queue.submit("set", {"session_id": session_id, **payload.model_dump()}, user_id=user_id)
+    response.headers["Location"] = f"/workouts/sessions/{session_id}/sets/{out.id}"
+    return out
@@ -0,0 +1,22 @@
+from datetime import date
+from typing import Literal
+
+from pydantic import BaseModel
+
+StatsPeriod = Literal["day", "week"]
+
+class ExerciseStatsOut(BaseModel):
+    exercise: str
+    sets: int
+    reps: int
+    volume: float
+
+class StatsBucketOut(BaseModel):
+    # First day of the bucket: the day itself, or the Monday of the ISO week
+    start: date
+    sets: int
+    reps: int
+    volume: float
+    steps: int
+    task_calories: int
+    exercises: list[ExerciseStatsOut] = []
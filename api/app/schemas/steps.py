@@ -0,0 +1,19 @@
+from datetime import date
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+# "replace" keeps the latest count; "max" never lets a day's count go down,
+# which makes out-of-order or replayed wearable syncs harmless.
+StepsMerge = Literal["replace", "max"]
+
+MAX_STEPS_BATCH = 1000
+
+class StepsEntry(BaseModel):
+    user_id: int
+    day: date
+    steps: int = Field(ge=0)
+
+class StepsBatch(BaseModel):
+    entries: list[StepsEntry] = Field(min_length=1, max_length=MAX_STEPS_BATCH)
+    merge: StepsMerge = "replace"
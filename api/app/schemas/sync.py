@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import Any, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+from .steps import StepsMerge
+
+SyncEntity = Literal["sessions", "sets", "tasks", "steps", "goals", "profile"]
+
+# Upper bound for one POST /sync; a client catching up after a long time offline
+# sends its queue in several batches.
+MAX_SYNC_MUTATIONS = 500
+
+
+class SyncMutationIn(BaseModel):
+    """One queued client write. Sending a key again returns the first outcome instead of re-applying it."""
+    key: str = Field(min_length=1, max_length=64)
+    entity: SyncEntity
+    op: Literal["create", "update", "delete"]
+    id: Optional[int] = None
+    data: dict[str, Any] = Field(default_factory=dict)
+
+
+class SyncStepsIn(BaseModel):
+    """`data` of a steps mutation: one day's count, merged like /steps/update."""
+    day: date
+    steps: int = Field(ge=0)
+    merge: StepsMerge = "replace"
+
+
+class SyncPush(BaseModel):
+    mutations: list[SyncMutationIn] = Field(min_length=1, max_length=MAX_SYNC_MUTATIONS)
+
+
+class SyncMutationResult(BaseModel):
+    key: str
+    status: int
+    body: Any = None
+    # True when the key had been seen before and this is its stored outcome
+    replayed: bool = False
+
+
+class SyncPushOut(BaseModel):
+    results: list[SyncMutationResult]
+
+
+class SyncEntityChanges(BaseModel):
+    upserts: list[dict[str, Any]]
+    deletes: list[int]
+
+
+class SyncPullOut(BaseModel):
+    cursor: str
+    # The changes are a full snapshot: replace the local copy instead of merging
+    reset: bool
+    # More changes follow; request again with this cursor
+    more: bool
+    changes: dict[SyncEntity, SyncEntityChanges]
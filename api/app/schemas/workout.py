@@ -31,10 +31,40 @@ class WorkoutSessionCreate(BaseModel):
     note: Optional[str] = Field(default=None, max_length=500)
 
 
+# Upper bound for one bulk upload; a long session is ~30-60 sets.
+MAX_BULK_SETS = 1000
+
+
+class WorkoutSessionBulkCreate(WorkoutSessionCreate):
+    """A whole session, as uploaded by a client syncing after being offline."""
+    started_at: Optional[datetime] = None
+    sets: list[WorkoutSetCreate] = Field(min_length=1, max_length=MAX_BULK_SETS)
+
+
 class WorkoutSessionOut(BaseModel):
     id: int
     started_at: datetime
     note: Optional[str] = None
     sets: list[WorkoutSetOut] = Field(default_factory=list)
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+
+class WorkoutSessionSummaryOut(BaseModel):
+    """Session header for list views that do not need the sets themselves."""
+    id: int
+    started_at: datetime
+    note: Optional[str] = None
+    set_count: int
+    total_volume: float
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class WorkoutSearchHit(BaseModel):
+    """A session matching a search query; a lower score is a better match."""
+    id: int
+    started_at: datetime
+    note: Optional[str] = None
+    exercises: list[str]
+    score: float
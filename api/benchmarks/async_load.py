@@ -0,0 +1,82 @@
+"""Sync vs async handler throughput on /workouts/sessions and /dashboard/summary.
+
+Each mode runs in a child process because DB_ASYNC is read at import time.
+Requests go through httpx's in-process ASGI transport, so sync handlers pay
+for the threadpool hop exactly as they would under uvicorn.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+
+ROUTES = ["/workouts/sessions", "/dashboard/summary"]
+
+
+async def _drive(concurrency: int, requests: int, seed_sessions: int) -> dict:
+    import httpx
+
+    from app.main import app
+    from .common import Timer, async_temp_database, percentile
+
+    async with async_temp_database():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            sets = [{"exercise": "Squat", "reps": 5, "weight": 225.0}] * 5
+            for _ in range(seed_sessions):
+                (await client.post("/workouts/sessions/bulk", json={"sets": sets})).raise_for_status()
+            (await client.post("/steps/update", params={"user_id": 1, "steps": 4200})).raise_for_status()
+
+            results = {}
+            for route in ROUTES:
+                latencies: list[float] = []
+
+                async def worker(n: int) -> None:
+                    for _ in range(n):
+                        with Timer() as t:
+                            r = await client.get(route)
+                        r.raise_for_status()
+                        latencies.append(t.elapsed)
+
+                per_worker = requests // concurrency
+                with Timer() as total:
+                    await asyncio.gather(*(worker(per_worker) for _ in range(concurrency)))
+                results[route] = {
+                    "rps": len(latencies) / total.elapsed,
+                    "p50_ms": percentile(latencies, 50) * 1000,
+                    "p99_ms": percentile(latencies, 99) * 1000,
+                }
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=2000, help="requests per route")
+    parser.add_argument("--seed-sessions", type=int, default=50)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(_drive(args.concurrency, args.requests, args.seed_sessions))))
+        return
+
+    for mode in ("0", "1"):
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.async_load", "--child",
+             "--concurrency", str(args.concurrency), "--requests", str(args.requests),
+             "--seed-sessions", str(args.seed_sessions)],
+            env={**os.environ, "DB_ASYNC": mode},
+            capture_output=True, text=True, check=True,
+        )
+        results = json.loads(out.stdout.strip().splitlines()[-1])
+        print(f"DB_ASYNC={mode}")
+        for route, r in results.items():
+            print(f"  {route:<22} {r['rps']:8.1f} req/s  p50 {r['p50_ms']:7.2f} ms  p99 {r['p99_ms']:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Compare per-set ingestion (one POST per set) with /workouts/sessions/bulk."""
+from __future__ import annotations
+
+import argparse
+import json
+
+from .common import Timer, temp_client
+
+EXERCISES = ["Bench Press", "Squat", "Deadlift", "Row", "Overhead Press"]
+
+
+def make_sets(n: int) -> list[dict]:
+    return [
+        {"exercise": EXERCISES[i % len(EXERCISES)], "reps": 8 + i % 5, "weight": 100.0 + i}
+        for i in range(n)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--sets", type=int, default=30, help="sets per session")
+    args = parser.parse_args()
+
+    sets = make_sets(args.sets)
+
+    with temp_client() as client:
+        with Timer() as per_set:
+            for _ in range(args.sessions):
+                sid = client.post("/workouts/sessions", json={"note": "per-set"}).json()["id"]
+                for s in sets:
+                    client.post(f"/workouts/sessions/{sid}/sets", json=s).raise_for_status()
+
+        with Timer() as bulk:
+            for _ in range(args.sessions):
+                client.post(
+                    "/workouts/sessions/bulk", json={"note": "bulk", "sets": sets}
+                ).raise_for_status()
+
+        body = "\n".join(json.dumps(s) for s in sets)
+        with Timer() as ndjson:
+            for _ in range(args.sessions):
+                client.post(
+                    "/workouts/sessions/bulk/ndjson",
+                    content=body,
+                    headers={"Content-Type": "application/x-ndjson"},
+                ).raise_for_status()
+
+    print(f"{args.sessions} sessions x {args.sets} sets")
+    for name, t in (("per-set", per_set), ("bulk", bulk), ("bulk/ndjson", ndjson)):
+        print(f"  {name:<12} {t.elapsed:8.3f}s  {args.sessions / t.elapsed:8.1f} sessions/s")
+
+
+if __name__ == "__main__":
+    main()
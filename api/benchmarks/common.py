@@ -0,0 +1,130 @@
+"""Shared helpers for the benchmark scripts.
+
+Run benchmarks from the ``api/`` directory, e.g.::
+
+    python -m benchmarks.bulk_ingest
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator
+
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.core import config
+from app.core.database import (
+    create_async_db_engine,
+    create_db_engine,
+    get_async_user_db,
+    get_async_user_read_db,
+    get_directory_db,
+    get_user_db,
+    get_user_read_db,
+)
+from app.core.migrations import run_migrations
+from app.core.write_behind import WriteBehindQueue, get_write_behind
+from app.models.user import User
+
+
+def _sync_dependency(factory):
+    def _get_db():
+        db = factory()
+        try:
+            yield db
+        finally:
+            db.close()
+    return _get_db
+
+
+def _async_dependency(factory):
+    async def _get_db():
+        async with factory() as db:
+            yield db
+    return _get_db
+
+
+@contextmanager
+def temp_database() -> Iterator[str]:
+    """Point every DB dependency of the app at a throwaway SQLite file seeded with user 1."""
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        engine = create_db_engine(url)
+        read_engine = create_db_engine(url, read_only=True)
+
+        run_migrations(engine)
+        SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+        ReadSessionLocal = sessionmaker(bind=read_engine, autoflush=False, autocommit=False)
+
+        with SessionLocal() as db:
+            db.add(User(id=1, username="bench", email="bench@example.com", password_hash="x"))
+            db.commit()
+
+        for dep in (get_user_db, get_directory_db):
+            app.dependency_overrides[dep] = _sync_dependency(SessionLocal)
+        app.dependency_overrides[get_user_read_db] = _sync_dependency(ReadSessionLocal)
+
+        try:
+            yield url
+        finally:
+            app.dependency_overrides.clear()
+            engine.dispose()
+            read_engine.dispose()
+
+
+@asynccontextmanager
+async def async_temp_database() -> AsyncIterator[str]:
+    """temp_database(), plus the async dependencies and the write-behind queue when enabled."""
+    with temp_database() as url:
+        engines = []
+        if config.DB_ASYNC:
+            engines = [create_async_db_engine(url), create_async_db_engine(url, read_only=True)]
+            for dep, eng in zip((get_async_user_db, get_async_user_read_db), engines):
+                factory = async_sessionmaker(bind=eng, autoflush=False, expire_on_commit=False)
+                app.dependency_overrides[dep] = _async_dependency(factory)
+
+        queue = write_engine = None
+        if config.WRITE_BEHIND:
+            write_engine = create_db_engine(url)
+            write_factory = sessionmaker(bind=write_engine, autoflush=False, autocommit=False)
+            queue = WriteBehindQueue(lambda user_id: write_factory())
+            app.dependency_overrides[get_write_behind] = lambda: queue
+        try:
+            yield url
+        finally:
+            if queue is not None:
+                await queue.stop()
+                write_engine.dispose()
+            # aiosqlite connections own a worker thread; dispose them on this loop
+            for eng in engines:
+                await eng.dispose()
+
+
+@contextmanager
+def temp_client() -> Iterator[TestClient]:
+    """A TestClient bound to a throwaway SQLite file seeded with user 1."""
+    with temp_database():
+        yield TestClient(app)
+
+
+class Timer:
+    def __enter__(self) -> "Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.elapsed = time.perf_counter() - self.start
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile of ``samples`` (pct in 0-100)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    k = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[k]
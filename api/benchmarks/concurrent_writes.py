@@ -0,0 +1,66 @@
+"""Concurrent writers and readers against one SQLite file.
+
+The engine profile comes from core/config.py, so compare profiles with env vars::
+
+    SQLITE_JOURNAL_MODE=DELETE SQLITE_BEGIN_MODE=DEFERRED python -m benchmarks.concurrent_writes
+    python -m benchmarks.concurrent_writes
+"""
+from __future__ import annotations
+
+import argparse
+import threading
+
+from fastapi.testclient import TestClient
+
+from app.core import config
+from .common import Timer, percentile, temp_client
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="requests per thread")
+    args = parser.parse_args()
+
+    latencies: list[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def worker(write: bool) -> None:
+        nonlocal errors
+        client = TestClient(app_client.app, raise_server_exceptions=False)
+        local: list[float] = []
+        failed = 0
+        for i in range(args.requests):
+            with Timer() as t:
+                if write:
+                    r = client.post("/steps/update", params={"user_id": 1, "steps": i})
+                else:
+                    r = client.get("/dashboard/summary")
+            local.append(t.elapsed)
+            failed += r.status_code >= 500
+        with lock:
+            latencies.extend(local)
+            errors += failed
+
+    with temp_client() as app_client:
+        threads = [threading.Thread(target=worker, args=(True,)) for _ in range(args.writers)]
+        threads += [threading.Thread(target=worker, args=(False,)) for _ in range(args.readers)]
+        with Timer() as total:
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+    print(
+        f"journal_mode={config.SQLITE_JOURNAL_MODE} synchronous={config.SQLITE_SYNCHRONOUS} "
+        f"begin={config.SQLITE_BEGIN_MODE}"
+    )
+    print(f"  {len(latencies) / total.elapsed:8.1f} req/s  errors={errors}")
+    for pct in (50, 95, 99):
+        print(f"  p{pct}: {percentile(latencies, pct) * 1000:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Check that every hot per-user query is served by an index, not a table scan.
+
+Runs EXPLAIN QUERY PLAN on a freshly migrated SQLite file and exits non-zero
+if any plan contains a full SCAN of a table::
+
+    python -m benchmarks.explain_indexes
+"""
+from __future__ import annotations
+
+import sys
+from datetime import date, datetime
+
+from sqlalchemy import select
+
+from app.models.progression import ExerciseProgress
+from app.models.steps import DailySteps
+from app.routers.dashboard import _steps_today_stmt
+from app.routers.export import _export_stmt
+from app.routers.stats import _exercise_range_stmt, _stats_range_stmt
+from app.routers.goals import _goals_stmt
+from app.routers.tasks import _today_tasks_stmt
+from app.routers.workouts import _encode_cursor, _list_session_summaries_stmt, _list_sessions_stmt, _session_sets_stmt
+from app.core.database import create_db_engine
+from app.core.sharding import _placement_stmt
+from app.core.sync import _changes_stmt, _reset_seq_stmt
+from app.core.versions import _version_stmt
+from .common import temp_database
+
+TODAY = date(2026, 1, 1)
+CURSOR = _encode_cursor(datetime(2026, 1, 1), 100)
+
+HOT_QUERIES = {
+    "dashboard steps today": _steps_today_stmt(1, TODAY),
+    "resource version (ETag)": _version_stmt(1, "tasks"),
+    "shard placement": _placement_stmt(1),
+    "steps by user/day": select(DailySteps).where(DailySteps.user_id == 1, DailySteps.day == TODAY),
+    "tasks today": _today_tasks_stmt(1, TODAY),
+    "goals by user": _goals_stmt(1),
+    "progression overview": select(ExerciseProgress).where(ExerciseProgress.user_id == 1),
+    "progression by exercise": select(ExerciseProgress).where(
+        ExerciseProgress.user_id == 1, ExerciseProgress.exercise == "Squat"
+    ),
+    "sessions page (first)": _list_sessions_stmt(1, 50, 0),
+    "sessions page (cursor)": _list_sessions_stmt(1, 50, 0, CURSOR),
+    "sets for a sessions page": _session_sets_stmt(list(range(1, 51))),
+    "session summaries (cursor)": _list_session_summaries_stmt(1, 50, 0, CURSOR),
+    "workout export": _export_stmt(1),
+    "sync changes since cursor": _changes_stmt(1, 100, 1001),
+    "sync reset marker": _reset_seq_stmt(1),
+    "stats range": _stats_range_stmt(1, "day", date(2025, 1, 1), TODAY),
+    "exercise stats range": _exercise_range_stmt(1, "week", date(2025, 1, 1), TODAY),
+}
+
+
+def query_plan(conn, stmt) -> list[str]:
+    # render_postcompile expands IN (...) lists into one placeholder per value
+    compiled = stmt.compile(conn, compile_kwargs={"render_postcompile": True})
+    params = tuple(compiled.params[k] for k in compiled.positiontup)
+    rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+    return [r[-1] for r in rows]
+
+
+def main() -> int:
+    failures = 0
+    with temp_database() as url:
+        engine = create_db_engine(url)
+        with engine.connect() as conn:
+            for name, stmt in HOT_QUERIES.items():
+                plan = query_plan(conn, stmt)
+                # Scanning a subquery/CTE we built ourselves is fine; scanning a table is not
+                scans = [p for p in plan if p.startswith("SCAN ") and "anon_" not in p]
+                status = "FAIL" if scans else "ok"
+                failures += bool(scans)
+                print(f"[{status}] {name}: {'; '.join(plan)}")
+        engine.dispose()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
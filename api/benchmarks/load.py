@@ -0,0 +1,228 @@
+"""Load scenarios for the hot routes, with JSON baselines that catch regressions.
+
+Seeds a throwaway SQLite database (see benchmarks.seed), then drives each
+scenario through httpx's in-process ASGI transport at a fixed concurrency and
+reports throughput and p50/p95/p99 latency (median of --repeat runs)::
+
+    python -m benchmarks.load
+    python -m benchmarks.load --out report.json
+    python -m benchmarks.load --save-baseline benchmarks/baselines/sqlite.json
+    python -m benchmarks.load --check benchmarks/baselines/sqlite.json
+
+--check exits non-zero when any scenario's p95 rises, or its throughput
+falls, by more than --tolerance against the baseline, or when a request
+fails. Baselines are only comparable on the machine that recorded them.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+from dataclasses import dataclass
+from datetime import date
+from typing import Callable
+
+SCENARIOS: dict[str, Callable[[random.Random, "SeedInfo"], tuple[str, str, dict]]] = {
+    "dashboard_summary": lambda rng, s: ("GET", "/dashboard/summary", {"params": {"user_id": s.user(rng)}}),
+    "list_sessions": lambda rng, s: (
+        "GET", "/workouts/sessions", {"params": {"user_id": s.user(rng), "limit": 20}}
+    ),
+    "add_set": lambda rng, s: _add_set(rng, s),
+    "steps_update": lambda rng, s: (
+        "POST", "/steps/update", {"params": {"user_id": s.user(rng), "steps": rng.randint(0, 20000)}}
+    ),
+    "tasks_today": lambda rng, s: ("GET", "/tasks/today", {"params": {"user_id": s.user(rng)}}),
+    "tasks_today_poll": lambda rng, s: _poll_tasks(rng, s),
+}
+
+
+def _add_set(rng: random.Random, seed: "SeedInfo") -> tuple[str, str, dict]:
+    user_id = seed.user(rng)
+    return (
+        "POST",
+        f"/workouts/sessions/{seed.session(rng, user_id)}/sets",
+        {"params": {"user_id": user_id},
+         "json": {"exercise": rng.choice(["Back Squat", "Bench Press", "Deadlift"]),
+                  "reps": rng.randint(3, 12), "weight": float(rng.randrange(45, 315, 5))}},
+    )
+
+
+def _poll_tasks(rng: random.Random, seed: "SeedInfo") -> tuple[str, str, dict]:
+    """A polling client replaying the ETag of its last response; seeded users' tasks are at version 0."""
+    from app.core.versions import etag
+
+    user_id = seed.user(rng)
+    headers = {"If-None-Match": etag("tasks", user_id, 0, date.today())}
+    return "GET", "/tasks/today", {"params": {"user_id": user_id}, "headers": headers}
+
+
+@dataclass
+class SeedInfo:
+    first_user: int
+    users: int
+    first_session: int
+    sessions_per_user: int
+
+    def user(self, rng: random.Random) -> int:
+        return self.first_user + rng.randrange(self.users)
+
+    def session(self, rng: random.Random, user_id: int) -> int:
+        # seed() gives each user a consecutive run of session ids, in user order
+        first = self.first_session + (user_id - self.first_user) * self.sessions_per_user
+        return first + rng.randrange(self.sessions_per_user)
+
+
+async def run_scenario(client, name: str, seed: SeedInfo, requests: int, concurrency: int, warmup: int) -> dict:
+    from .common import Timer, percentile
+
+    make_request = SCENARIOS[name]
+    latencies: list[float] = []
+    errors = 0
+
+    async def worker(n: int, rng: random.Random, record: bool) -> None:
+        nonlocal errors
+        for _ in range(n):
+            method, url, kwargs = make_request(rng, seed)
+            with Timer() as t:
+                r = await client.request(method, url, **kwargs)
+            if record:
+                latencies.append(t.elapsed)
+                errors += r.status_code >= 400
+
+    await worker(warmup, random.Random(-1), record=False)
+    per_worker = max(1, requests // concurrency)
+    with Timer() as total:
+        await asyncio.gather(*(worker(per_worker, random.Random(i), True) for i in range(concurrency)))
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / total.elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+async def run(args) -> dict:
+    import httpx
+
+    from app.main import app
+    from app.core import config
+    from app.core.database import create_db_engine
+    from .common import async_temp_database
+    from .seed import seed
+
+    async with async_temp_database() as url:
+        engine = create_db_engine(url)
+        seed(engine, args.users, args.sessions, args.sets, args.days)
+        engine.dispose()
+        # temp_database() already holds user 1 and no sessions
+        seed_info = SeedInfo(first_user=2, users=args.users, first_session=1, sessions_per_user=args.sessions)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            scenarios = {}
+            for name in args.scenario or SCENARIOS:
+                runs = [
+                    await run_scenario(client, name, seed_info, args.requests, args.concurrency, args.warmup)
+                    for _ in range(args.repeat)
+                ]
+                # Median of each metric across runs; write tails under lock contention are noisy
+                scenarios[name] = {
+                    key: (sum if key in ("requests", "errors") else statistics.median)(r[key] for r in runs)
+                    for key in runs[0]
+                }
+
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "machine": platform.machine(),
+            "db_async": config.DB_ASYNC,
+        },
+        "params": {
+            "users": args.users, "sessions_per_user": args.sessions, "sets_per_session": args.sets,
+            "days": args.days, "requests": args.requests, "concurrency": args.concurrency,
+            "repeat": args.repeat,
+        },
+        "scenarios": scenarios,
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Regressions of `report` against `baseline`, as human-readable lines."""
+    problems = []
+    for name, base in baseline["scenarios"].items():
+        cur = report["scenarios"].get(name)
+        if cur is None:
+            continue
+        if cur["errors"]:
+            problems.append(f"{name}: {cur['errors']} failed requests")
+        if cur["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            problems.append(f"{name}: p95 {cur['p95_ms']:.2f} ms vs baseline {base['p95_ms']:.2f} ms")
+        if cur["rps"] < base["rps"] * (1 - tolerance):
+            problems.append(f"{name}: {cur['rps']:.1f} req/s vs baseline {base['rps']:.1f} req/s")
+    return problems
+
+
+def print_report(report: dict, baseline: dict | None = None) -> None:
+    print(f"{'scenario':<20} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name, r in report["scenarios"].items():
+        line = (f"{name:<20} {r['rps']:9.1f} {r['p50_ms']:9.2f} {r['p95_ms']:9.2f} "
+                f"{r['p99_ms']:9.2f} {r['errors']:7d}")
+        base = (baseline or {}).get("scenarios", {}).get(name)
+        if base:
+            line += f"   p95 {(r['p95_ms'] / base['p95_ms'] - 1) * 100:+6.1f}%  rps {(r['rps'] / base['rps'] - 1) * 100:+6.1f}%"
+        print(line)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load scenarios for the hot API routes")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--sessions", type=int, default=20, help="workout sessions per user")
+    parser.add_argument("--sets", type=int, default=12, help="sets per session")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--requests", type=int, default=2000, help="measured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per scenario; the median is reported")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS), help="run only these")
+    parser.add_argument("--out", help="write the report as JSON")
+    parser.add_argument("--save-baseline", metavar="PATH", help="write the report as the new baseline")
+    parser.add_argument("--check", metavar="PATH", help="fail on regressions against this baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+
+    baseline = None
+    if args.check:
+        with open(args.check) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    for path in (args.out, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
+                f.write("\n")
+
+    if baseline is not None:
+        problems = compare(report, baseline, args.tolerance)
+        if problems:
+            print("\nREGRESSIONS:")
+            for p in problems:
+                print(f"  {p}")
+            return 1
+        print(f"\nNo regressions beyond {args.tolerance:.0%} of {args.check}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
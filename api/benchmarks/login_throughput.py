@@ -0,0 +1,60 @@
+"""Login throughput, and whether logins starve an unrelated route while they run.
+
+Compare hash costs with env vars, e.g.::
+
+    PASSWORD_HASH_ROUNDS=29000 python -m benchmarks.login_throughput
+    PASSWORD_HASH_ROUNDS=10000 python -m benchmarks.login_throughput
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+
+import httpx
+
+from app.core import config
+from app.main import app
+from .common import Timer, async_temp_database, percentile
+
+
+async def _run(logins: int, concurrency: int) -> None:
+    async with async_temp_database():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            creds = {"email": "login@example.com", "password": "hunter22"}
+            (await client.post("/auth/register", json={"username": "login", **creds})).raise_for_status()
+
+            health: list[float] = []
+            done = asyncio.Event()
+
+            async def login_worker(n: int) -> None:
+                for _ in range(n):
+                    (await client.post("/auth/login", json=creds)).raise_for_status()
+
+            async def health_probe() -> None:
+                while not done.is_set():
+                    with Timer() as t:
+                        await client.get("/meta/info")
+                    health.append(t.elapsed)
+
+            probe = asyncio.create_task(health_probe())
+            with Timer() as total:
+                await asyncio.gather(*(login_worker(logins // concurrency) for _ in range(concurrency)))
+            done.set()
+            await probe
+
+    print(f"PASSWORD_HASH_ROUNDS={config.PASSWORD_HASH_ROUNDS} workers={config.PASSWORD_HASH_WORKERS}")
+    print(f"  logins      {logins / total.elapsed:8.1f} /s")
+    print(f"  /meta/info  p50 {percentile(health, 50) * 1000:6.2f} ms  p99 {percentile(health, 99) * 1000:6.2f} ms while logging in")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+    asyncio.run(_run(args.logins, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
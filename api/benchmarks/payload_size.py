@@ -0,0 +1,88 @@
+"""Wire size and client decode time of a /workouts/sessions page, per encoding.
+
+Fetches one page (sets included) with every Accept x Accept-Encoding pair and
+reports the bytes sent, the server time, the time a client needs to
+decompress and parse the body, and the download time on a slow link::
+
+    python -m benchmarks.payload_size
+    python -m benchmarks.payload_size --page 50 --link-kbps 400
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import zlib
+
+import orjson
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.core.compression import CODECS
+from app.core.responses import COLUMNAR_JSON, COLUMNAR_MSGPACK, JSON, MSGPACK
+from .common import Timer, percentile, temp_database
+from .read_path import seed
+
+
+def _decompressors() -> dict:
+    out = {"identity": lambda b: b, "gzip": lambda b: zlib.decompress(b, 31)}
+    if "zstd" in CODECS:
+        import zstandard
+
+        # Streamed frames don't record their size, so use the streaming decoder
+        out["zstd"] = lambda b: zstandard.ZstdDecompressor().decompressobj().decompress(b)
+    if "br" in CODECS:
+        import brotli
+
+        out["br"] = brotli.decompress
+    return out
+
+
+def _parser(media_type: str):
+    if media_type.endswith("msgpack"):
+        import msgpack
+
+        return msgpack.unpackb
+    return orjson.loads
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--sets-per-session", type=int, default=12)
+    parser.add_argument("--page", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--link-kbps", type=float, default=1000, help="slow mobile link for the download column")
+    args = parser.parse_args()
+
+    decompress = _decompressors()
+    with temp_database() as url:
+        seed(url, args.sessions, args.sets_per_session)
+        client = TestClient(app)
+        params = {"limit": args.page}
+        reference = client.get("/workouts/sessions", params=params).json()
+
+        print(f"{'accept':<40} {'coding':<9} {'bytes':>9} {'server':>9} {'decode':>9} {'download':>10}")
+        for media_type in (JSON, MSGPACK, COLUMNAR_JSON, COLUMNAR_MSGPACK):
+            parse = _parser(media_type)
+            for coding, unpack in decompress.items():
+                headers = {"Accept": media_type, "Accept-Encoding": coding}
+                server, decode = [], []
+                for _ in range(args.repeat):
+                    with Timer() as t:
+                        with client.stream("GET", "/workouts/sessions", params=params, headers=headers) as r:
+                            raw = b"".join(r.iter_raw())
+                    server.append(t.elapsed)
+                    with Timer() as t:
+                        body = parse(unpack(raw))
+                    decode.append(t.elapsed)
+
+                sent = r.headers.get("content-encoding", "identity")
+                if media_type in (JSON, MSGPACK) and json.loads(orjson.dumps(body)) != reference:
+                    raise SystemExit(f"{media_type} body differs from the JSON page")
+                download = len(raw) * 8 / (args.link_kbps * 1000)
+                print(f"{media_type:<40} {sent:<9} {len(raw):9,d} {percentile(server, 50) * 1000:7.2f}ms "
+                      f"{percentile(decode, 50) * 1000:7.2f}ms {download * 1000:8.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Per-row cost of the read path: ORM + response_model vs Core rows + orjson.
+
+The "orm" path is what GET /workouts/sessions used to do: load WorkoutSession
+objects with their sets, validate them into the response_model, dump that to
+JSON-able Python and encode it with json.dumps. The "core" path is what it
+does now (see app.core.responses). Both must produce the same JSON::
+
+    python -m benchmarks.read_path
+    python -m benchmarks.read_path --sessions 2000 --page 200
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+from datetime import datetime, timedelta
+
+from pydantic import TypeAdapter
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session, selectinload
+from starlette.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
+
+from app.core.database import create_db_engine
+from app.core.responses import group_rows, row_dicts
+from app.models.workout import WorkoutSession, WorkoutSet
+from app.routers.workouts import _list_session_summaries_stmt, _list_sessions_stmt, _session_sets_stmt
+from app.schemas.workout import WorkoutSessionOut, WorkoutSessionSummaryOut
+from .common import Timer, percentile, temp_database
+
+EXERCISES = ["Back Squat", "Bench Press", "Deadlift", "Overhead Press", "Barbell Row", "Pull Up"]
+
+SESSIONS_ADAPTER = TypeAdapter(list[WorkoutSessionOut])
+SUMMARIES_ADAPTER = TypeAdapter(list[WorkoutSessionSummaryOut])
+
+
+def seed(url: str, sessions: int, sets_per_session: int) -> None:
+    rng = random.Random(0)
+    engine = create_db_engine(url)
+    start = datetime(2025, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(WorkoutSession), [
+            {"id": i, "user_id": 1, "started_at": start + timedelta(hours=8 * i, microseconds=rng.randrange(10**6)),
+             "note": rng.choice([None, "push day", "leg day", "hotel gym"])}
+            for i in range(1, sessions + 1)
+        ])
+        conn.execute(insert(WorkoutSet), [
+            # Whole-number weights exercise the int -> float coercion both paths must agree on
+            {"session_id": i, "exercise": rng.choice(EXERCISES), "reps": rng.randint(3, 12),
+             "weight": rng.choice([rng.randrange(45, 315, 5), rng.randrange(45, 315) + 0.5])}
+            for i in range(1, sessions + 1)
+            for _ in range(sets_per_session)
+        ])
+    engine.dispose()
+
+
+def _render(response_class, content) -> bytes:
+    return response_class(content).body
+
+
+def orm_sessions(db: Session, page: int) -> bytes:
+    stmt = (
+        select(WorkoutSession)
+        .options(selectinload(WorkoutSession.sets))
+        .where(WorkoutSession.user_id == 1)
+        .order_by(WorkoutSession.started_at.desc(), WorkoutSession.id.desc())
+        .limit(page)
+    )
+    sessions = db.execute(stmt).scalars().all()
+    return _render(JSONResponse, SESSIONS_ADAPTER.dump_python(
+        SESSIONS_ADAPTER.validate_python(sessions, from_attributes=True), mode="json"
+    ))
+
+
+def core_sessions(db: Session, page: int) -> bytes:
+    sessions = row_dicts(db.execute(_list_sessions_stmt(1, page, 0)))
+    by_session = group_rows(row_dicts(db.execute(_session_sets_stmt([s["id"] for s in sessions]))), "session_id")
+    for s in sessions:
+        s["sets"] = by_session.get(s["id"], [])
+    return _render(ORJSONResponse, sessions)
+
+
+def orm_summaries(db: Session, page: int) -> bytes:
+    rows = db.execute(_list_session_summaries_stmt(1, page, 0)).all()
+    return _render(JSONResponse, SUMMARIES_ADAPTER.dump_python(
+        SUMMARIES_ADAPTER.validate_python(rows, from_attributes=True), mode="json"
+    ))
+
+
+def core_summaries(db: Session, page: int) -> bytes:
+    return _render(ORJSONResponse, row_dicts(db.execute(_list_session_summaries_stmt(1, page, 0))))
+
+
+CASES = {
+    "sessions + sets": (orm_sessions, core_sessions),
+    "session summaries": (orm_summaries, core_summaries),
+}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--sets-per-session", type=int, default=12)
+    parser.add_argument("--page", type=int, default=200, help="sessions per response (the route allows 200)")
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    failures = 0
+    with temp_database() as url:
+        seed(url, args.sessions, args.sets_per_session)
+        engine = create_db_engine(url, read_only=True)
+        print(f"{'case':<18} {'rows':>6} {'orm p50':>10} {'core p50':>10} {'orm/row':>9} {'core/row':>9} {'speedup':>8}")
+        with Session(engine) as db:
+            for name, (orm, core) in CASES.items():
+                orm_body, core_body = orm(db, args.page), core(db, args.page)
+                # orjson writes 1e-7 where json.dumps writes 1e-07; compare values, in key order
+                same = json.loads(orm_body, object_pairs_hook=list) == json.loads(core_body, object_pairs_hook=list)
+                data = json.loads(core_body)
+                rows = len(data) + sum(len(s.get("sets", ())) for s in data)
+
+                timings = {}
+                for label, fn in (("orm", orm), ("core", core)):
+                    samples = []
+                    for _ in range(args.repeat):
+                        db.expunge_all()  # no identity-map reuse between runs
+                        with Timer() as t:
+                            fn(db, args.page)
+                        samples.append(t.elapsed)
+                    timings[label] = percentile(samples, 50)
+
+                o, c = timings["orm"], timings["core"]
+                print(f"{name:<18} {rows:6d} {o * 1000:8.2f}ms {c * 1000:8.2f}ms "
+                      f"{o / rows * 1e6:7.2f}us {c / rows * 1e6:7.2f}us {o / c:7.1f}x"
+                      + ("" if same else "   JSON DIFFERS"))
+                failures += not same
+        engine.dispose()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,45 @@
+"""Nightly recommendations for a whole user base: scalar loop vs the NumPy batch API."""
+from __future__ import annotations
+
+import argparse
+
+import numpy as np
+
+from app.core.recommendations import build_recommendation, build_recommendations_batch, get_recommended_tasks
+from .common import Timer
+
+GOALS = np.array(["build_muscle", "weight_loss", "be_healthier", None], dtype=object)
+LEVELS = np.array(["1-3", "3-5", "5-7", None], dtype=object)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--scalar-sample", type=int, default=100_000,
+                        help="users run through the scalar path; its time is scaled up to --users")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    weight = rng.uniform(90, 350, args.users)
+    height = rng.uniform(55, 80, args.users)
+    goal = GOALS[rng.integers(0, len(GOALS), args.users)]
+    level = LEVELS[rng.integers(0, len(LEVELS), args.users)]
+
+    n = min(args.scalar_sample, args.users)
+    w, h, g, lv = weight[:n].tolist(), height[:n].tolist(), goal[:n].tolist(), level[:n].tolist()
+    with Timer() as scalar:
+        for i in range(n):
+            build_recommendation(w[i], h[i])
+            sum(t["calories"] for t in get_recommended_tasks(g[i], lv[i]))
+    scalar_total = scalar.elapsed * args.users / n
+
+    with Timer() as batch:
+        build_recommendations_batch(weight, height, goal, level)
+
+    print(f"{args.users:,} users")
+    print(f"  scalar  {scalar_total:8.3f}s  (extrapolated from {n:,})")
+    print(f"  batch   {batch.elapsed:8.3f}s  ({scalar_total / batch.elapsed:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Workout search latency: the FTS5 index vs the LIKE fallback.
+
+Seeds a throwaway database through the normal tables (so the sync triggers
+do the indexing), then times /workouts/search queries::
+
+    python -m benchmarks.search --sessions 200000
+"""
+from __future__ import annotations
+
+import argparse
+import random
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+from app.main import app
+from app.core.database import create_db_engine
+from app.models.workout import WorkoutSession, WorkoutSet
+from app.core import config
+from app.routers.workouts import _search_floor_stmt, _search_fts_stmt, _search_like_stmt
+from .common import Timer, percentile, temp_database
+
+EXERCISES = [
+    "Back Squat", "Front Squat", "Bench Press", "Incline Bench Press", "Overhead Press", "Deadlift",
+    "Romanian Deadlift", "Barbell Row", "Pull Up", "Chin Up", "Dip", "Leg Press", "Lunge", "Hip Thrust",
+    "Lat Pulldown", "Bicep Curl", "Tricep Extension", "Lateral Raise", "Calf Raise", "Plank",
+]
+NOTE_WORDS = ["morning", "evening", "heavy", "light", "deload", "push", "pull", "legs", "gym", "home",
+              "tired", "great", "pr", "travel", "hotel", "quick", "long", "recovery", "tempo", "volume"]
+
+QUERIES = ["squat", "bench press", "dead", "hotel deload", "curl morning", "pr"]
+
+
+def seed(url: str, sessions: int, sets_per_session: int) -> None:
+    rng = random.Random(0)
+    engine = create_db_engine(url)
+    start = datetime(2020, 1, 1)
+    batch = 5000
+    with engine.begin() as conn:
+        for first in range(1, sessions + 1, batch):
+            ids = range(first, min(first + batch, sessions + 1))
+            conn.execute(insert(WorkoutSession), [
+                {"id": i, "user_id": 1, "started_at": start + timedelta(hours=8 * i),
+                 "note": " ".join(rng.sample(NOTE_WORDS, rng.randint(0, 3))) or None}
+                for i in ids
+            ])
+            conn.execute(insert(WorkoutSet), [
+                {"session_id": i, "exercise": exercise, "reps": rng.randint(3, 12), "weight": 100.0}
+                for i in ids
+                for exercise in rng.sample(EXERCISES, 4)
+                for _ in range(sets_per_session // 4)
+            ])
+    engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=200_000)
+    parser.add_argument("--sets-per-session", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--like-repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with temp_database() as url:
+        with Timer() as t:
+            seed(url, args.sessions, args.sets_per_session)
+        print(f"seeded {args.sessions:,} sessions x {args.sets_per_session} sets in {t.elapsed:.1f}s")
+
+        engine = create_db_engine(url, read_only=True)
+        print(f"\n{'query':<16} {'fts p50':>10} {'fts p95':>10} {'like p50':>10}  (LIKE is unranked)")
+        with engine.connect() as conn:
+            for q in QUERIES:
+                terms = q.split()
+                fts, like = [], []
+                for _ in range(args.repeat):
+                    with Timer() as t:
+                        floor = conn.scalar(_search_floor_stmt(1, terms, config.SEARCH_RANK_WINDOW)) or 0
+                        conn.execute(_search_fts_stmt(1, terms, 20, floor=floor)).all()
+                    fts.append(t.elapsed)
+                for _ in range(args.like_repeat):
+                    with Timer() as t:
+                        conn.execute(_search_like_stmt(1, terms, 20)).all()
+                    like.append(t.elapsed)
+                print(f"{q:<16} {percentile(fts, 50) * 1000:8.2f}ms {percentile(fts, 95) * 1000:8.2f}ms "
+                      f"{percentile(like, 50) * 1000:8.1f}ms")
+        engine.dispose()
+
+        # End to end through the API, first page and the page after it
+        client = TestClient(app)
+        first, second = [], []
+        for _ in range(args.repeat):
+            with Timer() as t:
+                r = client.get("/workouts/search", params={"q": "squat", "limit": 20})
+            first.append(t.elapsed)
+            with Timer() as t:
+                client.get("/workouts/search",
+                           params={"q": "squat", "limit": 20, "cursor": r.headers["x-next-cursor"]})
+            second.append(t.elapsed)
+        print(f"\nGET /workouts/search?q=squat  p50 {percentile(first, 50) * 1000:.2f}ms, "
+              f"next page p50 {percentile(second, 50) * 1000:.2f}ms")
+
+if __name__ == "__main__":
+    main()
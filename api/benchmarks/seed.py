@@ -0,0 +1,162 @@
+"""Synthetic data generator: users with workout history, steps and tasks.
+
+Migrates the target database, then bulk-inserts the data in one transaction::
+
+    python -m benchmarks.seed --users 100 --sessions 60 --days 90
+    python -m benchmarks.seed --url sqlite:///./load.db --users 1000
+
+Defaults to DATABASE_URL (./sweat.db). A database that already holds workout
+sessions is left alone unless --append is given. The derived tables
+(rollups, progression) are rebuilt for every seeded user.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core import config, rollups, versions
+from app.core.database import create_db_engine
+from app.core.migrations import run_migrations
+from app.core.progression import engine as progression
+from app.core.security import hash_password
+from app.models.steps import DailySteps
+from app.models.tasks import DailyTask
+from app.models.user import User
+from app.models.workout import WorkoutSession, WorkoutSet
+
+EXERCISES = [
+    "Back Squat", "Front Squat", "Bench Press", "Incline Bench Press", "Overhead Press", "Deadlift",
+    "Romanian Deadlift", "Barbell Row", "Pull Up", "Dip", "Leg Press", "Lunge", "Hip Thrust",
+    "Lat Pulldown", "Bicep Curl", "Tricep Extension", "Lateral Raise", "Calf Raise",
+]
+NOTES = [None, "push day", "pull day", "leg day", "full body", "deload week", "heavy singles", "hotel gym"]
+TASKS = [("Walk 20 minutes", 90), ("Stretch", 30), ("Drink 2L water", None), ("Bike ride", 250), ("Yoga", 120)]
+GOALS = ["build_muscle", "weight_loss", "be_healthier"]
+LEVELS = ["1-3", "3-5", "5-7"]
+
+BATCH = 5000
+
+
+@dataclass
+class SeedStats:
+    users: int = 0
+    sessions: int = 0
+    sets: int = 0
+    steps: int = 0
+    tasks: int = 0
+
+
+def _insert_batched(db: Session, model, rows: list[dict]) -> None:
+    for i in range(0, len(rows), BATCH):
+        db.execute(insert(model), rows[i:i + BATCH])
+
+
+def seed(
+    engine: Engine,
+    users: int,
+    sessions_per_user: int,
+    sets_per_session: int,
+    days: int,
+    tasks_per_day: int = 3,
+    rng_seed: int = 0,
+) -> SeedStats:
+    """Insert synthetic data on top of whatever `engine` already holds; commits once at the end."""
+    rng = random.Random(rng_seed)
+    stats = SeedStats()
+    today = date.today()
+    password_hash = hash_password("password")  # one hash, shared: seeding shouldn't take minutes
+
+    with Session(engine) as db:
+        first_id = (db.scalar(select(func.max(User.id))) or 0) + 1
+        user_ids = list(range(first_id, first_id + users))
+        _insert_batched(db, User, [
+            {"id": uid, "username": f"seed{uid}", "email": f"seed{uid}@example.com",
+             "password_hash": password_hash, "weight_lbs": rng.uniform(110, 260),
+             "height_in": rng.uniform(60, 76), "activity_level": rng.choice(LEVELS),
+             "main_goal": rng.choice(GOALS), "daily_step_goal": rng.choice([6000, 8000, 10000]),
+             "created_at": datetime.utcnow()}
+            for uid in user_ids
+        ])
+        stats.users = users
+
+        next_session = (db.scalar(select(func.max(WorkoutSession.id))) or 0) + 1
+        start = datetime.combine(today - timedelta(days=days - 1), datetime.min.time())
+        for uid in user_ids:
+            ids = range(next_session, next_session + sessions_per_user)
+            next_session += sessions_per_user
+            _insert_batched(db, WorkoutSession, [
+                {"id": sid, "user_id": uid, "note": rng.choice(NOTES),
+                 "started_at": start + timedelta(minutes=rng.randrange(days * 24 * 60))}
+                for sid in ids
+            ])
+            sets = []
+            for sid in ids:
+                for exercise in rng.sample(EXERCISES, max(1, sets_per_session // 3)):
+                    weight = float(rng.randrange(45, 315, 5))
+                    sets.extend(
+                        {"session_id": sid, "exercise": exercise, "reps": rng.randint(3, 15), "weight": weight}
+                        for _ in range(3)
+                    )
+            _insert_batched(db, WorkoutSet, sets)
+            stats.sessions += len(ids)
+            stats.sets += len(sets)
+
+        steps = [
+            {"user_id": uid, "day": today - timedelta(days=d), "steps": rng.randint(500, 18000)}
+            for uid in user_ids
+            for d in range(days)
+        ]
+        _insert_batched(db, DailySteps, steps)
+        stats.steps = len(steps)
+
+        tasks = []
+        for uid in user_ids:
+            for d in range(days):
+                for name, calories in rng.sample(TASKS, tasks_per_day):
+                    tasks.append({"user_id": uid, "day": today - timedelta(days=d), "task_name": name,
+                                  "calories": calories, "completed": d > 0 and rng.random() < 0.6})
+        _insert_batched(db, DailyTask, tasks)
+        stats.tasks = len(tasks)
+
+        for uid in user_ids:
+            rollups.rebuild(db, uid)
+            progression.rebuild(db, uid)
+            versions.bump(db, uid, "workouts")
+        db.commit()
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Seed a database with synthetic SWEat data")
+    parser.add_argument("--url", default=config.DATABASE_URL)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--sessions", type=int, default=60, help="workout sessions per user")
+    parser.add_argument("--sets", type=int, default=12, help="sets per session")
+    parser.add_argument("--days", type=int, default=90, help="days of steps/tasks history per user")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument("--append", action="store_true", help="seed even if the database already has data")
+    args = parser.parse_args()
+
+    engine = create_db_engine(args.url)
+    run_migrations(engine)
+    with engine.connect() as conn:
+        existing = conn.scalar(select(func.count()).select_from(WorkoutSession))
+    if existing and not args.append:
+        raise SystemExit(f"{args.url} already has {existing} workout sessions; pass --append to add more")
+
+    stats = seed(engine, args.users, args.sessions, args.sets, args.days, rng_seed=args.seed)
+    engine.dispose()
+    print(
+        f"Seeded {stats.users} users, {stats.sessions} sessions, {stats.sets} sets, "
+        f"{stats.steps} step days, {stats.tasks} tasks into {args.url}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Write throughput as the number of shards grows.
+
+Each writer process loops over its own users doing what POST /tasks/add
+does (insert a task, bump the resource version, commit) through the shard
+router. With one SQLite file every commit waits on the same write lock;
+spreading the users over N files gives N locks. "lock wait" is the mean
+time a commit spent waiting for its shard's lock (pool checkout included).
+Throughput only scales while there are cores to run the extra writers::
+
+    python -m benchmarks.shard_writes
+    python -m benchmarks.shard_writes --shards 1 2 4 8 --processes 8 --synchronous FULL
+
+Every run builds a fresh directory and shards in a temp dir, registers the
+users through the same placement as /auth/register, and runs in a child
+interpreter, because SHARD_URLS is read at import.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import date
+
+
+def _writer(user_ids: list[int], seconds: float, out: multiprocessing.Queue) -> None:
+    from app.core import versions
+    from app.core.database import session_for
+    from app.models.tasks import DailyTask
+
+    done, busy, waited = 0, 0, 0.0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        user_id = user_ids[done % len(user_ids)]
+        try:
+            with session_for(user_id) as db:
+                # BEGIN IMMEDIATE: returns once this shard's write lock is ours
+                start = time.perf_counter()
+                db.connection()
+                waited += time.perf_counter() - start
+                db.add(DailyTask(user_id=user_id, task_name="bench", calories=10, day=date.today()))
+                versions.bump(db, user_id, "tasks")
+                db.commit()
+            done += 1
+        except Exception:  # "database is locked" after busy_timeout
+            busy += 1
+    out.put((done, busy, waited))
+
+
+def child(users: int, processes: int, seconds: float) -> dict:
+    from app.core.database import SHARDS, SessionLocal
+    from app.core.migrations import upgrade_all
+    from app.core.rebalance import place_new_user
+    from app.models.user import User
+
+    upgrade_all()
+    placed: Counter = Counter()
+    for i in range(users):
+        with SessionLocal() as db:
+            user = User(username=f"bench{i}", email=f"bench{i}@example.com", password_hash="x")
+            db.add(user)
+            db.flush()
+            placed[place_new_user(db, user.id)] += 1
+            db.commit()
+
+    # The parent built engines above; forked writers drop them and build their own
+    ctx = multiprocessing.get_context("fork")
+    out = ctx.Queue()
+    ids = list(range(1, users + 1))
+    workers = [ctx.Process(target=_writer, args=(ids[i::processes], seconds, out)) for i in range(processes)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    results = [out.get() for _ in workers]
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "shards": len(SHARDS) or 1,
+        "commits": sum(r[0] for r in results),
+        "failed": sum(r[1] for r in results),
+        "lock_wait": sum(r[2] for r in results),
+        "seconds": elapsed,
+        "spread": sorted(placed.values()),
+    }
+
+
+def run(shards: int, args: argparse.Namespace) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'directory.db')}",
+            "SQLITE_SYNCHRONOUS": args.synchronous,
+            # One shard is the baseline: everything in the directory, as without SHARD_URLS
+            "SHARD_URLS": "" if shards == 1 else ",".join(
+                f"s{i}=sqlite:///{os.path.join(tmp, f's{i}.db')}" for i in range(shards)
+            ),
+        }
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.shard_writes", "--child",
+             "--users", str(args.users), "--processes", str(args.processes), "--seconds", str(args.seconds)],
+            env=env, check=True, capture_output=True, text=True,
+        )
+        return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--users", type=int, default=64)
+    parser.add_argument("--processes", type=int, default=4, help="writer processes, like gunicorn workers")
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--synchronous", default="NORMAL", help="SQLITE_SYNCHRONOUS for the run (FULL fsyncs every commit)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(child(args.users, args.processes, args.seconds)))
+        return
+
+    print(f"{args.processes} writer processes, {args.users} users, synchronous={args.synchronous}")
+    print(f"{'shards':>6} {'commits/s':>10} {'speedup':>8} {'lock wait':>10} {'failed':>7}  users per shard")
+    base = None
+    for n in args.shards:
+        r = run(n, args)
+        rate = r["commits"] / r["seconds"]
+        base = base or rate
+        wait_ms = r["lock_wait"] / max(r["commits"], 1) * 1000
+        print(f"{r['shards']:>6} {rate:10.0f} {rate / base:7.2f}x {wait_ms:8.3f}ms {r['failed']:>7}  {r['spread']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Idle server-sent event streams per worker: memory and notification latency.
+
+Starts ``gunicorn -c gunicorn.conf.py`` (one worker by default) on a
+throwaway SQLite file and opens idle GET /events streams in steps. After
+each step it reports the workers' private memory per open stream, and how
+long one /steps/update takes to reach every stream of that user. One stream
+in --fanout belongs to that user; the rest belong to other users and stay
+silent::
+
+    python -m benchmarks.sse_idle
+    python -m benchmarks.sse_idle --streams 1000 5000 10000 --workers 2
+
+With several workers the streams spread over them, and notifications reach
+the other workers through EVENTS_BACKEND=unix. Linux only (memory is read
+from /proc); each stream is one file descriptor on both sides, so raise
+``ulimit -n`` for large runs.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import queue
+import re
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+
+from app.core.config import BASE_DIR
+from .common import percentile
+from .startup import READY, _free_port, _memory_kb
+
+USER_ID = 1
+# Streams opened concurrently; stays under the listen backlog
+OPEN_BATCH = 200
+
+
+class Stream:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+
+async def open_stream(port: int, user_id: int) -> Stream:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        f"GET /events?user_id={user_id} HTTP/1.1\r\nHost: bench\r\nAccept: text/event-stream\r\n\r\n".encode()
+    )
+    await writer.drain()
+    status_line = (await reader.readuntil(b"\r\n\r\n")).split(b"\r\n", 1)[0].decode()
+    if " 200 " not in status_line:
+        raise RuntimeError(f"GET /events failed: {status_line}")
+    return Stream(reader, writer)
+
+
+async def notify(client: httpx.AsyncClient, listeners: list[Stream]) -> list[float]:
+    """POST /steps/update for USER_ID; seconds until each of its streams got the notification."""
+    start = time.perf_counter()
+
+    async def wait(stream: Stream) -> float:
+        await stream.reader.readuntil(b"event: steps")
+        return time.perf_counter() - start
+
+    waiting = [asyncio.ensure_future(wait(s)) for s in listeners]
+    (await client.post("/steps/update", params={"user_id": USER_ID, "steps": 1000})).raise_for_status()
+    return list(await asyncio.wait_for(asyncio.gather(*waiting), 30))
+
+
+async def measure(port: int, steps: list[int], fanout: int, worker_pids: list[int]) -> list[dict]:
+    baseline = sum(_memory_kb(pid)["uss"] for pid in worker_pids)
+    streams: list[Stream] = []
+    listeners: list[Stream] = []
+    results = []
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=30) as client:
+        for target in steps:
+            while len(streams) < target:
+                ids = range(len(streams), min(target, len(streams) + OPEN_BATCH))
+                # Stream i belongs to USER_ID every `fanout` streams, to a user of its own otherwise
+                users = [USER_ID if i % fanout == 0 else 100_000 + i for i in ids]
+                opened = await asyncio.gather(*(open_stream(port, u) for u in users))
+                streams.extend(opened)
+                listeners.extend(s for s, u in zip(opened, users) if u == USER_ID)
+
+            await asyncio.sleep(0.5)  # let the workers settle before reading memory
+            uss = sum(_memory_kb(pid)["uss"] for pid in worker_pids)
+            latencies = [max(await notify(client, listeners)) for _ in range(5)]
+            results.append({
+                "streams": len(streams),
+                "listeners": len(listeners),
+                "kb_per_stream": (uss - baseline) / len(streams),
+                "worker_uss_mb": uss / 1024,
+                "p50_ms": statistics.median(latencies) * 1000,
+                "max_ms": percentile(latencies, 100) * 1000,
+            })
+    for s in streams:
+        s.writer.close()
+    return results
+
+
+def run(args: argparse.Namespace) -> list[dict]:
+    with tempfile.TemporaryDirectory() as tmp:
+        port = _free_port()
+        env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'events.db')}",
+            "WEB_CONCURRENCY": str(args.workers),
+            "BIND": f"127.0.0.1:{port}",
+            "EVENTS_BACKEND": "unix" if args.workers > 1 else "local",
+            "EVENTS_SOCKET_DIR": os.path.join(tmp, "events"),
+            "EVENTS_MAX_STREAMS": str(max(args.streams) + 1),
+        }
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py"],
+            cwd=BASE_DIR, env=env, stderr=subprocess.PIPE, text=True,
+        )
+        lines: queue.Queue[str] = queue.Queue()
+        threading.Thread(target=lambda: [lines.put(line) for line in proc.stderr], daemon=True).start()
+        try:
+            worker_pids: list[int] = []
+            ready = 0
+            while ready < args.workers:
+                line = lines.get(timeout=60)
+                if m := re.search(r"Booting worker with pid: (\d+)", line):
+                    worker_pids.append(int(m.group(1)))
+                elif READY in line:
+                    ready += 1
+
+            with httpx.Client(base_url=f"http://127.0.0.1:{port}") as client:
+                client.post("/auth/register", json={
+                    "username": "bench", "email": "bench@example.com", "password": "bench-password"
+                }).raise_for_status()
+            return asyncio.run(measure(port, sorted(args.streams), args.fanout, worker_pids))
+        finally:
+            proc.send_signal(signal.SIGTERM)
+            proc.wait(timeout=60)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--streams", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--fanout", type=int, default=10, help="one stream in this many is the notified user's")
+    args = parser.parse_args()
+
+    print(f"{args.workers} worker(s), backend {'unix' if args.workers > 1 else 'local'}")
+    print(f"{'streams':>8} {'listeners':>10} {'KB/stream':>10} {'worker uss':>11} {'notify p50':>11} {'max':>9}")
+    for r in run(args):
+        print(f"{r['streams']:>8} {r['listeners']:>10} {r['kb_per_stream']:>10.1f} {r['worker_uss_mb']:>9.1f}MB "
+              f"{r['p50_ms']:>9.1f}ms {r['max_ms']:>7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
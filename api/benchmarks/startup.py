@@ -0,0 +1,139 @@
+"""Cold start and memory per worker of the gunicorn deployment, with and without preload.
+
+Starts ``gunicorn -c gunicorn.conf.py`` on a throwaway SQLite file, times how
+long it takes until every worker has finished startup, warms each worker
+with some requests, then reads the master's and the workers' memory from
+/proc (Linux only)::
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --workers 8 --requests 500
+
+RSS counts shared pages in full for every process. PSS splits them between
+the processes sharing them, so the PSS total is the real footprint. USS is
+each worker's private memory, which is what every extra worker costs.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import queue
+import re
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+
+from app.core.config import BASE_DIR
+
+READY = "Application startup complete."
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _memory_kb(pid: int) -> dict[str, int]:
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if rest.strip().endswith("kB"):
+                values[key] = int(rest.split()[0])
+    return {
+        "rss": values["Rss"],
+        "pss": values["Pss"],
+        "uss": values.get("Private_Clean", 0) + values.get("Private_Dirty", 0),
+    }
+
+
+def import_time() -> float:
+    """Seconds for a fresh interpreter to import the app, i.e. what each worker pays without preload."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import app.main"], cwd=BASE_DIR, check=True)
+    return time.perf_counter() - start
+
+
+def run(preload: bool, workers: int, requests: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        port = _free_port()
+        env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'startup.db')}",
+            "WEB_CONCURRENCY": str(workers),
+            "BIND": f"127.0.0.1:{port}",
+            "PRELOAD_APP": "1" if preload else "0",
+        }
+        start = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py"],
+            cwd=BASE_DIR, env=env, stderr=subprocess.PIPE, text=True,
+        )
+        lines: queue.Queue[tuple[float, str]] = queue.Queue()
+        threading.Thread(
+            target=lambda: [lines.put((time.perf_counter(), line)) for line in proc.stderr], daemon=True
+        ).start()
+
+        master = None
+        worker_pids: list[int] = []
+        ready = 0
+        try:
+            while ready < workers:
+                at, line = lines.get(timeout=60)
+                if m := re.search(r"Listening at: \S+ \((\d+)\)", line):
+                    master = int(m.group(1))
+                elif m := re.search(r"Booting worker with pid: (\d+)", line):
+                    worker_pids.append(int(m.group(1)))
+                elif READY in line:
+                    ready += 1
+            ready_after = at - start
+
+            # Every worker should build its engines and warm its caches before we measure
+            with httpx.Client(base_url=f"http://127.0.0.1:{port}") as client:
+                client.post("/auth/register", json={
+                    "username": "bench", "email": "bench@example.com", "password": "bench-password"
+                }).raise_for_status()
+                client.post("/workouts/sessions/bulk", json={
+                    "sets": [{"exercise": "Back Squat", "reps": 5, "weight": 225.0}] * 12
+                }).raise_for_status()
+                for _ in range(requests):
+                    client.get("/workouts/sessions", params={"limit": 20}, headers={"Connection": "close"})
+
+            worker_mem = [_memory_kb(pid) for pid in worker_pids]
+            return {
+                "ready_s": ready_after,
+                "master": _memory_kb(master),
+                "workers": worker_mem,
+            }
+        finally:
+            proc.send_signal(signal.SIGTERM)
+            proc.wait(timeout=30)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=200, help="warm-up requests spread over the workers")
+    args = parser.parse_args()
+
+    print(f"fresh interpreter import of app.main: {import_time() * 1000:.0f} ms\n")
+    print(f"{'mode':<11} {'ready':>8} {'master rss':>11} {'worker rss':>11} {'worker pss':>11} "
+          f"{'worker uss':>11} {'total pss':>10}")
+    for preload in (True, False):
+        r = run(preload, args.workers, args.requests)
+        n = len(r["workers"])
+        avg = {k: sum(w[k] for w in r["workers"]) / n / 1024 for k in ("rss", "pss", "uss")}
+        total_pss = (r["master"]["pss"] + sum(w["pss"] for w in r["workers"])) / 1024
+        print(f"{'preload' if preload else 'no preload':<11} {r['ready_s'] * 1000:6.0f}ms "
+              f"{r['master']['rss'] / 1024:9.1f}MB {avg['rss']:9.1f}MB {avg['pss']:9.1f}MB "
+              f"{avg['uss']:9.1f}MB {total_pss:8.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
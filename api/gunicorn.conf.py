@@ -0,0 +1,65 @@
+"""Production server: one gunicorn master, N uvicorn workers::
+
+    cd api
+    gunicorn -c gunicorn.conf.py
+    WEB_CONCURRENCY=8 BIND=0.0.0.0:8080 gunicorn -c gunicorn.conf.py
+
+The master imports the app once (preload_app), migrates and checks the schema
+of every database (the directory and any SHARD_URLS) once, then forks the
+workers. Their copy of the imported code and config is shared copy-on-write,
+and they skip the startup migration. Engines, pools and SQLite pragmas are
+per worker, built on the first request after fork (see app/core/database.py).
+
+Per-worker state stays per worker: the dashboard and token caches, the
+write-behind queue and the event hub. Change notifications written in one
+worker reach the event hub of every other through EVENTS_BACKEND=unix, the
+default here; that feeds their /events streams and clears their cached
+dashboard summaries.
+
+Measure cold start and memory per worker with ``python -m benchmarks.startup``.
+"""
+import multiprocessing
+import os
+
+# Read by app.core.config when the master preloads the app, so workers inherit it
+os.environ["MIGRATE_ON_STARTUP"] = "0"
+
+# A retry may land on any worker, so Idempotency-Keys are kept where all of them see them
+os.environ.setdefault("IDEMPOTENCY_BACKEND", "sql")
+
+# A client's /events stream is held by one worker while its writes land on any
+os.environ.setdefault("EVENTS_BACKEND", "unix")
+
+wsgi_app = "app.main:app"
+worker_class = "uvicorn_worker.UvicornWorker"
+
+# PRELOAD_APP=0 makes every worker import the app itself (slower start, no sharing)
+preload_app = os.getenv("PRELOAD_APP", "1").lower() in ("1", "true", "yes")
+
+workers = int(os.getenv("WEB_CONCURRENCY", str(min(2 * multiprocessing.cpu_count() + 1, 8))))
+bind = os.getenv("BIND", "0.0.0.0:8000")
+
+# Seconds a worker may stay silent before the master replaces it, and the
+# grace period for in-flight requests (and write-behind flushes) on shutdown
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info")
+
+
+def on_starting(server):
+    """Migrate and check the schema once, in the master, before any worker exists."""
+    from app.core.migrations import check_all, upgrade_all
+
+    # The directory and every shard, each through a throwaway engine disposed
+    # before the fork, so no connection is inherited
+    upgrade_all()
+    problems = check_all()
+
+    for problem in problems:
+        server.log.error("schema check: %s", problem)
+    if problems:
+        raise SystemExit("database schema does not match the models; refusing to start")
+    server.log.info("schema is up to date")
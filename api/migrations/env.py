@@ -0,0 +1,36 @@
+from alembic import context
+
+from app.core.database import Base, get_engine
+from app.core.migrations import include_object
+import app.models  # noqa: F401  (registers every model on Base.metadata)
+
+target_metadata = Base.metadata
+
+def run_migrations() -> None:
+    # The app's migration runner hands us an open connection; `alembic` on the
+    # command line does not, so fall back to the configured engine.
+    connection = context.config.attributes.get("connection")
+    if connection is not None:
+        _run(connection)
+        return
+
+    with get_engine().connect() as connection:
+        _run(connection)
+
+
+def _run(connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        # SQLite can't ALTER most things in place; batch mode rebuilds the table
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+if context.is_offline_mode():
+    raise SystemExit("Offline (--sql) migrations are not supported")
+
+run_migrations()
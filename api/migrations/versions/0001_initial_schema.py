@@ -0,0 +1,114 @@
+"""Initial schema, as previously created by Base.metadata.create_all
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("username", sa.String(50), nullable=False, unique=True),
+        sa.Column("email", sa.String(120), nullable=False, unique=True),
+        sa.Column("password_hash", sa.String(), nullable=False),
+        sa.Column("weight_lbs", sa.Float()),
+        sa.Column("height_in", sa.Float()),
+        sa.Column("activity_level", sa.String(20)),
+        sa.Column("main_goal", sa.String(30)),
+        sa.Column("gender", sa.String(10)),
+        sa.Column("age", sa.Integer()),
+        sa.Column("daily_step_goal", sa.Integer()),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+
+    op.create_table(
+        "workout_sessions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("started_at", sa.DateTime(), nullable=False),
+        sa.Column("note", sa.String(500)),
+    )
+    op.create_index("ix_workout_sessions_id", "workout_sessions", ["id"])
+    op.create_index("ix_workout_sessions_started_at", "workout_sessions", ["started_at"])
+
+    op.create_table(
+        "workout_sets",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "session_id",
+            sa.Integer(),
+            sa.ForeignKey("workout_sessions.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("exercise", sa.String(120), nullable=False),
+        sa.Column("reps", sa.Integer(), nullable=False),
+        sa.Column("weight", sa.Float(), nullable=False),
+        sa.CheckConstraint("reps >= 1", name="ck_workout_sets_reps_ge_1"),
+        sa.CheckConstraint("weight >= 0", name="ck_workout_sets_weight_ge_0"),
+    )
+    op.create_index("ix_workout_sets_id", "workout_sets", ["id"])
+    op.create_index("ix_workout_sets_session_id", "workout_sets", ["session_id"])
+    op.create_index("ix_workout_sets_session_exercise", "workout_sets", ["session_id", "exercise"])
+
+    op.create_table(
+        "exercise_progress",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("exercise", sa.String(120), nullable=False),
+        sa.Column("current_weight", sa.Float(), nullable=False),
+        sa.Column("best_reps_first_set", sa.Integer(), nullable=False),
+        sa.Column("recommended_next_weight", sa.Float()),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+
+    op.create_table(
+        "goals",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("goal_type", sa.String(50), nullable=False),
+        sa.Column("target_value", sa.Float(), nullable=False),
+        sa.Column("progress_value", sa.Float(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_goals_id", "goals", ["id"])
+
+    op.create_table(
+        "daily_steps",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("steps", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+    )
+
+    op.create_table(
+        "daily_tasks",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("task_name", sa.String(200), nullable=False),
+        sa.Column("calories", sa.Integer()),
+        sa.Column("completed", sa.Boolean(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    for table in (
+        "daily_tasks",
+        "daily_steps",
+        "goals",
+        "exercise_progress",
+        "workout_sets",
+        "workout_sessions",
+        "users",
+    ):
+        op.drop_table(table)
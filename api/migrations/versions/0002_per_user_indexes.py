@@ -0,0 +1,32 @@
+"""Per-user indexes for the daily tables; one daily_steps row per (user_id, day)
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # update_steps could race into duplicate day rows; keep the newest of each
+    op.execute(
+        "DELETE FROM daily_steps WHERE id NOT IN "
+        "(SELECT MAX(id) FROM daily_steps GROUP BY user_id, day)"
+    )
+    op.create_index("uq_daily_steps_user_day", "daily_steps", ["user_id", "day"], unique=True)
+    op.create_index("ix_daily_tasks_user_day", "daily_tasks", ["user_id", "day"])
+    op.create_index("ix_goals_user_id", "goals", ["user_id"])
+    op.create_index("ix_exercise_progress_user_exercise", "exercise_progress", ["user_id", "exercise"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_exercise_progress_user_exercise", "exercise_progress")
+    op.drop_index("ix_goals_user_id", "goals")
+    op.drop_index("ix_daily_tasks_user_day", "daily_tasks")
+    op.drop_index("uq_daily_steps_user_day", "daily_steps")
@@ -0,0 +1,29 @@
+"""One exercise_progress row per (user_id, exercise), so progress can be upserted
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "DELETE FROM exercise_progress WHERE id NOT IN "
+        "(SELECT MAX(id) FROM exercise_progress GROUP BY user_id, exercise)"
+    )
+    op.drop_index("ix_exercise_progress_user_exercise", "exercise_progress")
+    op.create_index(
+        "uq_exercise_progress_user_exercise", "exercise_progress", ["user_id", "exercise"], unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_exercise_progress_user_exercise", "exercise_progress")
+    op.create_index("ix_exercise_progress_user_exercise", "exercise_progress", ["user_id", "exercise"])
@@ -0,0 +1,60 @@
+"""Per-user daily and weekly rollups of workout volume, steps and task calories
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+
+Existing history is not backfilled here; run
+``python -m app.core.rollups rebuild --user-id <id>`` once after upgrading.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "stats_rollups",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("period", sa.String(4), nullable=False),
+        sa.Column("period_start", sa.Date(), nullable=False),
+        sa.Column("sets", sa.Integer(), nullable=False),
+        sa.Column("reps", sa.Integer(), nullable=False),
+        sa.Column("volume", sa.Float(), nullable=False),
+        sa.Column("steps", sa.Integer(), nullable=False),
+        sa.Column("task_calories", sa.Integer(), nullable=False),
+    )
+    op.create_index(
+        "uq_stats_rollups_user_period", "stats_rollups", ["user_id", "period", "period_start"], unique=True
+    )
+
+    op.create_table(
+        "exercise_rollups",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("period", sa.String(4), nullable=False),
+        sa.Column("period_start", sa.Date(), nullable=False),
+        sa.Column("exercise", sa.String(120), nullable=False),
+        sa.Column("sets", sa.Integer(), nullable=False),
+        sa.Column("reps", sa.Integer(), nullable=False),
+        sa.Column("volume", sa.Float(), nullable=False),
+    )
+    op.create_index(
+        "uq_exercise_rollups_user_period_exercise",
+        "exercise_rollups",
+        ["user_id", "period", "period_start", "exercise"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_exercise_rollups_user_period_exercise", "exercise_rollups")
+    op.drop_table("exercise_rollups")
+    op.drop_index("uq_stats_rollups_user_period", "stats_rollups")
+    op.drop_table("stats_rollups")
@@ -0,0 +1,94 @@
+"""Full-text search over session notes and exercises (SQLite FTS5)
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+
+workout_search holds one row per session (rowid = session id): its note and
+the distinct exercises it contains. Triggers keep it in sync, so every writer
+(ORM, bulk INSERT, raw SQL) is covered. A set only touches the index when its
+exercise is new to the session, which keeps bulk ingest cheap.
+
+Other databases get no index; /workouts/search falls back to LIKE there.
+"""
+from alembic import op
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+# Distinct exercises of a session, as stored in workout_search.exercises
+_EXERCISES_OF = (
+    "(SELECT coalesce(group_concat(exercise, ', '), '') FROM "
+    "(SELECT DISTINCT exercise FROM workout_sets WHERE session_id = {session_id}))"
+)
+
+TRIGGERS = {
+    "workout_search_session_ai": f"""
+        AFTER INSERT ON workout_sessions BEGIN
+            INSERT INTO workout_search(rowid, note, exercises)
+            VALUES (NEW.id, coalesce(NEW.note, ''), {_EXERCISES_OF.format(session_id="NEW.id")});
+        END""",
+    "workout_search_session_au": """
+        AFTER UPDATE OF note ON workout_sessions BEGIN
+            UPDATE workout_search SET note = coalesce(NEW.note, '') WHERE rowid = NEW.id;
+        END""",
+    "workout_search_session_ad": """
+        AFTER DELETE ON workout_sessions BEGIN
+            DELETE FROM workout_search WHERE rowid = OLD.id;
+        END""",
+    "workout_search_set_ai": """
+        AFTER INSERT ON workout_sets
+        WHEN NOT EXISTS (
+            SELECT 1 FROM workout_sets
+            WHERE session_id = NEW.session_id AND exercise = NEW.exercise AND id <> NEW.id
+        ) BEGIN
+            UPDATE workout_search
+            SET exercises = CASE WHEN exercises = '' THEN NEW.exercise ELSE exercises || ', ' || NEW.exercise END
+            WHERE rowid = NEW.session_id;
+        END""",
+    "workout_search_set_ad": f"""
+        AFTER DELETE ON workout_sets
+        WHEN NOT EXISTS (
+            SELECT 1 FROM workout_sets WHERE session_id = OLD.session_id AND exercise = OLD.exercise
+        ) BEGIN
+            UPDATE workout_search SET exercises = {_EXERCISES_OF.format(session_id="OLD.session_id")}
+            WHERE rowid = OLD.session_id;
+        END""",
+    "workout_search_set_au": f"""
+        AFTER UPDATE OF exercise, session_id ON workout_sets BEGIN
+            UPDATE workout_search SET exercises = {_EXERCISES_OF.format(session_id="OLD.session_id")}
+            WHERE rowid = OLD.session_id;
+            UPDATE workout_search SET exercises = {_EXERCISES_OF.format(session_id="NEW.session_id")}
+            WHERE rowid = NEW.session_id;
+        END""",
+}
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "sqlite":
+        return
+
+    # prefix='2 3' adds prefix indexes so "squ*" style queries stay index lookups
+    op.execute(
+        "CREATE VIRTUAL TABLE workout_search USING fts5("
+        "note, exercises, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    op.execute(
+        "INSERT INTO workout_search(rowid, note, exercises) "
+        f"SELECT id, coalesce(note, ''), {_EXERCISES_OF.format(session_id='workout_sessions.id')} "
+        "FROM workout_sessions"
+    )
+    for name, body in TRIGGERS.items():
+        op.execute(f"CREATE TRIGGER {name} {body}")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "sqlite":
+        return
+
+    for name in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    op.execute("DROP TABLE IF EXISTS workout_search")
@@ -0,0 +1,32 @@
+"""Per-user resource version counters for ETags
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "resource_versions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("resource", sa.String(32), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+    )
+    op.create_index(
+        "uq_resource_versions_user_resource", "resource_versions", ["user_id", "resource"], unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_resource_versions_user_resource", "resource_versions")
+    op.drop_table("resource_versions")
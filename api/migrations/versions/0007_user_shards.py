@@ -0,0 +1,27 @@
+"""User -> shard placement for horizontal sharding
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_shards",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("shard", sa.String(32), nullable=False),
+        sa.Column("moving_to", sa.String(32), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("user_shards")
@@ -0,0 +1,102 @@
+"""Workout sessions belong to a user; index them by (user_id, started_at, id)
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+
+Existing sessions need an owner. On a database with exactly one user they
+go to that user; otherwise set SESSION_OWNER_USER_ID to the user who should
+get them, or the upgrade stops before changing anything. The per-user index
+replaces the global started_at one: listing, paging and exporting a user's
+sessions become a range scan over their own entries, however many sessions
+other users have.
+
+SQLite can't add NOT NULL or a foreign key in place, so the table is rebuilt
+(batch mode), which drops its triggers; the workout_search ones from 0005 are
+recreated as they were.
+"""
+import os
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+# workout_sessions' triggers from 0005, unchanged
+SESSION_TRIGGERS = {
+    "workout_search_session_ai": """
+        AFTER INSERT ON workout_sessions BEGIN
+            INSERT INTO workout_search(rowid, note, exercises)
+            VALUES (NEW.id, coalesce(NEW.note, ''), (SELECT coalesce(group_concat(exercise, ', '), '') FROM
+                (SELECT DISTINCT exercise FROM workout_sets WHERE session_id = NEW.id)));
+        END""",
+    "workout_search_session_au": """
+        AFTER UPDATE OF note ON workout_sessions BEGIN
+            UPDATE workout_search SET note = coalesce(NEW.note, '') WHERE rowid = NEW.id;
+        END""",
+    "workout_search_session_ad": """
+        AFTER DELETE ON workout_sessions BEGIN
+            DELETE FROM workout_search WHERE rowid = OLD.id;
+        END""",
+}
+
+
+def _recreate_search_triggers() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite" or not sa.inspect(bind).has_table("workout_search"):
+        return
+    for name, body in SESSION_TRIGGERS.items():
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+        op.execute(f"CREATE TRIGGER {name} {body}")
+
+
+def _backfill_owner(bind) -> int | None:
+    """The user existing sessions go to; None when there are none."""
+    if not bind.execute(sa.text("SELECT 1 FROM workout_sessions LIMIT 1")).first():
+        return None
+
+    configured = os.getenv("SESSION_OWNER_USER_ID")
+    if configured:
+        owner = int(configured)
+        if not bind.execute(sa.text("SELECT 1 FROM users WHERE id = :id"), {"id": owner}).first():
+            raise RuntimeError(f"SESSION_OWNER_USER_ID={owner}, but there is no user with that id")
+        return owner
+
+    users = bind.execute(sa.text("SELECT id FROM users LIMIT 2")).scalars().all()
+    if len(users) == 1:
+        return users[0]
+    found = "no users" if not users else "more than one user"
+    raise RuntimeError(
+        f"can't tell who owns the existing workout sessions: the database has {found}. "
+        "Set SESSION_OWNER_USER_ID to the id of the user they belong to (an existing user) "
+        "and run the migration again."
+    )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    owner = _backfill_owner(bind)
+
+    op.add_column("workout_sessions", sa.Column("user_id", sa.Integer(), nullable=True))
+    if owner is not None:
+        op.execute(sa.text("UPDATE workout_sessions SET user_id = :owner").bindparams(owner=owner))
+
+    with op.batch_alter_table("workout_sessions") as batch:
+        batch.alter_column("user_id", existing_type=sa.Integer(), nullable=False)
+        batch.create_foreign_key("fk_workout_sessions_user_id_users", "users", ["user_id"], ["id"])
+        batch.drop_index("ix_workout_sessions_started_at")
+        batch.create_index("ix_workout_sessions_user_started", ["user_id", "started_at", "id"])
+    _recreate_search_triggers()
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("workout_sessions") as batch:
+        batch.drop_index("ix_workout_sessions_user_started")
+        batch.create_index("ix_workout_sessions_started_at", ["started_at"])
+        batch.drop_constraint("fk_workout_sessions_user_id_users", type_="foreignkey")
+        batch.drop_column("user_id")
+    _recreate_search_triggers()
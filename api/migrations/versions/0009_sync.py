@@ -0,0 +1,47 @@
+"""Delta sync: compacted per-user change log and client mutation keys
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "sync_changes",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("seq", sa.Integer(), nullable=False),
+        sa.Column("entity", sa.String(16), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("deleted", sa.Boolean(), nullable=False),
+    )
+    op.create_index(
+        "uq_sync_changes_user_entity", "sync_changes", ["user_id", "entity", "entity_id"], unique=True
+    )
+    op.create_index("ix_sync_changes_user_seq", "sync_changes", ["user_id", "seq"])
+
+    op.create_table(
+        "sync_mutations",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("key", sa.String(64), nullable=False),
+        sa.Column("status", sa.Integer(), nullable=True),
+        sa.Column("body", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("uq_sync_mutations_user_key", "sync_mutations", ["user_id", "key"], unique=True)
+    op.create_index("ix_sync_mutations_created_at", "sync_mutations", ["created_at"])
+
+
+def downgrade() -> None:
+    op.drop_table("sync_mutations")
+    op.drop_table("sync_changes")
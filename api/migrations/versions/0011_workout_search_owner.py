@@ -0,0 +1,92 @@
+"""Index each workout_search row's owner, so a search only visits its user's rows
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18
+
+workout_search gets an `owner` column holding one token per row, "u<user_id>".
+/workouts/search ANDs that token into its MATCH, so FTS5 intersects the
+query's doclists with the user's own instead of ranking every user's matches
+and joining to workout_sessions afterwards. An UNINDEXED user_id column would
+not help: FTS5 can only filter on it after matching.
+
+FTS5 tables can't gain columns, so the index is rebuilt from workout_sessions
+and workout_sets. Only the workout_sessions triggers change; the workout_sets
+ones from 0005 never touch the owner. The owner column gets no weight in
+bm25(), so ranks still come from note and exercises alone.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+# Distinct exercises of a session, as stored in workout_search.exercises (as in 0005)
+_EXERCISES_OF = (
+    "(SELECT coalesce(group_concat(exercise, ', '), '') FROM "
+    "(SELECT DISTINCT exercise FROM workout_sets WHERE session_id = {session_id}))"
+)
+
+SESSION_TRIGGERS = {
+    "workout_search_session_ai": f"""
+        AFTER INSERT ON workout_sessions BEGIN
+            INSERT INTO workout_search(rowid, note, exercises, owner)
+            VALUES (NEW.id, coalesce(NEW.note, ''), {_EXERCISES_OF.format(session_id="NEW.id")}, 'u' || NEW.user_id);
+        END""",
+    "workout_search_session_au": """
+        AFTER UPDATE OF note, user_id ON workout_sessions BEGIN
+            UPDATE workout_search SET note = coalesce(NEW.note, ''), owner = 'u' || NEW.user_id
+            WHERE rowid = NEW.id;
+        END""",
+}
+
+# The same two triggers as 0005 created them, for downgrade()
+OLD_SESSION_TRIGGERS = {
+    "workout_search_session_ai": f"""
+        AFTER INSERT ON workout_sessions BEGIN
+            INSERT INTO workout_search(rowid, note, exercises)
+            VALUES (NEW.id, coalesce(NEW.note, ''), {_EXERCISES_OF.format(session_id="NEW.id")});
+        END""",
+    "workout_search_session_au": """
+        AFTER UPDATE OF note ON workout_sessions BEGIN
+            UPDATE workout_search SET note = coalesce(NEW.note, '') WHERE rowid = NEW.id;
+        END""",
+}
+
+
+def _has_index() -> bool:
+    bind = op.get_bind()
+    return bind.dialect.name == "sqlite" and sa.inspect(bind).has_table("workout_search")
+
+
+def _rebuild(columns: str, select_owner: str, triggers: dict[str, str]) -> None:
+    for name in triggers:
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    op.execute("DROP TABLE workout_search")
+    # As in 0005: prefix indexes keep "squ*" style queries index lookups
+    op.execute(
+        f"CREATE VIRTUAL TABLE workout_search USING fts5({columns}, "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    op.execute(
+        f"INSERT INTO workout_search(rowid, {columns}) "
+        f"SELECT id, coalesce(note, ''), {_EXERCISES_OF.format(session_id='workout_sessions.id')}{select_owner} "
+        "FROM workout_sessions"
+    )
+    for name, body in triggers.items():
+        op.execute(f"CREATE TRIGGER {name} {body}")
+
+
+def upgrade() -> None:
+    if _has_index():
+        _rebuild("note, exercises, owner", ", 'u' || user_id", SESSION_TRIGGERS)
+        # workout_search.rank is bm25(note, exercises, owner) with these weights
+        op.execute("INSERT INTO workout_search(workout_search, rank) VALUES ('rank', 'bm25(1.0, 1.0, 0.0)')")
+
+
+def downgrade() -> None:
+    if _has_index():
+        _rebuild("note, exercises", "", OLD_SESSION_TRIGGERS)